@@ -6,9 +6,13 @@ import logging
 import json
 import re
 
+from starlette.concurrency import run_in_threadpool
+
 from app.ai.config import ai_settings
 from app.ai.providers import get_ai_provider
-from app.search.client import get_opensearch_client, search_logs
+from app.config import settings
+from app.search.client import get_async_opensearch_client, search_logs, template_counts
+from app.search.rollups import level_timeline, rollups_cover
 
 logger = logging.getLogger(__name__)
 
@@ -36,14 +40,15 @@ class LogAnalyzer:
 
 Format your response as structured markdown with these sections.
 
-When suggesting queries, use OpenSearch/Lucene syntax like:
+When suggesting queries, use the LogWatch query syntax (field:value, quoted
+phrases, wildcards, [a TO b] ranges, >=/<= comparisons, AND/OR/NOT), like:
 - `level:ERROR AND service:api`
 - `message:"database timeout" AND timestamp:[now-1h TO now]`
-- `status:500 AND path:/api/users`
+- `status:>=500 AND path:/api/users*`
 
 Be concise but thorough. Focus on actionable insights."""
     
-    def analyze(
+    async def analyze(
         self,
         timestamp: Optional[datetime] = None,
         keywords: Optional[str] = None,
@@ -73,10 +78,10 @@ Be concise but thorough. Focus on actionable insights."""
         logger.info(f"Analyzing logs from {start_time} to {end_time}")
         
         # Fetch logs from OpenSearch
-        client = get_opensearch_client()
+        client = get_async_opensearch_client()
         
         try:
-            results = search_logs(
+            results = await search_logs(
                 client,
                 start_time=start_time,
                 end_time=end_time,
@@ -104,8 +109,17 @@ Be concise but thorough. Focus on actionable insights."""
                     "timestamp": datetime.utcnow().isoformat()
                 }
             
+            # Template counts summarize the whole range, not just the sample
+            try:
+                templates = await template_counts(client, start_time, end_time, query=keywords)
+            except Exception as e:
+                logger.warning(f"Template counts unavailable: {e}")
+                templates = []
+            
             # Prepare context for AI
-            log_context = self._prepare_log_context(logs, total_count)
+            log_context = self._prepare_log_context(
+                logs, total_count, templates, lower_bound=results.get('is_lower_bound', False)
+            )
             
             # Build messages for AI
             messages = [{"role": "system", "content": self.system_prompt}]
@@ -123,7 +137,9 @@ Be concise but thorough. Focus on actionable insights."""
             
             # Generate AI response
             logger.info("Calling AI provider for analysis...")
-            ai_response = self.provider.generate(
+            # Provider SDKs are blocking; keep them off the event loop
+            ai_response = await run_in_threadpool(
+                self.provider.generate,
                 messages,
                 temperature=ai_settings.ai_temperature,
                 max_tokens=ai_settings.ai_max_tokens
@@ -134,8 +150,17 @@ Be concise but thorough. Focus on actionable insights."""
             # Parse response and extract structured data
             parsed_response = self._parse_ai_response(ai_response, logs)
             
-            # Generate chart data
-            chart_data = self._generate_chart_data(logs, start_time, end_time)
+            # Generate chart data - from rollups (every event in range) when they
+            # cover it and no keyword filter applies, else from the sample
+            chart_data = None
+            if not keywords and settings.rollup_enabled:
+                try:
+                    if await rollups_cover(client, start_time):
+                        chart_data = self._rollup_chart_data(await level_timeline(client, start_time, end_time))
+                except Exception as e:
+                    logger.warning(f"Rollup chart data unavailable: {e}")
+            if chart_data is None:
+                chart_data = self._generate_chart_data(logs, start_time, end_time)
             
             return {
                 "analysis": ai_response,
@@ -156,11 +181,24 @@ Be concise but thorough. Focus on actionable insights."""
             logger.error(f"Analysis error: {e}", exc_info=True)
             raise
     
-    def _prepare_log_context(self, logs: List[Dict], total_count: int) -> str:
+    def _prepare_log_context(
+        self,
+        logs: List[Dict],
+        total_count: int,
+        templates: Optional[List[Dict[str, Any]]] = None,
+        lower_bound: bool = False
+    ) -> str:
         """Format logs for AI context"""
         
         context_lines = []
-        context_lines.append(f"Total logs in range: {total_count}")
+        context_lines.append(f"Total logs in range: {'at least ' if lower_bound else ''}{total_count}")
+        
+        if templates:
+            context_lines.append("Most frequent message templates (<*> = variable):")
+            for t in templates:
+                context_lines.append(f"- {t['count']}x {t['template'] or 'template ' + t['template_id']}")
+            context_lines.append("")
+        
         context_lines.append(f"Sample of {len(logs)} logs:\n")
         
         for i, log in enumerate(logs[:50], 1):  # First 50 for detailed view
@@ -286,6 +324,28 @@ Be concise but thorough. Focus on actionable insights."""
             "bucket_minutes": bucket_minutes
         }
 
+    
+    def _rollup_chart_data(self, timeline: List[Dict[str, Any]], bucket_minutes: int = 5) -> Dict[str, Any]:
+        """Chart data in the _generate_chart_data format from rollup level counts"""
+        
+        chart = []
+        for bucket in timeline:
+            levels = bucket['levels']
+            errors = levels.get('ERROR', 0)
+            warnings = levels.get('WARN', 0) + levels.get('WARNING', 0)
+            chart.append({
+                "time": bucket['time'].strftime('%Y-%m-%d %H:%M'),
+                "errors": errors,
+                "warnings": warnings,
+                # Events without a level count as info, as in _generate_chart_data
+                "info": bucket['total'] - errors - warnings
+            })
+        
+        return {
+            "timeline": chart,
+            "bucket_minutes": bucket_minutes
+        }
+
 
 # Global analyzer instance
 _analyzer = None
@@ -56,7 +56,7 @@ async def analyze_logs(
     try:
         analyzer = get_analyzer()
         
-        result = analyzer.analyze(
+        result = await analyzer.analyze(
             timestamp=request.timestamp,
             keywords=request.keywords,
             time_window_minutes=request.time_window_minutes,
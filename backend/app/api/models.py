@@ -1,7 +1,7 @@
 """API request/response models"""
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, conint
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 
 
@@ -22,10 +22,11 @@ class LogEvent(BaseModel):
     timestamp: datetime
     source_file: str
     line_number: int
-    raw_line: str
+    raw_line: Optional[str] = None  # absent when projected out via fields
     tokens: List[str] = []
     fields: Dict[str, Any] = {}
     ingest_id: Optional[str] = None
+    event_id: Optional[str] = None
 
 
 class LogQueryRequest(BaseModel):
@@ -38,6 +39,9 @@ class LogQueryRequest(BaseModel):
     source_file: Optional[str] = None
     page: int = Field(default=1, ge=1)
     page_size: int = Field(default=100, ge=1, le=1000)
+    cursor: Optional[str] = None
+    use_cursor: bool = False
+    track_total_hits: Optional[Union[bool, conint(ge=0)]] = None  # None: SEARCH_TRACK_TOTAL_HITS
 
 
 class LogSearchRequest(BaseModel):
@@ -45,17 +49,22 @@ class LogSearchRequest(BaseModel):
     query: str
     start_time: datetime
     end_time: datetime
-    fields: Optional[List[str]] = None
+    fields: Optional[List[str]] = None  # _source fields to return; "-name" excludes (tokens excluded by default)
     page: int = Field(default=1, ge=1)
     page_size: int = Field(default=100, ge=1, le=1000)
+    cursor: Optional[str] = None  # next_cursor from the previous page
+    use_cursor: bool = False  # start cursor pagination on this page
+    track_total_hits: Optional[Union[bool, conint(ge=0)]] = None  # true: exact, N: count up to N, false: no total
 
 
 class LogQueryResponse(BaseModel):
     """Log query response"""
-    total: int
+    total: Optional[int] = None  # None when totals weren't tracked
+    is_lower_bound: bool = False  # total stopped at the track_total_hits cap
     page: int
     page_size: int
     logs: List[LogEvent]
+    next_cursor: Optional[str] = None
 
 
 class AggregationRequest(BaseModel):
@@ -70,3 +79,12 @@ class AggregationResponse(BaseModel):
     time_series: List[Dict[str, Any]]
     top_tokens: List[Dict[str, Any]]
     sources: List[Dict[str, Any]]
+    top_templates: List[Dict[str, Any]] = []
+
+
+class DashboardResponse(BaseModel):
+    """Every dashboard panel in one response"""
+    logs: LogQueryResponse
+    aggregations: AggregationResponse
+    stats: Dict[str, Any]
+    timings_ms: Dict[str, float]  # per panel
@@ -1,6 +1,7 @@
 """API routes"""
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Optional
 from datetime import datetime, timedelta
@@ -9,17 +10,36 @@ import logging
 from app.api.models import (
     TokenResponse, LogQueryRequest, LogQueryResponse,
     LogSearchRequest, AggregationRequest, AggregationResponse,
-    LogEvent
+    DashboardResponse, LogEvent
 )
 from app.auth.jwt_handler import create_access_token, verify_password, hash_password
-from app.auth.jwt_bearer import jwt_bearer
-from app.search.client import get_opensearch_client, search_logs, aggregate_logs
+from app.auth.jwt_bearer import jwt_bearer, jwt_bearer_or_query
+from app.search.client import get_async_opensearch_client, search_logs, parse_track_total_hits
+from app.search.aggregations import dashboard_aggregations
+from app.search.cache import cached
+from app.search.query import compile_matcher, compile_query
+from app.live_tail import get_tail_hub, tail_events
+from app.search.dashboard import dashboard_panels
+from app.search.stats import get_stats_collector
+from app.search.export import EXPORT_FORMATS, export_logs, parse_resume_after
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+
+def page_response(results: dict, model):
+    """Search results as JSON, passed through without building models
+
+    Hits are returned as stored in ``_source`` and encoded with orjson, so
+    large pages don't pay for a pydantic model per event. With
+    ``RESPONSE_VALIDATION`` they go through ``model`` instead (debugging).
+    """
+    if settings.response_validation:
+        return model(**results)
+    return ORJSONResponse(results)
+
 # Mock user database (replace with real database in production)
 USERS_DB = {
     settings.default_admin_user: {
@@ -54,11 +74,25 @@ async def query_logs(
     source_file: Optional[str] = None,
     page: int = 1,
     page_size: int = 100,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    fields: Optional[str] = None,
+    track_total_hits: Optional[str] = None,
     token: Optional[str] = Depends(jwt_bearer)
 ):
-    """Query logs by time range or specific timestamp"""
+    """Query logs by time range or specific timestamp
+
+    Pass ``use_cursor=true`` and then the returned ``next_cursor`` to page
+    deep result sets at constant cost. ``fields`` is a comma-separated list
+    of _source fields to return (``-name`` excludes one). ``track_total_hits``
+    is ``true``, ``false`` or a cap (default ``SEARCH_TRACK_TOTAL_HITS``).
+    """
+    
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
     
     try:
+        track = parse_track_total_hits(track_total_hits) if track_total_hits is not None else None
+
         # Handle timestamp with window
         if timestamp:
             start_time = timestamp - timedelta(seconds=window_seconds/2)
@@ -69,18 +103,35 @@ async def query_logs(
             end_time = datetime.utcnow()
             start_time = end_time - timedelta(hours=1)
         
-        client = get_opensearch_client()
-        results = search_logs(
-            client,
-            start_time=start_time,
-            end_time=end_time,
-            source_file=source_file,
-            page=page,
-            page_size=page_size
-        )
+        client = get_async_opensearch_client()
+        if cursor or use_cursor:
+            # Cursor pages belong to one point in time; nothing to share
+            results = await search_logs(
+                client,
+                start_time=start_time,
+                end_time=end_time,
+                source_file=source_file,
+                fields=field_list,
+                page=page,
+                page_size=page_size,
+                cursor=cursor,
+                use_cursor=use_cursor,
+                track_total_hits=track
+            )
+        else:
+            results = await cached(
+                "logs", start_time, end_time,
+                {"source_file": source_file, "fields": field_list, "page": page, "page_size": page_size, "track": track},
+                lambda start, end: search_logs(
+                    client, start_time=start, end_time=end, source_file=source_file,
+                    fields=field_list, page=page, page_size=page_size, track_total_hits=track
+                )
+            )
         
-        return LogQueryResponse(**results)
+        return page_response(results, LogQueryResponse)
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying logs: {e}")
         raise HTTPException(
@@ -97,19 +148,38 @@ async def search_logs_endpoint(
     """Search logs by query string"""
     
     try:
-        client = get_opensearch_client()
-        results = search_logs(
-            client,
-            start_time=request.start_time,
-            end_time=request.end_time,
-            query=request.query,
-            fields=request.fields,
-            page=request.page,
-            page_size=request.page_size
-        )
+        client = get_async_opensearch_client()
+        if request.cursor or request.use_cursor:
+            results = await search_logs(
+                client,
+                start_time=request.start_time,
+                end_time=request.end_time,
+                query=request.query,
+                fields=request.fields,
+                page=request.page,
+                page_size=request.page_size,
+                cursor=request.cursor,
+                use_cursor=request.use_cursor,
+                track_total_hits=request.track_total_hits
+            )
+        else:
+            results = await cached(
+                "search", request.start_time, request.end_time,
+                {
+                    "query": request.query, "fields": request.fields, "page": request.page,
+                    "page_size": request.page_size, "track": request.track_total_hits
+                },
+                lambda start, end: search_logs(
+                    client, start_time=start, end_time=end, query=request.query,
+                    fields=request.fields, page=request.page, page_size=request.page_size,
+                    track_total_hits=request.track_total_hits
+                )
+            )
         
-        return LogQueryResponse(**results)
+        return page_response(results, LogQueryResponse)
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error searching logs: {e}")
         raise HTTPException(
@@ -118,22 +188,119 @@ async def search_logs_endpoint(
         )
 
 
-@router.get("/api/logs/aggregations", response_model=AggregationResponse, tags=["Logs"])
-async def get_aggregations(
+@router.get("/api/logs/export", tags=["Logs"])
+async def export_logs_endpoint(
     start_time: datetime,
     end_time: datetime,
-    interval: str = "1h",
+    query: Optional[str] = None,
+    source_file: Optional[str] = None,
+    format: str = "ndjson",
+    compress: bool = False,
+    resume_after: Optional[str] = None,
     token: Optional[str] = Depends(jwt_bearer)
 ):
-    """Get aggregations (time series, top tokens, source distribution)"""
+    """Stream every matching event as NDJSON, CSV or raw lines
+
+    Events come oldest first. To resume an interrupted ndjson or csv
+    download, pass the last received line's ``<timestamp>,<event_id>`` as
+    ``resume_after``. Raw exports have only the log lines and can't be
+    resumed.
+    """
     
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
     try:
-        client = get_opensearch_client()
-        results = aggregate_logs(
+        # Fail before the response starts streaming
+        if resume_after:
+            parse_resume_after(resume_after)
+        compile_query(query)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    extension = {"ndjson": "ndjson", "csv": "csv", "raw": "log"}[format]
+    headers = {"Content-Disposition": f'attachment; filename="logs-export.{extension}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    client = get_async_opensearch_client()
+    return StreamingResponse(
+        export_logs(
             client,
             start_time=start_time,
             end_time=end_time,
-            interval=interval
+            query=query,
+            source_file=source_file,
+            fmt=format,
+            compress=compress,
+            resume_after=resume_after
+        ),
+        media_type=EXPORT_FORMATS[format],
+        headers=headers
+    )
+
+
+@router.get("/api/logs/tail", tags=["Logs"])
+async def tail_logs(
+    source_file: Optional[str] = None,
+    level: Optional[str] = None,
+    query: Optional[str] = None,
+    token: Optional[str] = Depends(jwt_bearer_or_query)
+):
+    """Stream newly indexed events as server-sent events
+
+    Events arrive as ``log`` events as soon as their batch is indexed,
+    filtered here by source file, level (comma-separated) and query. A
+    client that falls behind gets a ``lag`` event with the number of
+    events it missed.
+    """
+    
+    try:
+        matches_query = compile_matcher(query)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    levels = {lvl.strip().upper() for lvl in level.split(',') if lvl.strip()} if level else None
+    
+    def matcher(doc):
+        if source_file and doc.get('source_file') != source_file:
+            return False
+        if levels and str((doc.get('fields') or {}).get('level', '')).upper() not in levels:
+            return False
+        return matches_query(doc)
+    
+    hub = get_tail_hub()
+    
+    async def events():
+        subscription = hub.subscribe(matcher)
+        try:
+            async for chunk in tail_events(subscription):
+                yield chunk
+        finally:
+            hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/api/logs/aggregations", response_model=AggregationResponse, tags=["Logs"])
+async def get_aggregations(
+    start_time: datetime,
+    end_time: datetime,
+    interval: str = "1h",
+    token: Optional[str] = Depends(jwt_bearer)
+):
+    """Get aggregations (time series, top tokens, top templates, source distribution)"""
+    
+    try:
+        client = get_async_opensearch_client()
+        results = await cached(
+            "aggregations", start_time, end_time, {"interval": interval},
+            lambda start, end: dashboard_aggregations(client, start_time=start, end_time=end, interval=interval)
         )
         
         return AggregationResponse(**results)
@@ -146,26 +313,56 @@ async def get_aggregations(
         )
 
 
-@router.get("/api/stats", tags=["Stats"])
-async def get_stats(token: Optional[str] = Depends(jwt_bearer)):
-    """Get overall statistics"""
+@router.get("/api/dashboard", response_model=DashboardResponse, tags=["Logs"])
+async def get_dashboard(
+    start_time: datetime,
+    end_time: datetime,
+    query: Optional[str] = None,
+    source_file: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 50,
+    interval: str = "1h",
+    token: Optional[str] = Depends(jwt_bearer)
+):
+    """Log page, aggregations and stats in one round trip (one _msearch)"""
     
     try:
-        client = get_opensearch_client()
-        index_name = f"{settings.opensearch_index_prefix}-*"
-        
-        count = client.count(index=index_name)
-        indices = client.cat.indices(index=index_name, format="json")
+        client = get_async_opensearch_client()
+        results = await cached(
+            "dashboard", start_time, end_time,
+            {"query": query, "source_file": source_file, "page": page, "page_size": page_size, "interval": interval},
+            lambda start, end: dashboard_panels(
+                client, start_time=start, end_time=end, query=query, source_file=source_file,
+                page=page, page_size=page_size, interval=interval
+            )
+        )
         
-        return {
-            "total_events": count["count"],
-            "indices": len(indices),
-            "index_size": sum(int(idx.get("store.size", "0").replace("kb", "").replace("mb", "").replace("gb", "")) for idx in indices if "store.size" in idx)
-        }
+        return page_response(results, DashboardResponse)
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        logger.error(f"Error getting stats: {e}")
+        logger.error(f"Error loading dashboard: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+
+@router.get("/api/stats", tags=["Stats"])
+async def get_stats(token: Optional[str] = Depends(jwt_bearer)):
+    """Get overall statistics (refreshed every STATS_REFRESH_SECONDS)
+
+    ``index_size`` is in bytes; ``per_index`` has each index's doc count
+    and size, and ``ingest_rate_per_second`` the doc count growth since the
+    previous refresh.
+    """
+    
+    snapshot = await get_stats_collector().snapshot(get_async_opensearch_client())
+    if "total_events" not in snapshot:
+        logger.error(f"Error getting stats: {snapshot.get('error')}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=snapshot.get("error", "Stats unavailable")
+        )
+    return snapshot
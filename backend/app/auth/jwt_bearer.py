@@ -52,5 +52,25 @@ class JWTBearer(HTTPBearer):
             return False
 
 
+class JWTBearerOrQuery(JWTBearer):
+    """JWT from the Authorization header or an ``access_token`` query parameter
+
+    For streams opened by EventSource, which can't set headers.
+    """
+    
+    async def __call__(self, request: Request) -> Optional[str]:
+        token = request.query_params.get("access_token")
+        if not settings.require_auth or not token:
+            return await super().__call__(request)
+        
+        if not self.verify_jwt(token):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid or expired token"
+            )
+        return token
+
+
 # Global JWT bearer dependency
 jwt_bearer = JWTBearer()
+jwt_bearer_or_query = JWTBearerOrQuery()
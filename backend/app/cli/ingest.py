@@ -6,6 +6,7 @@ import logging
 from pathlib import Path
 
 from app.ingestion.worker import IngestionWorker
+from app.ingestion.profiler import StageProfiler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,12 +19,31 @@ async def main():
     parser.add_argument("--directory", "-d", help="Directory containing log files")
     parser.add_argument("--file", "-f", help="Single file to ingest")
     parser.add_argument("--batch-size", "-b", type=int, default=1000, help="Batch size")
+    parser.add_argument("--profile", action="store_true", help="Report time per pipeline stage at exit")
+    parser.add_argument("--profile-output", help="Also write <path>.prof (cProfile) and <path>.folded (flamegraph)")
     
     args = parser.parse_args()
     
     worker = IngestionWorker()
     worker.batch_size = args.batch_size
     
+    profiler = None
+    if args.profile or args.profile_output:
+        profiler = StageProfiler()
+        profiler.instrument(worker)
+        if args.profile_output:
+            profiler.start_cprofile()
+    
+    try:
+        await _ingest(worker, parser, args)
+    finally:
+        if profiler:
+            profiler.write(args.profile_output)
+
+
+async def _ingest(worker: IngestionWorker, parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """Ingest the file or directory given on the command line"""
+    
     if args.file:
         # Ingest single file
         await worker.ingest_file(args.file, incremental=False)
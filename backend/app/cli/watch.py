@@ -5,6 +5,9 @@ import argparse
 import logging
 
 from app.ingestion.watcher import FileWatcher
+from app.ingestion.profiler import StageProfiler
+from app.config import settings
+from app.metrics import start_http_server
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,11 +18,31 @@ async def main():
     
     parser = argparse.ArgumentParser(description="Watch directory for log files")
     parser.add_argument("--directory", "-d", help="Directory to watch")
+    parser.add_argument("--metrics-port", type=int, default=settings.metrics_port,
+                        help="Port for the Prometheus exporter (0 to disable)")
+    parser.add_argument("--profile", action="store_true", help="Report time per pipeline stage at exit")
+    parser.add_argument("--profile-output", help="Also write <path>.prof (cProfile) and <path>.folded (flamegraph)")
     
     args = parser.parse_args()
     
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+        logger.info(f"Metrics exporter listening on :{args.metrics_port}")
+    
     watcher = FileWatcher(directory=args.directory)
-    await watcher.start()
+    
+    profiler = None
+    if args.profile or args.profile_output:
+        profiler = StageProfiler()
+        profiler.instrument(watcher.worker)
+        if args.profile_output:
+            profiler.start_cprofile()
+    
+    try:
+        await watcher.start()
+    finally:
+        if profiler:
+            profiler.write(args.profile_output)
 
 
 if __name__ == "__main__":
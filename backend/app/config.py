@@ -15,10 +15,62 @@ class Settings(BaseSettings):
     opensearch_index_prefix: str = "logs"
     opensearch_scheme: str = "https"
     opensearch_verify_certs: bool = False
+    opensearch_pool_maxsize: int = 25  # connections per host for the API's async client
+    pit_keep_alive: str = "5m"  # how long a cursor stays valid between pages
+    export_batch_size: int = 5000  # events fetched per page by /api/logs/export
+    search_track_total_hits: str = "10000"  # exact | off | N: count hits up to N (reported as a lower bound)
+    index_pruning_enabled: bool = True  # search only the daily indices a time range touches
+    index_pruning_max_days: int = 90  # longer ranges search {prefix}-*
+    index_catalog_refresh_seconds: int = 30  # how often the list of existing indices is reloaded
+    stats_refresh_seconds: int = 15  # /api/stats and /health serve a snapshot this old at most
+    live_tail_socket: str = "/tmp/logwatch-tail.sock"  # watcher -> API feed ("" to disable)
+    live_tail_buffer: int = 1000  # events queued per live-tail client before dropping
+    live_tail_link_buffer_bytes: int = 4194304  # unsent bytes per API process before batches are skipped
+    live_tail_heartbeat_seconds: int = 15
+    index_profile: str = "standard"  # standard | lean (see search.mappings)
+    lean_index_tokens: bool = False
+    lean_promoted_fields: str = "level:keyword,service:keyword,host:keyword,method:keyword,status:short"
+
+    # Index lifecycle (ISM): rollover through a write alias, force-merge, retention
+    lifecycle_enabled: bool = False
+    lifecycle_rollover_size: str = "30gb"
+    lifecycle_rollover_docs: int = 100000000
+    lifecycle_rollover_age: str = "1d"
+    lifecycle_retention: str = "30d"
+    lifecycle_shard_target_size: str = "20gb"
+    lifecycle_max_shards: int = 8
+
+    # API result cache (windows ending within live_seconds of now are "live")
+    query_cache_enabled: bool = True
+    query_cache_max_entries: int = 1000
+    query_cache_policy: str = "lru"  # lru | lfu
+    query_cache_bucket_seconds: int = 10  # live window bounds are snapped to this
+    query_cache_live_seconds: int = 300
+    query_cache_live_ttl_seconds: float = 5.0
+    query_cache_recent_ttl_seconds: float = 60.0  # window ended within the last day
+    query_cache_ttl_seconds: float = 3600.0
+    search_coalescing_enabled: bool = True  # identical concurrent requests share one search
+
+    # Incremental aggregations: closed segments are cached, only the open tail is queried
+    agg_cache_enabled: bool = True
+    agg_cache_segment_seconds: int = 3600
+    agg_cache_settle_seconds: int = 300  # segments older than this are final
+    agg_cache_terms_size: int = 100  # terms kept per segment for merging top-N lists
+    agg_cache_max_segments: int = 20000
+
+    # Per-minute rollups written at ingest and read by long-range dashboards
+    rollup_enabled: bool = True
+    rollup_flush_seconds: float = 10.0
+    rollup_read_min_interval_seconds: int = 3600  # finer charts aggregate raw events
+    rollup_coverage_refresh_seconds: int = 60
     
     # Backend
     backend_host: str = "0.0.0.0"
     backend_port: int = 8000
+    response_compression_min_bytes: int = 1024
+    response_gzip_level: int = 6
+    response_brotli_quality: int = 4
+    response_validation: bool = False  # validate log pages against the response models (debugging; slower)
     jwt_secret: str = "change-this-in-production"
     jwt_algorithm: str = "HS256"
     jwt_expiration_minutes: int = 60
@@ -27,8 +79,35 @@ class Settings(BaseSettings):
     logs_directory: str = "/logs_in"
     checkpoint_db: str = "/data/checkpoints.db"
     batch_size: int = 1000
+    bulk_max_retries: int = 3
+    bulk_initial_backoff_seconds: float = 1.0
+    bulk_max_backoff_seconds: float = 30.0
     max_workers: int = 4
     poll_interval_seconds: int = 1
+
+    # Multiline assembly (stack traces etc.)
+    multiline_enabled: bool = True
+    multiline_pattern: str = r'^(\s+\S|Caused by:|Traceback \(most recent call last\):|\.\.\. \d+ more|[\w.$]+(Error|Exception)(: |$))'
+    multiline_max_lines: int = 500
+    multiline_max_bytes: int = 65536
+    multiline_flush_timeout_seconds: float = 5.0
+
+    # Parse-result cache for repeated lines
+    parse_cache_enabled: bool = True
+    parse_cache_max_entries: int = 10000
+
+    # Online template mining (Drain)
+    template_mining_enabled: bool = True
+    template_db: str = "/data/templates.db"
+    template_depth: int = 4
+    template_similarity: float = 0.4
+    template_max_children: int = 100
+
+    # Per-source rate limiting / sampling (rate is lines per second of log time)
+    sampling_enabled: bool = False
+    sampling_rate_per_source: float = 1000.0
+    sampling_burst: int = 5000
+    sampling_keep_levels: str = "ERROR,FATAL,CRITICAL"
     
     # Security
     require_auth: bool = False
@@ -38,6 +117,10 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
 
+    # Metrics
+    metrics_port: int = 9108  # standalone exporter for the watch CLI
+    metrics_parse_sample_every: int = 100
+
     # Add AI settings
     groq_api_key: Optional[str] = None
     ai_provider: str = "groq"
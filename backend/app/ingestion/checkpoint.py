@@ -7,6 +7,7 @@ from typing import Optional
 from pathlib import Path
 
 from app.config import settings
+from app.metrics import CHECKPOINT_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -66,16 +67,17 @@ class CheckpointManager:
     
     def set_checkpoint(self, file_path: str, offset: int, last_modified: float):
         """Save checkpoint for a file"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO checkpoints (file_path, offset, last_modified, updated_at)
-            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-        """, (file_path, offset, last_modified))
-        
-        conn.commit()
-        conn.close()
+        with CHECKPOINT_SECONDS.time():
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT OR REPLACE INTO checkpoints (file_path, offset, last_modified, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            """, (file_path, offset, last_modified))
+            
+            conn.commit()
+            conn.close()
         
         logger.debug(f"Checkpoint saved: {file_path} @ {offset}")
     
@@ -0,0 +1,65 @@
+"""Multiline event assembly"""
+
+import re
+import logging
+from typing import Dict, Any, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MultilineAggregator:
+    """Groups continuation lines (stack traces etc.) into a single event"""
+
+    def __init__(
+        self,
+        pattern: Optional[str] = None,
+        max_lines: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.enabled = settings.multiline_enabled if enabled is None else enabled
+        self.pattern = re.compile(pattern or settings.multiline_pattern)
+        self.max_lines = max_lines or settings.multiline_max_lines
+        self.max_bytes = max_bytes or settings.multiline_max_bytes
+        self._event: Optional[Dict[str, Any]] = None
+
+    @property
+    def pending_offset(self) -> Optional[int]:
+        """File offset where the pending (not yet emitted) event starts"""
+        return self._event['offset'] if self._event else None
+
+    def feed(self, line: str, line_number: int, offset: int) -> Optional[Dict[str, Any]]:
+        """Add a line; return the previous event if this line completes it"""
+
+        if self._event and self.enabled and self.pattern.match(line):
+            event = self._event
+            if len(event['lines']) < self.max_lines and event['size'] + len(line) <= self.max_bytes:
+                event['lines'].append(line)
+                event['size'] += len(line)
+                return None
+            logger.debug(f"Multiline event at line {event['line_number']} exceeded size limit, splitting")
+
+        completed = self._event
+        self._event = {
+            'lines': [line],
+            'line_number': line_number,
+            'offset': offset,
+            'size': len(line)
+        }
+        return completed
+
+    def flush(self) -> Optional[Dict[str, Any]]:
+        """Emit the pending event, if any"""
+        completed = self._event
+        self._event = None
+        return completed
+
+    @staticmethod
+    def join(event: Dict[str, Any]) -> str:
+        """Join event lines into a single raw_line"""
+        lines: List[str] = event['lines']
+        if len(lines) == 1:
+            return lines[0].strip()
+        return '\n'.join([lines[0].strip()] + [l.rstrip() for l in lines[1:]])
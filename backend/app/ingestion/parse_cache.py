@@ -0,0 +1,117 @@
+"""Parse-result cache for repetitive log lines"""
+
+import re
+import sys
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Timestamps are masked out of the cache key so heartbeat-style lines that
+# only differ in their timestamp share one entry
+TIMESTAMP_MASK = re.compile(
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'
+    r'|\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2}(?: [+-]\d{4})?'
+    r'|\b\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}'
+)
+DIGITS = re.compile(r'\d')
+
+
+class ParseCache:
+    """Bounded LRU of parse results keyed by the line with timestamps masked
+
+    A hit reuses the cached ``fields``; only the timestamp (and any field
+    that held it verbatim) is re-derived from the new line, and tokens are
+    taken from the new line exactly as a fresh parse would. Lines whose
+    fields embed part of a timestamp are never cached.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.parse_cache_max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.memory_bytes = 0
+
+    def probe(self, line: str) -> Tuple[str, List[str]]:
+        """Compute the cache key (the masked line) and the timestamp spans of a line"""
+        spans = TIMESTAMP_MASK.findall(line)
+        if not spans:
+            return line, spans
+        # Keep the shape of each timestamp (separators, precision) in the key
+        masked = TIMESTAMP_MASK.sub(lambda m: DIGITS.sub('0', m.group()), line)
+        return masked, spans
+
+    def get(self, line: str, probe: Tuple[str, List[str]]) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Return (parser, parse result) for line if an equivalent line was cached"""
+        key, spans = probe
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        parser, fields, ts_fields, _ = entry
+        fields = dict(fields)
+        for name, index in ts_fields.items():
+            fields[name] = spans[index]
+
+        return parser, {
+            'timestamp': parser.derive_timestamp(line, fields),
+            'fields': fields,
+            'tokens': parser.tokenize(line)
+        }
+
+    def put(self, line: str, probe: Tuple[str, List[str]], parser, result: Dict[str, Any]):
+        """Cache a fresh parse result"""
+        key, spans = probe
+        fields = result['fields']
+        if 'parse_error' in fields:
+            return
+
+        ts_fields = {}
+        if spans:
+            stripped = TIMESTAMP_MASK.sub(' ', line)
+            for name, value in fields.items():
+                values = value if isinstance(value, list) else [value]
+                for item in values:
+                    if not isinstance(item, str) or not item:
+                        continue
+                    if item in spans and not isinstance(value, list):
+                        ts_fields[name] = spans.index(item)
+                    elif any(span in item for span in spans) or (
+                        item not in stripped and any(item in span for span in spans)
+                    ):
+                        # Field holds (part of) a timestamp; can't be reused safely
+                        return
+
+        size = (
+            sys.getsizeof(key)
+            + sys.getsizeof(fields)
+            + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in fields.items())
+        )
+
+        if key in self._entries:
+            self.memory_bytes -= self._entries.pop(key)[3]
+        self._entries[key] = (parser, dict(fields), ts_fields, size)
+        self.memory_bytes += size
+
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.memory_bytes -= evicted[3]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and approximate memory use"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'memory_bytes': self.memory_bytes
+        }
@@ -28,12 +28,22 @@ class BaseParser(ABC):
         # Fallback to current time
         return datetime.utcnow()
     
+    def derive_timestamp(self, line: str, fields: Dict[str, Any]) -> datetime:
+        """Re-derive only the timestamp for a line whose fields are already known"""
+        return self.extract_timestamp(line, fields)
+    
     def _parse_datetime(self, value: Any) -> datetime:
         """Parse datetime from various formats"""
         if isinstance(value, datetime):
             return value
         
         if isinstance(value, str):
+            # Fast path for ISO 8601, which covers most structured logs
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+            
             from dateutil import parser as date_parser
             try:
                 return date_parser.parse(value)
@@ -47,4 +57,4 @@ class BaseParser(ABC):
         import re
         # Split on whitespace and punctuation
         tokens = re.findall(r'\w+', line.lower())
-        return list(set(tokens))  # Unique tokens
+        return list(dict.fromkeys(tokens))  # Unique tokens, in line order
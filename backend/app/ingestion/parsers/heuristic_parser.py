@@ -39,14 +39,7 @@ class HeuristicParser(BaseParser):
         fields = {}
         
         # Extract timestamp
-        timestamp_str = None
-        for pattern in self.TIMESTAMP_PATTERNS:
-            match = pattern.search(line)
-            if match:
-                timestamp_str = match.group()
-                break
-        
-        timestamp = self._parse_datetime(timestamp_str) if timestamp_str else datetime.utcnow()
+        timestamp = self.derive_timestamp(line, fields)
         
         # Extract common fields
         for field_name, pattern in self.FIELD_PATTERNS.items():
@@ -69,3 +62,11 @@ class HeuristicParser(BaseParser):
             'fields': fields,
             'tokens': self.tokenize(line)
         }
+    
+    def derive_timestamp(self, line: str, fields: Dict[str, Any]) -> datetime:
+        """Find the first timestamp-looking substring in the line"""
+        for pattern in self.TIMESTAMP_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                return self._parse_datetime(match.group())
+        return datetime.utcnow()
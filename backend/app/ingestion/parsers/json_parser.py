@@ -3,6 +3,7 @@
 import json
 import logging
 from typing import Dict, Any
+from datetime import datetime
 
 from app.ingestion.parsers.base import BaseParser
 
@@ -12,6 +13,8 @@ logger = logging.getLogger(__name__)
 class JSONParser(BaseParser):
     """Parser for JSON-formatted logs"""
     
+    TIMESTAMP_FIELDS = ['timestamp', 'time', '@timestamp', 'datetime', 'ts']
+    
     def can_parse(self, line: str) -> bool:
         """Check if line is valid JSON"""
         line = line.strip()
@@ -27,7 +30,7 @@ class JSONParser(BaseParser):
             timestamp = None
             
             # Try to find timestamp
-            for ts_field in ['timestamp', 'time', '@timestamp', 'datetime', 'ts']:
+            for ts_field in self.TIMESTAMP_FIELDS:
                 if ts_field in data:
                     timestamp = self._parse_datetime(data[ts_field])
                     fields['timestamp_field'] = ts_field
@@ -53,3 +56,10 @@ class JSONParser(BaseParser):
                 'fields': {'parse_error': str(e)},
                 'tokens': []
             }
+    
+    def derive_timestamp(self, line: str, fields: Dict[str, Any]) -> datetime:
+        """Re-derive the timestamp from already extracted fields"""
+        ts_field = fields.get('timestamp_field')
+        if ts_field in fields:
+            return self._parse_datetime(fields[ts_field])
+        return self.extract_timestamp(line, fields)
@@ -0,0 +1,149 @@
+"""Pipeline stage profiler for the ingest/watch CLIs"""
+
+import cProfile
+import functools
+import inspect
+import logging
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """Accumulated timings for one stage"""
+
+    __slots__ = ("calls", "wall", "cpu", "self_wall", "self_cpu")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.self_wall = 0.0
+        self.self_cpu = 0.0
+
+
+class StageProfiler:
+    """Records wall and CPU time per pipeline stage and per parser class
+
+    Stages are measured by wrapping the worker's own methods on the instance,
+    so nothing is patched (and nothing costs anything) unless profiling is on.
+    Nested stages are tracked on a stack so self time excludes children.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self.stacks: Dict[str, float] = {}  # folded stack -> self wall seconds
+        self._stack: List[list] = []
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._started = time.perf_counter()
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), time.thread_time(), 0.0, 0.0])
+
+    def _exit(self):
+        name, wall_start, cpu_start, child_wall, child_cpu = self._stack.pop()
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        stats.calls += 1
+        stats.wall += wall
+        stats.cpu += cpu
+        stats.self_wall += wall - child_wall
+        stats.self_cpu += cpu - child_cpu
+
+        path = ";".join([frame[0] for frame in self._stack] + [name])
+        self.stacks[path] = self.stacks.get(path, 0.0) + wall - child_wall
+
+        if self._stack:
+            self._stack[-1][3] += wall
+            self._stack[-1][4] += cpu
+
+    def wrap(self, name: str, func):
+        """Return func wrapped so each call is recorded under name"""
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                self._enter(name)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._exit()
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self._enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit()
+        return wrapper
+
+    def instrument(self, worker):
+        """Wrap the stages of an IngestionWorker (and its OpenSearch client)"""
+        from app.search.client import get_opensearch_client
+
+        # Self time of "ingest" is reading lines and multiline assembly
+        worker.ingest_file = self.wrap("ingest", worker.ingest_file)
+        worker._build_doc = self.wrap("build_doc", worker._build_doc)
+        worker._parse_line = self.wrap("parse", worker._parse_line)
+        worker._flush_batch = self.wrap("bulk", worker._flush_batch)
+        worker.checkpoint_manager.set_checkpoint = self.wrap("checkpoint", worker.checkpoint_manager.set_checkpoint)
+
+        for parser in worker.parsers:
+            name = parser.__class__.__name__
+            parser.parse = self.wrap(f"parser:{name}", parser.parse)
+            parser._parse_datetime = self.wrap("timestamp", parser._parse_datetime)
+
+        try:
+            serializer = get_opensearch_client().transport.serializer
+            serializer.dumps = self.wrap("serialize", serializer.dumps)
+        except Exception as e:
+            logger.warning(f"Could not instrument serializer: {e}")
+
+    def start_cprofile(self):
+        """Additionally collect a full cProfile trace"""
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def summary(self) -> str:
+        """Render the per-stage table"""
+        elapsed = time.perf_counter() - self._started
+        rows = sorted(self.stages.items(), key=lambda item: item[1].self_wall, reverse=True)
+
+        lines = [
+            f"{'stage':<28} {'calls':>10} {'wall s':>10} {'self s':>10} {'self cpu s':>11} {'self %':>7}",
+            "-" * 80,
+        ]
+        for name, stats in rows:
+            share = 100 * stats.self_wall / elapsed if elapsed else 0.0
+            lines.append(
+                f"{name:<28} {stats.calls:>10} {stats.wall:>10.3f} {stats.self_wall:>10.3f} "
+                f"{stats.self_cpu:>11.3f} {share:>6.1f}%"
+            )
+        lines.append("-" * 80)
+        lines.append(f"{'elapsed':<28} {'':>10} {elapsed:>10.3f}")
+        return "\n".join(lines)
+
+    def write(self, output: Optional[str] = None):
+        """Print the summary and optionally dump cProfile / folded stacks"""
+        print(self.summary())
+
+        if not output:
+            return
+
+        if self._cprofile:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(f"{output}.prof")
+            print(f"cProfile stats written to {output}.prof")
+
+        # Brendan Gregg's collapsed format: "a;b;c <microseconds>"
+        with open(f"{output}.folded", "w") as f:
+            for path, seconds in sorted(self.stacks.items()):
+                f.write(f"{path} {int(seconds * 1e6)}\n")
+        print(f"Folded stage stacks written to {output}.folded")
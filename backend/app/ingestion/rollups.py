@@ -0,0 +1,120 @@
+"""Per-minute rollups maintained at ingest time"""
+
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from opensearchpy import OpenSearch, helpers
+
+from app.config import settings
+from app.search.rollups import COVERAGE_DIMENSION, rollup_index
+
+logger = logging.getLogger(__name__)
+
+
+class RollupAccumulator:
+    """Counts indexed events per (minute, source, dimension, value) until flushed
+
+    Each flush appends one document per key with the counts since the
+    previous flush; readers sum them, so a minute that spans several flushes
+    is still counted once. ``estimated_count`` adds up sample weights.
+
+    Rejected documents keep their counts for the next flush. The first
+    flush also writes a ``coverage_start`` marker with ``started_at``, when
+    this accumulator began counting, which readers use to tell which ranges
+    are fully rolled up.
+    """
+
+    def __init__(self, flush_seconds: Optional[float] = None, started_at: Optional[datetime] = None):
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.rollup_flush_seconds
+        self.started_at = started_at or datetime.utcnow()
+        self._counts: Dict[Tuple[str, str, str, str], List[int]] = {}
+        self._last_flush = time.monotonic()
+        self._marked = False
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _bump(self, key: Tuple[str, str, str, str], weight: int):
+        totals = self._counts.get(key)
+        if totals is None:
+            self._counts[key] = [1, weight]
+        else:
+            totals[0] += 1
+            totals[1] += weight
+
+    def add(self, doc: Dict[str, Any]):
+        """Count one indexed document"""
+        ts = datetime.fromisoformat(doc['timestamp'])
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        minute = ts.strftime('%Y-%m-%dT%H:%M:00')
+        source = doc['source_file']
+        weight = doc.get('sample_weight', 1)
+        fields = doc.get('fields') or {}
+
+        self._bump((minute, source, 'all', ''), weight)
+        level = fields.get('level')
+        if isinstance(level, str):
+            self._bump((minute, source, 'level', level.upper()), weight)
+        status = fields.get('status', fields.get('status_code'))
+        if status is not None and not isinstance(status, (dict, list)):
+            self._bump((minute, source, 'status', str(status)), weight)
+        service = fields.get('service')
+        if isinstance(service, str):
+            self._bump((minute, source, 'service', service), weight)
+        if 'template_id' in doc:
+            self._bump((minute, source, 'template', doc['template_id']), weight)
+
+    def due(self) -> bool:
+        return bool(self._counts) and time.monotonic() - self._last_flush >= self.flush_seconds
+
+    def flush(self, client: OpenSearch) -> int:
+        """Write accumulated rollups; counts are kept for the next try if it fails"""
+        self._last_flush = time.monotonic()
+        if not self._counts:
+            return 0
+
+        index = rollup_index()
+        keys = list(self._counts)
+        actions = [
+            {
+                "_index": index,
+                "_source": {
+                    "timestamp": minute,
+                    "source_file": source,
+                    "dimension": dimension,
+                    "value": value,
+                    "count": count,
+                    "estimated_count": estimated
+                }
+            }
+            for (minute, source, dimension, value), (count, estimated) in self._counts.items()
+        ]
+        if not self._marked:
+            actions.append({
+                "_index": index,
+                "_source": {"timestamp": self.started_at.isoformat(), "dimension": COVERAGE_DIMENSION}
+            })
+
+        # Results come back in action order; only keys that were written are dropped
+        results = []
+        try:
+            for ok, _ in helpers.streaming_bulk(client, actions, chunk_size=settings.batch_size, raise_on_error=False):
+                results.append(ok)
+        except Exception as e:
+            logger.warning(f"Rollup flush failed, will retry: {e}")
+
+        success = 0
+        for key, ok in zip(keys, results):
+            if ok:
+                del self._counts[key]
+                success += 1
+        if len(results) > len(keys) and results[len(keys)]:
+            self._marked = True
+
+        rejected = len(results) - sum(results)
+        if rejected:
+            logger.warning(f"Rollup flush: {rejected} documents rejected, kept for the next flush")
+        return success
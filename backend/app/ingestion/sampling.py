@@ -0,0 +1,100 @@
+"""Per-source rate limiting and adaptive sampling"""
+
+import re
+import math
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SourceState:
+    """Token bucket and sampling state for one source"""
+
+    __slots__ = ('tokens', 'clock', 'window_start', 'window_count', 'sample_every', 'seen', 'dropped')
+
+    def __init__(self, burst: float, clock: float):
+        self.tokens = burst
+        self.clock = clock
+        self.window_start = clock
+        self.window_count = 0
+        self.sample_every = 1
+        self.seen = 0
+        self.dropped = 0
+
+
+class SourceSampler:
+    """Keeps each source within a line rate; excess lines are sampled 1-in-N
+
+    Time is taken from the events' own timestamps, so a backfill of a flood is
+    thinned the same way as a live tail, while replaying normal traffic at
+    disk speed is not. Under the limit a token bucket absorbs bursts; once a
+    one-second window shows the source above its rate, every Nth line is kept
+    with N = offered rate / allowed rate, recomputed each window. Lines at an
+    always-keep level are never dropped. Each kept line reports the number of
+    lines it stands for so counts can be extrapolated.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        keep_levels: Optional[str] = None
+    ):
+        self.rate = rate or settings.sampling_rate_per_source
+        self.burst = float(burst or settings.sampling_burst)
+        levels = keep_levels if keep_levels is not None else settings.sampling_keep_levels
+        self.keep_levels = {level.strip().upper() for level in levels.split(',') if level.strip()}
+        # Fallback for lines whose parser found no level field
+        self._keep_pattern = re.compile(
+            r'\b(' + '|'.join(re.escape(level) for level in sorted(self.keep_levels)) + r')\b', re.I
+        ) if self.keep_levels else None
+        self.sources: Dict[str, SourceState] = {}
+
+    def always_keep(self, level, line: str = '') -> bool:
+        if isinstance(level, str):
+            return level.upper() in self.keep_levels
+        return bool(self._keep_pattern and self._keep_pattern.search(line))
+
+    def admit(self, source: str, timestamp: Optional[datetime], level=None, line: str = '') -> Optional[int]:
+        """Return the sample weight to record for a kept line, or None to drop it"""
+        state = self.sources.get(source)
+        now = timestamp.timestamp() if timestamp else None
+        if state is None:
+            state = self.sources[source] = SourceState(self.burst, now or 0.0)
+
+        # Out-of-order and timestamp-less lines don't move the source clock back
+        if now is not None and now > state.clock:
+            state.tokens = min(self.burst, state.tokens + (now - state.clock) * self.rate)
+            state.clock = now
+
+        state.window_count += 1
+        elapsed = state.clock - state.window_start
+        if elapsed >= 1.0:
+            offered = state.window_count / elapsed
+            state.sample_every = max(1, math.ceil(offered / self.rate))
+            state.window_start = state.clock
+            state.window_count = 0
+
+        if self.always_keep(level, line):
+            # Kept unconditionally; the dropped backlog is carried by the next sampled line
+            return 1
+
+        if state.sample_every == 1:
+            keep = state.tokens >= 1
+            if keep:
+                state.tokens -= 1
+        else:
+            state.seen += 1
+            keep = state.seen % state.sample_every == 0
+
+        if not keep:
+            state.dropped += 1
+            return None
+
+        weight = state.dropped + 1
+        state.dropped = 0
+        return weight
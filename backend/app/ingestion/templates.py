@@ -0,0 +1,256 @@
+"""Online log template mining (Drain)"""
+
+import re
+import sqlite3
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import settings
+from app.ingestion.parse_cache import TIMESTAMP_MASK
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = '<*>'
+
+# Variables masked before clustering; at any position the first alternative wins
+VARIABLES = re.compile('|'.join([
+    f'(?:{TIMESTAMP_MASK.pattern})',
+    r'(?i:\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b)',
+    r'\b(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?\b',
+    r'(?i:\b0x[0-9a-f]+\b)',
+    r'(?<![A-Za-z])[-+]?\d+(?:\.\d+)?(?:ms|s|%)?(?![A-Za-z])',
+]))
+
+
+def _resolve_db_path(db_path: Optional[str]) -> Path:
+    """Same fallback as the checkpoint DB: use temp dir if /data is not writable"""
+    path = Path(db_path or settings.template_db)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        path = Path(tempfile.gettempdir()) / path.name
+    return path
+
+
+class LogCluster:
+    """A template and the number of lines it has absorbed"""
+
+    __slots__ = ('template_id', 'tokens', 'size', 'unsaved', 'dirty')
+
+    def __init__(self, template_id: int, tokens: List[str], size: int = 1):
+        self.template_id = template_id
+        self.tokens = tokens
+        self.size = size
+        # Lines absorbed since the last save, added to the stored size
+        self.unsaved = 0
+        self.dirty = False
+
+    @property
+    def template(self) -> str:
+        return ' '.join(self.tokens)
+
+
+class TemplateMiner:
+    """Streaming template miner using Drain's fixed-depth prefix tree
+
+    Lines are routed by token count and their first ``depth - 2`` tokens to a
+    leaf holding candidate clusters; the most similar cluster above the
+    threshold absorbs the line (differing positions become ``<*>``),
+    otherwise a new cluster is created. Clusters are persisted to SQLite so
+    template ids stay stable across restarts. Ids are allocated by SQLite
+    when a cluster is created, so miners sharing the database (watcher and
+    CLI) never hand out the same id.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        depth: Optional[int] = None,
+        similarity: Optional[float] = None,
+        max_children: Optional[int] = None
+    ):
+        self.db_path = _resolve_db_path(db_path)
+        self.depth = max(3, depth or settings.template_depth)
+        self.similarity = similarity if similarity is not None else settings.template_similarity
+        self.max_children = max_children or settings.template_max_children
+        self.clusters: Dict[int, LogCluster] = {}
+        self._root: Dict[Any, Any] = {}
+        self._ensure_db()
+        self._load()
+
+    def _ensure_db(self):
+        """Create template table if it doesn't exist"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS templates (
+                template_id INTEGER PRIMARY KEY,
+                template TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _load(self):
+        """Rebuild the prefix tree from persisted templates"""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT template_id, template, size FROM templates").fetchall()
+        conn.close()
+
+        for template_id, template, size in rows:
+            cluster = LogCluster(template_id, template.split(' '), size)
+            self.clusters[template_id] = cluster
+            self._leaf(cluster.tokens, create=True).append(cluster)
+
+        if rows:
+            logger.info(f"Loaded {len(rows)} log templates")
+
+    @staticmethod
+    def preprocess(content: str) -> Tuple[List[str], List[List[str]]]:
+        """Mask obvious variables and split into tokens
+
+        Returns the masked tokens and, per token, the values masked in it.
+        """
+        values: List[str] = []
+        masked = VARIABLES.sub(lambda m: values.append(m.group()) or WILDCARD, content)
+        
+        tokens = masked.split()
+        captured = []
+        remaining = iter(values)
+        for token in tokens:
+            captured.append([next(remaining) for _ in range(token.count(WILDCARD))])
+        return tokens, captured
+
+    def _leaf(self, tokens: List[str], create: bool) -> Optional[List[LogCluster]]:
+        """Walk (or build) the path length -> first tokens -> cluster list"""
+        node = self._root.get(len(tokens))
+        if node is None:
+            if not create:
+                return None
+            node = self._root[len(tokens)] = {}
+
+        prefix = tokens[:self.depth - 2]
+        for i, token in enumerate(prefix):
+            is_last = i == len(prefix) - 1
+            key = WILDCARD if any(c.isdigit() for c in token) else token
+            child = node.get(key)
+            if child is None:
+                # Fan-out is capped; overflow shares the wildcard branch
+                if key != WILDCARD and len(node) >= self.max_children:
+                    key = WILDCARD
+                    child = node.get(key)
+                if child is None:
+                    if not create:
+                        return None
+                    child = node[key] = [] if is_last else {}
+            node = child
+
+        if isinstance(node, dict):
+            # Zero-length prefix (empty line) or depth larger than token count
+            node = node.setdefault(None, [])
+        return node
+
+    def _similarity(self, template: List[str], tokens: List[str]) -> Tuple[float, int]:
+        same = wildcards = 0
+        for t, token in zip(template, tokens):
+            if t == WILDCARD:
+                wildcards += 1
+            elif t == token:
+                same += 1
+        return same / len(tokens) if tokens else 1.0, wildcards
+
+    def match(self, content: str) -> Tuple[int, List[str]]:
+        """Assign a line to a template; return (template_id, parameters)"""
+        tokens, captured = self.preprocess(content)
+        leaf = self._leaf(tokens, create=True)
+
+        best, best_sim, best_wildcards = None, -1.0, -1
+        for cluster in leaf:
+            sim, wildcards = self._similarity(cluster.tokens, tokens)
+            if sim > best_sim or (sim == best_sim and wildcards > best_wildcards):
+                best, best_sim, best_wildcards = cluster, sim, wildcards
+
+        if best is None or best_sim < self.similarity:
+            best = self._create(tokens)
+            leaf.append(best)
+            self.clusters[best.template_id] = best
+        else:
+            merged = [t if t == token else WILDCARD for t, token in zip(best.tokens, tokens)]
+            if merged != best.tokens:
+                best.tokens = merged
+            best.size += 1
+            best.unsaved += 1
+            best.dirty = True
+
+        return best.template_id, self._params(best.tokens, tokens, captured)
+
+    def _create(self, tokens: List[str]) -> LogCluster:
+        """Insert a new template row and let SQLite pick its id"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO templates (template, size) VALUES (?, 1)",
+                    (' '.join(tokens),)
+                )
+        finally:
+            conn.close()
+        return LogCluster(cursor.lastrowid, tokens)
+
+    @staticmethod
+    def _params(template: List[str], tokens: List[str], captured: List[List[str]]) -> List[str]:
+        """Original values for the template's variable parts, in order"""
+        params = []
+        for t, token, values in zip(template, tokens, captured):
+            if t == WILDCARD and token != WILDCARD:
+                # Position generalized by clustering: the whole token varies
+                for value in values:
+                    token = token.replace(WILDCARD, value, 1)
+                params.append(token)
+            else:
+                params.extend(values)
+        return params
+
+    def save(self):
+        """Persist clusters changed since the last save"""
+        dirty = [c for c in self.clusters.values() if c.dirty]
+        if not dirty:
+            return
+
+        # Sizes are added as deltas: another miner may be counting into the same row
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany("""
+            UPDATE templates SET template = ?, size = size + ?, updated_at = CURRENT_TIMESTAMP
+            WHERE template_id = ?
+        """, [(c.template, c.unsaved, c.template_id) for c in dirty])
+        conn.commit()
+        conn.close()
+
+        for cluster in dirty:
+            cluster.unsaved = 0
+            cluster.dirty = False
+        logger.debug(f"Saved {len(dirty)} templates")
+
+
+def lookup_templates(template_ids: List[str], db_path: Optional[str] = None) -> Dict[str, str]:
+    """Template text for the given ids (used by the API to label aggregations)"""
+    path = _resolve_db_path(db_path)
+    ids = [int(i) for i in template_ids if str(i).isdigit()]
+    if not ids or not path.exists():
+        return {}
+
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            f"SELECT template_id, template FROM templates WHERE template_id IN ({','.join('?' * len(ids))})",
+            ids
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+
+    return {str(template_id): template for template_id, template in rows}
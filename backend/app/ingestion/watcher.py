@@ -7,7 +7,9 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileModifiedEvent, FileCreatedEvent
 
 from app.ingestion.worker import IngestionWorker
+from app.live_tail import TailPublisher
 from app.config import settings
+from app.metrics import WATCHER_EVENTS
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +26,10 @@ class LogFileHandler(FileSystemEventHandler):
         if event.is_directory:
             return
         
+        WATCHER_EVENTS.labels("created").inc()
         logger.info(f"New file detected: {event.src_path}")
         asyncio.run_coroutine_threadsafe(
-            self.worker.ingest_file(event.src_path, incremental=False),
+            self.worker.ingest_file(event.src_path, incremental=False, live=True),
             self.loop
         )
     
@@ -35,9 +38,10 @@ class LogFileHandler(FileSystemEventHandler):
         if event.is_directory:
             return
         
+        WATCHER_EVENTS.labels("modified").inc()
         logger.info(f"File modified: {event.src_path}")
         asyncio.run_coroutine_threadsafe(
-            self.worker.ingest_file(event.src_path, incremental=True),
+            self.worker.ingest_file(event.src_path, incremental=True, live=True),
             self.loop
         )
 
@@ -62,6 +66,12 @@ class FileWatcher:
         event_handler = LogFileHandler(self.worker)
         self.observer.schedule(event_handler, self.directory, recursive=True)
         
+        # Feed newly indexed events to API processes for live tail
+        if settings.live_tail_socket:
+            Path(settings.live_tail_socket).unlink(missing_ok=True)
+            self.worker.tail_publisher = TailPublisher(settings.live_tail_socket)
+            await self.worker.tail_publisher.start()
+        
         # Start observer
         self.observer.start()
         logger.info("File watcher started")
@@ -69,6 +79,17 @@ class FileWatcher:
         try:
             while True:
                 await asyncio.sleep(1)
+                
+                # Flush multiline tails of files that have gone quiet
+                for file_path in self.worker.due_tails():
+                    try:
+                        await self.worker.ingest_file(file_path, incremental=True, live=True)
+                    except Exception as e:
+                        # Still pending, so it is retried on the next tick
+                        logger.error(f"Failed to flush multiline tail of {file_path}: {e}")
+                
+                # Rollups of quiet files would otherwise wait for the next batch
+                self.worker.flush_rollups()
         except KeyboardInterrupt:
             self.observer.stop()
             logger.info("File watcher stopped")
@@ -2,17 +2,27 @@
 
 import asyncio
 import logging
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 from datetime import datetime
 import uuid
+import hashlib
 
 from app.ingestion.parsers import (
     JSONParser, CSVParser, RegexParser, HeuristicParser
 )
 from app.ingestion.checkpoint import CheckpointManager
+from app.ingestion.multiline import MultilineAggregator
+from app.ingestion.parse_cache import ParseCache
+from app.ingestion.templates import TemplateMiner
+from app.ingestion.sampling import SourceSampler
+from app.ingestion.rollups import RollupAccumulator
 from app.search.client import get_opensearch_client, bulk_index_logs
+from app.search.mappings import promoted_fields
 from app.config import settings
+from app.live_tail import TailPublisher, get_tail_hub
+from app import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +40,39 @@ class IngestionWorker:
         ]
         self.batch_size = settings.batch_size
         self.ingest_id = str(uuid.uuid4())
+        self.pending_tails: Dict[str, float] = {}
+        self.parse_cache = ParseCache() if settings.parse_cache_enabled else None
+        self.template_miner = TemplateMiner() if settings.template_mining_enabled else None
+        self.sampler = SourceSampler() if settings.sampling_enabled else None
+        self.rollups = RollupAccumulator() if settings.rollup_enabled else None
+        self.tail_publisher: Optional[TailPublisher] = None  # set by the file watcher
+        
+        # Lean index profile: typed copies of whitelisted fields, optional tokens
+        lean = settings.index_profile == "lean"
+        self.promoted = promoted_fields() if lean else {}
+        self.emit_tokens = not lean or settings.lean_index_tokens
+        
+        # Metric counters are batched here and published once per flush
+        self._parser_hits: Dict[str, int] = {}
+        self._parse_count = 0
+        self._parse_sample_every = max(1, settings.metrics_parse_sample_every)
+        self._cache_reported = (0, 0)
+        self._sampled_out = 0
     
-    async def ingest_file(self, file_path: str, incremental: bool = True):
-        """Ingest a single log file"""
+    async def ingest_file(self, file_path: str, incremental: bool = True, live: bool = False):
+        """Ingest a single log file
+
+        When ``live`` is set the file is assumed to still be written to, so a
+        trailing multiline event is held back until the flush timeout expires.
+        """
         
         logger.info(f"Ingesting file: {file_path}")
         
         path = Path(file_path)
         if not path.exists():
             logger.error(f"File not found: {file_path}")
+            # Rotated or deleted with a tail held back: nothing left to flush
+            self.pending_tails.pop(file_path, None)
             return
         
         # Get checkpoint
@@ -52,6 +86,8 @@ class IngestionWorker:
         # Read file
         batch = []
         line_number = 0
+        reported_lines = 0
+        reported_offset = offset
         
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             # Seek to offset
@@ -92,6 +128,8 @@ class IngestionWorker:
             #         self.checkpoint_manager.set_checkpoint(file_path, current_offset, last_modified)
             
 
+            aggregator = MultilineAggregator()
+
             while True:
                 current_position = f.tell()  # Get position BEFORE reading
                 line = f.readline()
@@ -100,56 +138,149 @@ class IngestionWorker:
                     break
                 
                 line_number += 1
-                line = line.strip()
+                line = line.rstrip('\r\n')
                 
-                if not line:
+                if not line.strip():
                     continue
                 
-                # Parse line
-                parsed = self._parse_line(line)
-                
-                # Create document
-                doc = {
-                    'timestamp': parsed['timestamp'].isoformat() if parsed['timestamp'] else datetime.utcnow().isoformat(),
-                    'source_file': file_path,
-                    'line_number': line_number,
-                    'raw_line': line,
-                    'tokens': parsed['tokens'],
-                    'fields': parsed['fields'],
-                    'ingest_id': self.ingest_id
-                }
+                # Continuation lines are absorbed into the pending event
+                event = aggregator.feed(line, line_number, current_position)
+                if event is None:
+                    continue
                 
-                batch.append(doc)
+                doc = self._build_doc(event, file_path)
+                if doc is not None:
+                    batch.append(doc)
                 
                 # Bulk index when batch is full
                 if len(batch) >= self.batch_size:
                     self._flush_batch(batch)
                     batch = []
                     
-                    # Update checkpoint with current position
+                    self._publish_read_metrics(file_path, line_number - reported_lines, current_position - reported_offset)
+                    reported_lines, reported_offset = line_number, current_position
+                    
+                    # Update checkpoint to the start of the still-pending event
                     last_modified = path.stat().st_mtime
-                    self.checkpoint_manager.set_checkpoint(file_path, current_position, last_modified)
-
+                    self.checkpoint_manager.set_checkpoint(file_path, aggregator.pending_offset, last_modified)
 
+            # The last event of a live file may still be growing; hold it back
+            # until the file has been quiet for the flush timeout
+            final_offset = f.tell()
+            last_modified = path.stat().st_mtime
+            quiet_for = time.time() - last_modified
+            timeout = settings.multiline_flush_timeout_seconds
+            
+            if live and aggregator.pending_offset is not None and quiet_for < timeout:
+                final_offset = aggregator.pending_offset
+                self.pending_tails[file_path] = time.monotonic() + (timeout - quiet_for)
+            else:
+                event = aggregator.flush()
+                doc = self._build_doc(event, file_path) if event else None
+                if doc is not None:
+                    batch.append(doc)
+                self.pending_tails.pop(file_path, None)
 
             # Flush remaining
             if batch:
                 self._flush_batch(batch)
             
+            # One-off ingestion writes its rollups per file; live ones on the flush interval
+            self.flush_rollups(force=not live)
+            
             # Final checkpoint
-            final_offset = f.tell()
-            last_modified = path.stat().st_mtime
             self.checkpoint_manager.set_checkpoint(file_path, final_offset, last_modified)
+            self._publish_read_metrics(file_path, line_number - reported_lines, f.tell() - reported_offset)
         
         logger.info(f"Completed ingestion: {file_path} ({line_number} lines)")
     
+    def due_tails(self) -> List[str]:
+        """Files whose held-back multiline tail has passed its flush timeout"""
+        now = time.monotonic()
+        return [path for path, deadline in self.pending_tails.items() if deadline <= now]
+    
+    def _build_doc(self, event: Dict[str, Any], file_path: str) -> Optional[Dict[str, Any]]:
+        """Build an index document from an assembled event (header line is parsed)
+
+        Returns None when the event is dropped by per-source rate limiting.
+        """
+        
+        lines = event['lines']
+        parsed = self._parse_line(lines[0].strip())
+        fields = parsed['fields']
+        
+        weight = 1
+        if self.sampler is not None:
+            weight = self.sampler.admit(file_path, parsed['timestamp'], fields.get('level'), lines[0])
+            if weight is None:
+                self._sampled_out += 1
+                return None
+        
+        if len(lines) > 1:
+            fields['multiline_lines'] = len(lines)
+        
+        doc = {
+            'timestamp': parsed['timestamp'].isoformat() if parsed['timestamp'] else datetime.utcnow().isoformat(),
+            'source_file': file_path,
+            'line_number': event['line_number'],
+            'raw_line': MultilineAggregator.join(event),
+            'tokens': parsed['tokens'],
+            'fields': fields,
+            'ingest_id': self.ingest_id,
+            # Stable per (file, offset): the tiebreaker for cursor pagination
+            'event_id': hashlib.blake2b(f"{file_path}:{event['offset']}".encode(), digest_size=8).hexdigest()
+        }
+        
+        if not self.emit_tokens:
+            del doc['tokens']
+        for name in self.promoted:
+            value = fields.get(name)
+            if value is not None and not isinstance(value, (dict, list)):
+                doc[name] = value
+        
+        if self.template_miner is not None:
+            # Mine the message when the parser found one, else the header line
+            message = fields.get('message')
+            template_id, params = self.template_miner.match(message if isinstance(message, str) else lines[0].strip())
+            doc['template_id'] = str(template_id)
+            doc['template_params'] = params
+        
+        # Only written when lines were dropped; aggregations treat missing as 1
+        if weight > 1:
+            doc['sample_weight'] = weight
+        
+        return doc
+    
     def _parse_line(self, line: str) -> Dict[str, Any]:
         """Parse a log line using available parsers"""
         
+        self._parse_count += 1
+        sampled = self._parse_count % self._parse_sample_every == 0
+        if sampled:
+            start = time.perf_counter()
+        
+        if self.parse_cache is not None:
+            probe = self.parse_cache.probe(line)
+            cached = self.parse_cache.get(line, probe)
+            if cached is not None:
+                parser, result = cached
+                name = parser.__class__.__name__
+                self._parser_hits[name] = self._parser_hits.get(name, 0) + 1
+                if sampled:
+                    metrics.PARSE_SECONDS.labels("cache").observe(time.perf_counter() - start)
+                return result
+        
         for parser in self.parsers:
             if parser.can_parse(line):
                 try:
-                    return parser.parse(line)
+                    result = parser.parse(line)
+                    name = parser.__class__.__name__
+                    self._parser_hits[name] = self._parser_hits.get(name, 0) + 1
+                    if self.parse_cache is not None:
+                        self.parse_cache.put(line, probe, parser, result)
+                    if sampled:
+                        metrics.PARSE_SECONDS.labels(name).observe(time.perf_counter() - start)
+                    return result
                 except Exception as e:
                     logger.warning(f"Parser {parser.__class__.__name__} failed: {e}")
                     continue
@@ -169,8 +300,63 @@ class IngestionWorker:
         
         try:
             client = get_opensearch_client()
+            start = time.perf_counter()
             result = bulk_index_logs(client, batch)
+            metrics.BULK_SECONDS.observe(time.perf_counter() - start)
+            metrics.BULK_DOCS.observe(len(batch))
+            metrics.BULK_ERRORS.observe(result['errors'])
             logger.info(f"Flushed batch: {result['success']} successful, {result['errors']} errors")
+            
+            # Persist new/changed templates alongside the data that uses them
+            if self.template_miner is not None:
+                self.template_miner.save()
+            
+            # Rollups and live tail only see what actually got indexed
+            if result['failed']:
+                failed = {id(doc) for doc in result['failed']}
+                batch = [doc for doc in batch if id(doc) not in failed]
+            
+            if self.rollups is not None:
+                for doc in batch:
+                    self.rollups.add(doc)
+                self.flush_rollups()
+            
+            # Live tail subscribers get the batch as soon as it's indexed
+            get_tail_hub().publish(batch)
+            if self.tail_publisher is not None:
+                self.tail_publisher.publish(batch)
         except Exception as e:
             logger.error(f"Failed to flush batch: {e}")
             raise
+    
+    def flush_rollups(self, force: bool = False):
+        """Write per-minute rollups if the flush interval has passed (or force)"""
+        
+        if self.rollups is None or not len(self.rollups):
+            return
+        if force or self.rollups.due():
+            written = self.rollups.flush(get_opensearch_client())
+            logger.debug(f"Flushed {written} rollup documents")
+    
+    def _publish_read_metrics(self, file_path: str, lines: int, num_bytes: int):
+        """Publish locally accumulated counters to Prometheus"""
+        
+        metrics.LINES_READ.labels(file_path).inc(lines)
+        metrics.BYTES_READ.labels(file_path).inc(max(0, num_bytes))
+        
+        if self._sampled_out:
+            metrics.LINES_SAMPLED_OUT.labels(file_path).inc(self._sampled_out)
+            self._sampled_out = 0
+        
+        for name, hits in self._parser_hits.items():
+            metrics.PARSER_HITS.labels(name).inc(hits)
+        self._parser_hits.clear()
+        
+        if self.parse_cache is not None:
+            stats = self.parse_cache.stats()
+            reported_hits, reported_misses = self._cache_reported
+            metrics.PARSE_CACHE_LOOKUPS.labels("hit").inc(stats['hits'] - reported_hits)
+            metrics.PARSE_CACHE_LOOKUPS.labels("miss").inc(stats['misses'] - reported_misses)
+            metrics.PARSE_CACHE_BYTES.set(stats['memory_bytes'])
+            metrics.PARSE_CACHE_ENTRIES.set(stats['entries'])
+            self._cache_reported = (stats['hits'], stats['misses'])
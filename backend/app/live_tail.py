@@ -0,0 +1,195 @@
+"""Live tail: newly indexed events pushed to subscribers without searching
+
+The ingestion worker hands every flushed batch to the in-process
+``TailHub`` and, when it runs as the file watcher, to a ``TailPublisher``
+serving a local Unix socket. Each API process follows that socket and fans
+batches out to its own subscribers. Every subscriber has a bounded queue:
+when a client can't keep up, events are dropped for it alone and it is told
+how many it missed.
+"""
+
+import json
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.config import settings
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+# Left out of live events, like the default search projection
+TAIL_EXCLUDES = ("tokens",)
+
+
+def _slim(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in doc.items() if k not in TAIL_EXCLUDES}
+
+
+class Subscription:
+    """One live-tail client: a filter and a bounded queue of matching events"""
+
+    def __init__(self, matcher: Callable[[Dict[str, Any]], bool], maxsize: Optional[int] = None):
+        self.matcher = matcher
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize or settings.live_tail_buffer)
+        self.dropped = 0
+        self.loop = asyncio.get_running_loop()
+
+    def offer(self, docs: List[Dict[str, Any]]):
+        """Queue matching events; must run on the subscriber's loop"""
+        for doc in docs:
+            if not self.matcher(doc):
+                continue
+            try:
+                self.queue.put_nowait(doc)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                metrics.LIVE_TAIL_DROPPED.inc()
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class TailHub:
+    """In-process fan-out of indexed batches to live-tail subscriptions"""
+
+    def __init__(self):
+        self.subscriptions: Set[Subscription] = set()
+
+    def subscribe(self, matcher: Callable[[Dict[str, Any]], bool]) -> Subscription:
+        subscription = Subscription(matcher)
+        self.subscriptions.add(subscription)
+        metrics.LIVE_TAIL_SUBSCRIBERS.set(len(self.subscriptions))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+        metrics.LIVE_TAIL_SUBSCRIBERS.set(len(self.subscriptions))
+
+    def publish(self, docs: List[Dict[str, Any]]):
+        """Offer a batch to every subscription (callable from any thread)"""
+        if not self.subscriptions or not docs:
+            return
+        docs = [_slim(doc) for doc in docs]
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for subscription in list(self.subscriptions):
+            if subscription.loop is current:
+                subscription.offer(docs)
+            else:
+                subscription.loop.call_soon_threadsafe(subscription.offer, docs)
+
+    async def follow(self, path: Optional[str] = None):
+        """Publish batches read from the ingestion worker's socket, reconnecting as needed"""
+        path = path or settings.live_tail_socket
+        connected = False
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(path, limit=settings.live_tail_link_buffer_bytes)
+            except OSError:
+                if connected:
+                    logger.info("Live tail feed disconnected, retrying")
+                    connected = False
+                await asyncio.sleep(1)
+                continue
+            connected = True
+            logger.info(f"Following live tail feed at {path}")
+            try:
+                while line := await reader.readline():
+                    self.publish(json.loads(line))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Live tail feed error: {e}")
+            finally:
+                writer.close()
+
+
+class TailPublisher:
+    """Serves indexed batches to API processes over a local Unix socket
+
+    A follower whose socket buffer is over ``live_tail_link_buffer_bytes``
+    skips batches until it catches up, so a stalled API process never
+    holds back ingestion.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.live_tail_socket
+        self.followers: Set[asyncio.StreamWriter] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_unix_server(self._accept, path=self.path)
+        logger.info(f"Live tail feed listening on {self.path}")
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.followers.add(writer)
+        try:
+            # Followers never send anything; this returns when they go away
+            await reader.read()
+        finally:
+            self.followers.discard(writer)
+            writer.close()
+
+    def _send(self, data: bytes):
+        for writer in list(self.followers):
+            if writer.is_closing():
+                self.followers.discard(writer)
+            elif writer.transport.get_write_buffer_size() > settings.live_tail_link_buffer_bytes:
+                metrics.LIVE_TAIL_DROPPED.inc()
+            else:
+                writer.write(data)
+
+    def publish(self, docs: List[Dict[str, Any]]):
+        if not self.followers or not docs:
+            return
+        data = json.dumps([_slim(doc) for doc in docs], default=str).encode() + b"\n"
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._send(data)
+        else:
+            self.loop.call_soon_threadsafe(self._send, data)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self.followers):
+            writer.close()
+
+
+_hub: Optional[TailHub] = None
+
+
+def get_tail_hub() -> TailHub:
+    """Live-tail fan-out for this process"""
+    global _hub
+    if _hub is None:
+        _hub = TailHub()
+    return _hub
+
+
+async def tail_events(subscription: Subscription):
+    """Server-sent events for a subscription: ``log`` per event, ``lag`` after drops"""
+    yield ": connected\n\n"
+    while True:
+        try:
+            doc = await asyncio.wait_for(subscription.queue.get(), timeout=settings.live_tail_heartbeat_seconds)
+        except asyncio.TimeoutError:
+            yield ": keepalive\n\n"
+            continue
+        # Send whatever else is already queued in the same chunk
+        docs = [doc]
+        while not subscription.queue.empty():
+            docs.append(subscription.queue.get_nowait())
+        chunk = "".join(f"event: log\ndata: {json.dumps(d, default=str)}\n\n" for d in docs)
+        dropped = subscription.take_dropped()
+        if dropped:
+            chunk += f"event: lag\ndata: {json.dumps({'dropped': dropped})}\n\n"
+        yield chunk
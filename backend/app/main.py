@@ -1,14 +1,23 @@
 """FastAPI main application"""
 
-from fastapi import FastAPI, Depends
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import logging
+import time
 
 from app.config import settings
 from app.api.routes import router as api_router
 from app.auth.jwt_handler import create_access_token
 from app.api.chat_routes import router as chat_router
+from app.api.compression import CompressionMiddleware
+from app.search.client import get_async_opensearch_client, close_async_opensearch_client
+from app.search.indices import get_index_catalog
+from app.search.stats import get_stats_collector
+from app.live_tail import get_tail_hub
+from app import metrics
 
 
 # Configure logging
@@ -18,13 +27,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup, clean up on shutdown"""
+    logger.info("Starting LogWatch API...")
+    logger.info(f"OpenSearch: {settings.opensearch_host}:{settings.opensearch_port}")
+    logger.info(f"Auth required: {settings.require_auth}")
+    
+    # Shared pooled transport for all requests
+    client = get_async_opensearch_client()
+    
+    # Keep the list of daily indices current for time-range pruning, and
+    # stats/health cached so probes and dashboards don't query the cluster
+    tasks = [
+        asyncio.create_task(get_index_catalog().run(client)),
+        asyncio.create_task(get_stats_collector().run(client))
+    ]
+    if settings.live_tail_socket:
+        # Newly indexed events from the file watcher, for live tail
+        tasks.append(asyncio.create_task(get_tail_hub().follow(settings.live_tail_socket)))
+    
+    yield
+    
+    logger.info("Shutting down LogWatch API...")
+    for task in tasks:
+        task.cancel()
+    # Let them unwind before the client they use is closed
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_async_opensearch_client()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="LogWatch API",
     description="Log Ingestion and Search System",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -36,6 +77,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# br/gzip for large JSON pages and streams
+app.add_middleware(CompressionMiddleware)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record request latency per route template"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    
+    # Label by route template to keep cardinality bounded
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched"
+    metrics.HTTP_REQUEST_SECONDS.labels(
+        request.method, route_path, str(response.status_code)
+    ).observe(time.perf_counter() - start)
+    
+    return response
+
+
 # Include API routes
 app.include_router(api_router)
 app.include_router(chat_router)
@@ -51,35 +111,25 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.generate_latest(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health():
-    """Detailed health check"""
-    from app.search.client import get_opensearch_client
-    
-    try:
-        client = get_opensearch_client()
-        health_info = client.cluster.health()
-        return {
-            "status": "healthy",
-            "opensearch": health_info['status']
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
+    """Detailed health check (from the background stats snapshot)"""
+    snapshot = await get_stats_collector().snapshot(get_async_opensearch_client())
+    if "error" in snapshot:
+        logger.error(f"Health check failed: {snapshot['error']}")
         return JSONResponse(
             status_code=503,
-            content={"status": "unhealthy", "error": str(e)}
+            content={"status": "unhealthy", "error": snapshot["error"]}
         )
+    return {
+        "status": "healthy",
+        "opensearch": snapshot["opensearch"],
+        "checked_at": snapshot["collected_at"]
+    }
 
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    logger.info("Starting LogWatch API...")
-    logger.info(f"OpenSearch: {settings.opensearch_host}:{settings.opensearch_port}")
-    logger.info(f"Auth required: {settings.require_auth}")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    logger.info("Shutting down LogWatch API...")
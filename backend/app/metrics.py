@@ -0,0 +1,100 @@
+"""Prometheus metrics for ingestion and API"""
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, start_http_server
+
+# Ingestion - per-line counters are accumulated locally by the worker and
+# published once per batch, so the hot loop never touches these directly
+LINES_READ = Counter(
+    "logwatch_ingest_lines_total",
+    "Lines read from log files",
+    ["file"]
+)
+BYTES_READ = Counter(
+    "logwatch_ingest_bytes_total",
+    "Bytes read from log files",
+    ["file"]
+)
+LINES_SAMPLED_OUT = Counter(
+    "logwatch_ingest_sampled_out_total",
+    "Events dropped by per-source rate limiting",
+    ["file"]
+)
+PARSER_HITS = Counter(
+    "logwatch_parser_hits_total",
+    "Lines handled by each parser",
+    ["parser"]
+)
+PARSE_SECONDS = Histogram(
+    "logwatch_parse_seconds",
+    "Parse latency per parser (sampled)",
+    ["parser"],
+    buckets=(1e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 5e-3)
+)
+PARSE_CACHE_LOOKUPS = Counter(
+    "logwatch_parse_cache_lookups_total",
+    "Parse cache lookups",
+    ["result"]
+)
+PARSE_CACHE_BYTES = Gauge(
+    "logwatch_parse_cache_bytes",
+    "Approximate memory held by the parse cache"
+)
+PARSE_CACHE_ENTRIES = Gauge(
+    "logwatch_parse_cache_entries",
+    "Entries in the parse cache"
+)
+BULK_SECONDS = Histogram(
+    "logwatch_bulk_seconds",
+    "Bulk request latency",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+BULK_DOCS = Histogram(
+    "logwatch_bulk_docs",
+    "Documents per bulk request",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+BULK_ERRORS = Histogram(
+    "logwatch_bulk_errors",
+    "Failed documents per bulk request",
+    buckets=(0, 1, 10, 100, 1000)
+)
+CHECKPOINT_SECONDS = Histogram(
+    "logwatch_checkpoint_write_seconds",
+    "Checkpoint write latency",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+WATCHER_EVENTS = Counter(
+    "logwatch_watcher_events_total",
+    "File system events seen by the watcher",
+    ["event"]
+)
+
+# API
+HTTP_REQUEST_SECONDS = Histogram(
+    "logwatch_http_request_seconds",
+    "API request latency per route",
+    ["method", "route", "status"]
+)
+QUERY_CACHE_LOOKUPS = Counter(
+    "logwatch_query_cache_lookups_total",
+    "API result cache lookups",
+    ["kind", "result"]
+)
+OPENSEARCH_QUERY_SECONDS = Histogram(
+    "logwatch_opensearch_query_seconds",
+    "OpenSearch query time as seen by the API",
+    ["operation"]
+)
+SEARCH_COALESCED = Counter(
+    "logwatch_search_coalesced_total",
+    "API requests that shared an identical in-flight search instead of running their own",
+    ["kind"]
+)
+LIVE_TAIL_SUBSCRIBERS = Gauge(
+    "logwatch_live_tail_subscribers",
+    "Connected live-tail clients"
+)
+LIVE_TAIL_DROPPED = Counter(
+    "logwatch_live_tail_dropped_total",
+    "Live-tail events (or batches, between processes) dropped for slow consumers"
+)
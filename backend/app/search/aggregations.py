@@ -0,0 +1,310 @@
+"""Incremental dashboard aggregations over cached closed time segments"""
+
+import re
+import math
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from opensearchpy import AsyncOpenSearch
+
+from app.config import settings
+from app.metrics import OPENSEARCH_QUERY_SECONDS
+from app.search.client import aggregate_logs, _label_templates
+from app.search.indices import search_indices
+from app.search.mappings import keyword_field, tokens_aggregatable
+from app.search.rollups import aggregate_rollups, rollups_cover
+
+logger = logging.getLogger(__name__)
+
+INTERVAL = re.compile(r'^(\d+)([smhd])$')
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Final sizes of the terms lists returned to the dashboard
+TERMS_SIZES = {"top_templates": 10, "sources": 20, "top_tokens": 10}
+
+
+def interval_seconds(interval: str) -> Optional[int]:
+    """Length of a fixed histogram interval, or None if it can't be segmented"""
+    match = INTERVAL.match(interval)
+    return int(match.group(1)) * UNIT_SECONDS[match.group(2)] if match else None
+
+
+def rollup_interval_ok(interval: str) -> bool:
+    """Whether a histogram interval is coarse enough to be served from per-minute rollups"""
+    seconds = interval_seconds(interval)
+    return seconds is not None and seconds % 60 == 0 and seconds >= settings.rollup_read_min_interval_seconds
+
+
+def _epoch(dt: datetime) -> float:
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _iso(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+def _dt(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def _key_as_string(key_ms: int) -> str:
+    return datetime.fromtimestamp(key_ms / 1000, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+class IncrementalAggregator:
+    """Dashboard aggregations that only query OpenSearch for what can still change
+
+    The range is split on segment boundaries (a multiple of the histogram
+    interval, aligned like the histogram itself). Segments that ended more
+    than ``agg_cache_settle_seconds`` ago are settled: their histogram
+    buckets and per-segment terms counts are fetched once, in a single
+    request for all missing segments, and cached. Each call then only
+    queries the unaligned head and the open tail of the range, plus a
+    per-segment doc count of the settled part in the same request. A
+    segment whose count no longer matches (older logs ingested since) is
+    refetched, so backfills show up without waiting for the cache to age.
+
+    Terms lists are merged from each segment's top ``agg_cache_terms_size``,
+    so like OpenSearch's own per-shard top-N they can undercount terms that
+    are never near the top of any one segment.
+    """
+
+    def __init__(self, max_segments: Optional[int] = None):
+        self.max_segments = max_segments or settings.agg_cache_max_segments
+        self._segments: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.segments_fetched = 0
+
+    def _partial_aggs(self, step: int) -> Dict[str, Any]:
+        size = settings.agg_cache_terms_size
+        aggs = {
+            "time_series": {
+                "date_histogram": {"field": "timestamp", "fixed_interval": f"{step}s", "min_doc_count": 1},
+                "aggs": {"events": {"sum": {"field": "sample_weight", "missing": 1}}}
+            },
+            "top_templates": {"terms": {"field": "template_id", "size": size}},
+            "sources": {"terms": {"field": keyword_field("source_file"), "size": size}}
+        }
+        if tokens_aggregatable():
+            aggs["top_tokens"] = {"terms": {"field": keyword_field("tokens"), "size": size}}
+        return aggs
+
+    @staticmethod
+    def _to_partial(aggs: Dict[str, Any]) -> Dict[str, Any]:
+        partial = {
+            "series": {
+                b['key']: (b['doc_count'], int(b['events']['value']))
+                for b in aggs['time_series']['buckets']
+            }
+        }
+        for name in TERMS_SIZES:
+            partial[name] = {b['key']: b['doc_count'] for b in aggs.get(name, {}).get('buckets', [])}
+        return partial
+
+    async def _fetch_segments(self, client: AsyncOpenSearch, cache_key: Tuple, start: int, end: int, step: int, seg: int):
+        """Fetch and cache every segment in [start, end) with one request"""
+        empty = self._to_partial({"time_series": {"buckets": []}})
+        index = await search_indices(client, _dt(start), _dt(end))
+        if index is None:
+            for seg_start in range(start, end, seg):
+                self._segments[cache_key + (seg_start,)] = empty
+            return
+
+        body = {
+            "query": {"range": {"timestamp": {"gte": _iso(start), "lt": _iso(end)}}},
+            "size": 0,
+            "aggs": {
+                "segments": {
+                    "date_histogram": {"field": "timestamp", "fixed_interval": f"{seg}s", "min_doc_count": 1},
+                    "aggs": self._partial_aggs(step)
+                }
+            }
+        }
+        with OPENSEARCH_QUERY_SECONDS.labels("aggregate_segments").time():
+            response = await client.search(index=index, body=body)
+
+        found = {b['key'] // 1000: self._to_partial(b) for b in response['aggregations']['segments']['buckets']}
+        for seg_start in range(start, end, seg):
+            self._segments[cache_key + (seg_start,)] = found.get(seg_start, empty)
+            self.segments_fetched += 1
+
+    async def _query_live(
+        self,
+        client: AsyncOpenSearch,
+        ranges: List[Tuple[float, float]],
+        step: int,
+        settled: Optional[Tuple[int, int, int]] = None
+    ) -> Tuple[Dict[str, Any], Dict[int, int]]:
+        """Aggregate the live ranges; with ``settled`` (start, end, seg), also count each settled segment
+
+        The counts come back in the same request and let the caller spot
+        cached segments that late-ingested events have since landed in.
+        """
+        searched = list(ranges) + ([settled[:2]] if settled else [])
+        names = []
+        for low, high in searched:
+            index = await search_indices(client, _dt(low), _dt(high))
+            for name in (index.split(',') if index else []):
+                if name not in names:
+                    names.append(name)
+        if not names:
+            return self._to_partial({"time_series": {"buckets": []}}), {}
+
+        # The first range is closed, the rest half-open
+        bounds = [{"gte": _iso(low), ("lte" if i == 0 else "lt"): _iso(high)} for i, (low, high) in enumerate(searched)]
+        live = {"bool": {
+            "should": [{"range": {"timestamp": b}} for b in bounds[:len(ranges)]],
+            "minimum_should_match": 1
+        }}
+        body = {
+            "query": {"bool": {"filter": [{"bool": {
+                "should": [{"range": {"timestamp": b}} for b in bounds],
+                "minimum_should_match": 1
+            }}]}},
+            "size": 0,
+            "aggs": {"live": {"filter": live, "aggs": self._partial_aggs(step)}}
+        }
+        if settled:
+            body["aggs"]["settled"] = {
+                "filter": {"range": {"timestamp": bounds[-1]}},
+                "aggs": {"segments": {
+                    "date_histogram": {"field": "timestamp", "fixed_interval": f"{settled[2]}s", "min_doc_count": 1}
+                }}
+            }
+        with OPENSEARCH_QUERY_SECONDS.labels("aggregate_tail").time():
+            response = await client.search(index=','.join(names), body=body)
+
+        aggs = response['aggregations']
+        counts = {}
+        if settled:
+            counts = {b['key'] // 1000: b['doc_count'] for b in aggs['settled']['segments']['buckets']}
+        return self._to_partial(aggs['live']), counts
+
+    @staticmethod
+    def _count(partial: Dict[str, Any]) -> int:
+        return sum(count for count, _ in partial["series"].values())
+
+    @staticmethod
+    def _merge(partials: List[Dict[str, Any]], step: int) -> Dict[str, Any]:
+        series: Dict[int, List[int]] = {}
+        terms: Dict[str, Dict[Any, int]] = {name: {} for name in TERMS_SIZES}
+        for partial in partials:
+            for key, (count, estimated) in partial["series"].items():
+                totals = series.setdefault(key, [0, 0])
+                totals[0] += count
+                totals[1] += estimated
+            for name in TERMS_SIZES:
+                merged = terms[name]
+                for key, count in partial[name].items():
+                    merged[key] = merged.get(key, 0) + count
+
+        # Empty buckets between the first and last non-empty one, as OpenSearch returns them
+        time_series = []
+        if series:
+            key, last = min(series), max(series)
+            while key <= last:
+                count, estimated = series.get(key, (0, 0))
+                time_series.append({"timestamp": _key_as_string(key), "count": count, "estimated_count": estimated})
+                key += step * 1000
+
+        top = {
+            name: [
+                {"key": key, "doc_count": count}
+                for key, count in sorted(terms[name].items(), key=lambda kv: (-kv[1], str(kv[0])))[:size]
+            ]
+            for name, size in TERMS_SIZES.items()
+        }
+        return {
+            "time_series": time_series,
+            "top_tokens": [{"token": b['key'], "count": b['doc_count']} for b in top["top_tokens"]],
+            "top_templates": _label_templates(top["top_templates"]),
+            "sources": [{"source": b['key'], "count": b['doc_count']} for b in top["sources"]]
+        }
+
+    async def aggregate(self, client: AsyncOpenSearch, start_time: datetime, end_time: datetime, interval: str = "1h") -> Dict:
+        """Same result as aggregate_logs, computed from cached segments plus the live edges"""
+        step = interval_seconds(interval)
+        if step is None:
+            # Calendar intervals don't have a fixed length to segment on
+            return await aggregate_logs(client, start_time, end_time, interval)
+
+        seg = step * max(1, math.ceil(settings.agg_cache_segment_seconds / step))
+        start, end = _epoch(start_time), _epoch(end_time)
+        closed_until = (time.time() - settings.agg_cache_settle_seconds) // seg * seg
+        first = int(math.ceil(start / seg) * seg)
+        last = int(min(end, closed_until) // seg * seg)
+        cache_key = (settings.opensearch_index_prefix, settings.index_profile, step, seg)
+
+        try:
+            if last <= first:
+                live, _ = await self._query_live(client, [(start, end)], step)
+                return self._merge([live], step)
+
+            missing = [s for s in range(first, last, seg) if cache_key + (s,) not in self._segments]
+            if missing:
+                await self._fetch_segments(client, cache_key, missing[0], missing[-1] + seg, step, seg)
+
+            ranges = [(last, end)]
+            if start < first:
+                ranges.append((start, first))
+            live, counts = await self._query_live(client, ranges, step, (first, last, seg))
+
+            # Events ingested late (backfills, held-back multiline tails) change a
+            # settled segment's count; refetch those instead of serving them stale
+            stale = [
+                s for s in range(first, last, seg)
+                if self._count(self._segments[cache_key + (s,)]) != counts.get(s, 0)
+            ]
+            if stale:
+                logger.info(f"Refetching {len(stale)} aggregation segments changed since they were cached")
+                await self._fetch_segments(client, cache_key, stale[0], stale[-1] + seg, step, seg)
+
+            partials = [live]
+            for seg_start in range(first, last, seg):
+                self._segments.move_to_end(cache_key + (seg_start,))
+                partials.append(self._segments[cache_key + (seg_start,)])
+        except Exception as e:
+            logger.error(f"Aggregation error: {e}")
+            raise
+
+        while len(self._segments) > self.max_segments:
+            self._segments.popitem(last=False)
+
+        return self._merge(partials, step)
+
+    def clear(self):
+        self._segments.clear()
+
+
+_aggregator: Optional[IncrementalAggregator] = None
+
+
+def get_aggregator() -> IncrementalAggregator:
+    """Shared incremental aggregator for the API"""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = IncrementalAggregator()
+    return _aggregator
+
+
+async def precomputed(client: AsyncOpenSearch, start_time: datetime, interval: str) -> bool:
+    """Whether dashboard_aggregations reads rollups or cached segments rather than one plain search"""
+    if settings.rollup_enabled and rollup_interval_ok(interval) and await rollups_cover(client, start_time):
+        return True
+    return settings.agg_cache_enabled
+
+
+async def dashboard_aggregations(client: AsyncOpenSearch, start_time: datetime, end_time: datetime, interval: str = "1h") -> Dict:
+    """Aggregations for the dashboard
+
+    Coarse charts over ranges the rollup index covers are read from rollups;
+    everything else is aggregated from raw events, incrementally unless
+    disabled.
+    """
+    if settings.rollup_enabled and rollup_interval_ok(interval) and await rollups_cover(client, start_time):
+        return await aggregate_rollups(client, start_time, end_time, interval)
+    if not settings.agg_cache_enabled:
+        return await aggregate_logs(client, start_time, end_time, interval)
+    return await get_aggregator().aggregate(client, start_time, end_time, interval)
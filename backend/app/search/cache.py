@@ -0,0 +1,199 @@
+"""Result cache for repeated API queries"""
+
+import json
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.metrics import QUERY_CACHE_LOOKUPS
+from app.search.singleflight import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+CACHE_POLICIES = ("lru", "lfu")
+
+
+def _utc(dt: datetime) -> datetime:
+    """Naive UTC, so API bounds with and without an offset compare and key alike"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _floor(dt: datetime, seconds: int) -> datetime:
+    epoch = dt.replace(tzinfo=timezone.utc).timestamp()
+    return datetime.fromtimestamp(epoch // seconds * seconds, timezone.utc).replace(tzinfo=None)
+
+
+def _ceil(dt: datetime, seconds: int) -> datetime:
+    epoch = dt.replace(tzinfo=timezone.utc).timestamp()
+    return datetime.fromtimestamp(-(-epoch // seconds) * seconds, timezone.utc).replace(tzinfo=None)
+
+
+def is_live(end_time: datetime, now: Optional[datetime] = None) -> bool:
+    """Whether a window reaches into the period still being ingested"""
+    now = now or datetime.utcnow()
+    return _utc(end_time) >= now - timedelta(seconds=settings.query_cache_live_seconds)
+
+
+def normalize_window(start_time: datetime, end_time: datetime) -> Tuple[datetime, datetime]:
+    """Snap the bounds of a live window to cache buckets
+
+    Windows computed from "now" differ on every call; snapping both bounds to
+    the bucket makes consecutive requests share a key (and the query that is
+    actually run). The start is floored and the end ceiled, so the snapped
+    window always contains the requested one and the newest events aren't
+    cut off. Historical windows are repeated verbatim and kept exact.
+    """
+    start_time, end_time = _utc(start_time), _utc(end_time)
+    if not is_live(end_time):
+        return start_time, end_time
+    bucket = settings.query_cache_bucket_seconds
+    return _floor(start_time, bucket), _ceil(end_time, bucket)
+
+
+def ttl_for(end_time: datetime, now: Optional[datetime] = None) -> float:
+    """Seconds to keep a result: short while the window overlaps now, long once it's settled"""
+    now = now or datetime.utcnow()
+    if is_live(end_time, now):
+        return settings.query_cache_live_ttl_seconds
+    if _utc(end_time) >= now - timedelta(days=1):
+        return settings.query_cache_recent_ttl_seconds
+    return settings.query_cache_ttl_seconds
+
+
+async def coalesced(kind: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    """Run call, sharing it with identical concurrent requests unless coalescing is off"""
+    flight = get_single_flight()
+    if flight is None:
+        return await call()
+    return await flight.do(kind, key, call)
+
+
+class QueryCache:
+    """Bounded, TTL'd cache of search/aggregation results
+
+    Keys are the query kind, the (normalized) time window and the remaining
+    parameters. Expired entries are dropped first when the cache is full;
+    after that the eviction policy picks a victim: ``lru`` (least recently
+    used) or ``lfu`` (fewest hits, oldest first on ties).
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, policy: Optional[str] = None):
+        self.max_entries = max_entries or settings.query_cache_max_entries
+        self.policy = policy or settings.query_cache_policy
+        if self.policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy: {self.policy}")
+        # key -> [expires_at, value, hits]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(kind: str, start_time: datetime, end_time: datetime, params: Dict[str, Any]) -> str:
+        return json.dumps(
+            [kind, start_time.isoformat(), end_time.isoformat(), params], sort_keys=True, default=str
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        entry[2] += 1
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = [time.monotonic() + ttl, value, 0]
+        if len(self._entries) > self.max_entries:
+            self._evict()
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            if self.policy == "lru":
+                self._entries.popitem(last=False)
+            else:
+                # min() returns the first (least recently used) of equally hit entries
+                victim = min(self._entries, key=lambda key: self._entries[key][2])
+                del self._entries[victim]
+
+    def clear(self):
+        self._entries.clear()
+
+    async def fetch(
+        self,
+        kind: str,
+        start_time: datetime,
+        end_time: datetime,
+        params: Dict[str, Any],
+        compute: Callable[[datetime, datetime], Awaitable[Any]]
+    ) -> Any:
+        """Return a cached result, or run compute on the normalized window and cache it
+
+        Concurrent misses for the same key share one compute.
+        """
+        start_time, end_time = normalize_window(start_time, end_time)
+        key = self.make_key(kind, start_time, end_time, params)
+        value = self.get(key)
+        QUERY_CACHE_LOOKUPS.labels(kind, "miss" if value is None else "hit").inc()
+        if value is None:
+            async def compute_and_store():
+                result = await compute(start_time, end_time)
+                self.put(key, result, ttl_for(end_time))
+                return result
+            value = await coalesced(kind, key, compute_and_store)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and size"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+_cache: Optional[QueryCache] = None
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """Shared API result cache, or None when caching is disabled"""
+    global _cache
+    if not settings.query_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = QueryCache()
+    return _cache
+
+
+async def cached(
+    kind: str,
+    start_time: datetime,
+    end_time: datetime,
+    params: Dict[str, Any],
+    compute: Callable[[datetime, datetime], Awaitable[Any]]
+) -> Any:
+    """Run compute through the shared cache, or directly when caching is off
+
+    Either way, identical requests already in flight share one compute.
+    """
+    cache = get_query_cache()
+    if cache is None:
+        key = QueryCache.make_key(kind, _utc(start_time), _utc(end_time), params)
+        return await coalesced(kind, key, lambda: compute(start_time, end_time))
+    return await cache.fetch(kind, start_time, end_time, params, compute)
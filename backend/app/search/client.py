@@ -207,16 +207,27 @@
 
 """OpenSearch client and operations"""
 
-from opensearchpy import OpenSearch, helpers
-from typing import List, Dict, Any, Optional
+from opensearchpy import OpenSearch, AsyncOpenSearch
+from opensearchpy.exceptions import NotFoundError, TransportError
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
+import base64
+import json
 import logging
+import time
 
 from app.config import settings
+from app.metrics import OPENSEARCH_QUERY_SECONDS
+from app.ingestion.templates import lookup_templates
+from app.search.mappings import keyword_field, tokens_aggregatable
+from app.search.query import compile_query
+from app.search.lifecycle import write_alias
+from app.search.indices import index_date, search_indices
 
 logger = logging.getLogger(__name__)
 
 _client: Optional[OpenSearch] = None
+_async_client: Optional[AsyncOpenSearch] = None
 
 def get_opensearch_client() -> OpenSearch:
     """Get or create synchronous OpenSearch client"""
@@ -228,7 +239,7 @@ def get_opensearch_client() -> OpenSearch:
                 'port': settings.opensearch_port
             }],
             http_auth=(settings.opensearch_user, settings.opensearch_password),
-            use_ssl=True,
+            use_ssl=settings.opensearch_scheme == "https",
             verify_certs=settings.opensearch_verify_certs,
             ssl_show_warn=False,
             timeout=30
@@ -237,84 +248,441 @@ def get_opensearch_client() -> OpenSearch:
     return _client
 
 
+def get_async_opensearch_client() -> AsyncOpenSearch:
+    """Get or create the shared async OpenSearch client (used by the API)
+
+    One pooled aiohttp transport is shared by all requests; it is created in
+    the app lifespan and closed on shutdown via close_async_opensearch_client.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenSearch(
+            hosts=[{
+                'host': settings.opensearch_host,
+                'port': settings.opensearch_port
+            }],
+            http_auth=(settings.opensearch_user, settings.opensearch_password),
+            use_ssl=settings.opensearch_scheme == "https",
+            verify_certs=settings.opensearch_verify_certs,
+            ssl_show_warn=False,
+            maxsize=settings.opensearch_pool_maxsize,
+            timeout=30
+        )
+        logger.info("Async OpenSearch client created")
+    return _async_client
+
+
+async def close_async_opensearch_client():
+    """Close the shared async client's connection pool"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+        logger.info("Async OpenSearch client closed")
+
+
 def bulk_index_logs(client: OpenSearch, logs: List[Dict[str, Any]]) -> Dict:
-    """Bulk index logs to OpenSearch"""
+    """Bulk index logs to OpenSearch
+
+    Items rejected with 429 (and 429 responses) are retried with exponential
+    backoff. ``failed`` lists the documents that still weren't indexed, so
+    callers can leave them out of anything derived from the batch.
+    """
     if not logs:
-        return {"success": 0, "errors": 0}
+        return {"success": 0, "errors": 0, "failed": []}
 
     actions = []
     for log in logs:
-        date_str = log['timestamp'][:10] if isinstance(log['timestamp'], str) else log['timestamp'].strftime('%Y-%m-%d')
-        index_name = f"{settings.opensearch_index_prefix}-{date_str}"
-        actions.append({"_index": index_name, "_source": log})
-
+        if settings.lifecycle_enabled:
+            # ISM rolls the alias over to a new index on size/doc count/age
+            index_name = write_alias()
+        else:
+            date_str = index_date(log['timestamp']) if isinstance(log['timestamp'], str) else log['timestamp'].strftime('%Y-%m-%d')
+            index_name = f"{settings.opensearch_index_prefix}-{date_str}"
+        actions.append((index_name, log))
+
+    success, failed = 0, []
     try:
-        success, errors = helpers.bulk(client, actions, chunk_size=settings.batch_size, raise_on_error=False)
-        logger.info(f"Bulk indexed {success} logs, {len(errors) if errors else 0} errors")
-        return {"success": success, "errors": len(errors) if errors else 0}
+        for offset in range(0, len(actions), settings.batch_size):
+            pending = actions[offset:offset + settings.batch_size]
+            for attempt in range(settings.bulk_max_retries + 1):
+                last = attempt == settings.bulk_max_retries
+                if attempt:
+                    time.sleep(min(settings.bulk_max_backoff_seconds, settings.bulk_initial_backoff_seconds * 2 ** (attempt - 1)))
+                body = []
+                for index_name, log in pending:
+                    body.append({"index": {"_index": index_name}})
+                    body.append(log)
+                try:
+                    response = client.bulk(body=body)
+                except TransportError as e:
+                    if e.status_code == 429 and not last:
+                        continue
+                    raise
+
+                # Items come back in request order
+                retry = []
+                for action, item in zip(pending, response['items']):
+                    status = next(iter(item.values())).get('status', 500)
+                    if 200 <= status < 300:
+                        success += 1
+                    elif status == 429 and not last:
+                        retry.append(action)
+                    else:
+                        failed.append(action[1])
+                if not retry:
+                    break
+                pending = retry
+
+        logger.info(f"Bulk indexed {success} logs, {len(failed)} errors")
+        return {"success": success, "errors": len(failed), "failed": failed}
     except Exception as e:
         logger.error(f"Bulk index error: {e}")
         raise
 
 
-def search_logs(
-    client: OpenSearch,
+# event_id breaks timestamp ties so search_after never skips or repeats a hit;
+# documents indexed before it existed sort last within their timestamp
+LOG_SORT = [
+    {"timestamp": "desc"},
+    {"event_id": {"order": "desc", "missing": "_last", "unmapped_type": "keyword"}}
+]
+
+
+# Always returned so every hit can still be listed and paged
+IDENTITY_FIELDS = ["timestamp", "source_file", "line_number", "event_id"]
+# Heavy and rarely displayed; requested explicitly via fields when needed
+DEFAULT_EXCLUDES = ["tokens"]
+
+
+def source_filter(fields: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """_source includes/excludes for a ``fields`` list (``-name`` excludes a field)"""
+    if not fields:
+        return {"excludes": DEFAULT_EXCLUDES}
+    includes = [f for f in fields if f and not f.startswith('-')]
+    excludes = [f[1:] for f in fields if f.startswith('-') and len(f) > 1]
+    if includes:
+        return {"includes": list(dict.fromkeys(IDENTITY_FIELDS + includes)), "excludes": excludes}
+    return {"excludes": excludes}
+
+
+def parse_track_total_hits(value: Union[bool, int, str]) -> Union[bool, int]:
+    """``true``/``exact``, ``false``/``off`` or a cap N"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        if value < 0:
+            raise ValueError("track_total_hits must be true, false or a number")
+        return value
+    lowered = value.strip().lower()
+    if lowered in ("true", "exact"):
+        return True
+    if lowered in ("false", "off"):
+        return False
+    try:
+        cap = int(lowered)
+    except ValueError:
+        raise ValueError("track_total_hits must be true, false or a number")
+    if cap < 0:
+        raise ValueError("track_total_hits must be true, false or a number")
+    return cap
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Opaque, URL-safe cursor for the next page"""
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Inverse of encode_cursor; raises ValueError for anything malformed"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict) or not _valid_cursor_state(state):
+        raise ValueError("Invalid cursor")
+    return state
+
+
+def _valid_cursor_state(state: Dict[str, Any]) -> bool:
+    """Check every key search_logs reads from a cursor has the expected type"""
+    def optional(key, kind):
+        return state.get(key) is None or isinstance(state[key], kind)
+
+    if not all(key in state for key in ("start", "end", "after", "pit")):
+        return False
+    try:
+        datetime.fromisoformat(state["start"])
+        datetime.fromisoformat(state["end"])
+    except (TypeError, ValueError):
+        return False
+    if not (optional("after", list) and optional("pit", str)):
+        return False
+    if not (optional("query", str) and optional("source_file", str)):
+        return False
+    if not optional("fields", list) or not all(isinstance(f, str) for f in state.get("fields") or []):
+        return False
+    for key in ("page", "size"):
+        value = state.get(key, 1)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            return False
+    total = state.get("total")
+    return total is None or (
+        isinstance(total, list) and len(total) == 2
+        and isinstance(total[0], int) and isinstance(total[1], bool)
+    )
+
+
+def logs_page_body(
     start_time: datetime,
     end_time: datetime,
     query: Optional[str] = None,
     source_file: Optional[str] = None,
     fields: Optional[List[str]] = None,
-    page: int = 1,
-    page_size: int = 100
-) -> Dict:
-    """Search logs with filters"""
-    index_name = f"{settings.opensearch_index_prefix}-*"
-
-    must_clauses = [
+    page_size: int = 100,
+    track_total_hits: Union[bool, int] = True
+) -> Dict[str, Any]:
+    """Search body for one page of logs, newest first (without paging position)"""
+    filter_clauses = [
         {"range": {"timestamp": {"gte": start_time.isoformat(), "lte": end_time.isoformat()}}}
     ]
     if source_file:
-        must_clauses.append({"term": {"source_file.keyword": source_file}})
+        filter_clauses.append({"term": {keyword_field("source_file"): source_file}})
     if query:
-        must_clauses.append({"multi_match": {"query": query, "fields": ["raw_line", "tokens", "fields.*"]}})
+        filter_clauses.append(compile_query(query))
+
+    return {
+        "query": {"bool": {"filter": filter_clauses}},
+        "sort": LOG_SORT,
+        "size": page_size,
+        "_source": source_filter(fields),
+        "track_total_hits": track_total_hits
+    }
 
-    body = {
-        "query": {"bool": {"must": must_clauses}},
-        "sort": [{"timestamp": "desc"}],
-        "from": (page - 1) * page_size,
-        "size": page_size
+
+def logs_page_result(response: Dict[str, Any], page: int, page_size: int) -> Dict[str, Any]:
+    """Page of logs from a search response"""
+    total = response['hits'].get('total')
+    return {
+        "total": total['value'] if total else None,
+        "is_lower_bound": bool(total) and total.get('relation') == 'gte',
+        "page": page,
+        "page_size": page_size,
+        "logs": [hit['_source'] for hit in response['hits']['hits']]
     }
 
+
+async def search_logs(
+    client: AsyncOpenSearch,
+    start_time: datetime,
+    end_time: datetime,
+    query: Optional[str] = None,
+    source_file: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    page: int = 1,
+    page_size: int = 100,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    track_total_hits: Union[bool, int, None] = None
+) -> Dict:
+    """Search logs with filters
+
+    With ``use_cursor`` (first page) or a ``cursor`` from a previous response,
+    pages are fetched with search_after against a point in time, so the cost
+    per page doesn't grow with depth and results don't shift while new logs
+    are ingested. The cursor carries the filters, so later pages only need it.
+
+    ``fields`` limits the returned ``_source`` (see source_filter); by
+    default everything but ``tokens`` is returned.
+
+    ``track_total_hits`` is True (exact total), a number N (count up to N;
+    ``is_lower_bound`` is set when there are more) or False (no total,
+    cheapest). It defaults to ``search_track_total_hits``. Cursor pages
+    after the first reuse the first page's total instead of recounting.
+    """
+    state = None
+    if cursor:
+        state = decode_cursor(cursor)
+        start_time = datetime.fromisoformat(state["start"])
+        end_time = datetime.fromisoformat(state["end"])
+        query, source_file, fields = state.get("query"), state.get("source_file"), state.get("fields")
+        page, page_size = state.get("page", 1), state.get("size", page_size)
+
+    index_name = None
+    if not (state and state["pit"]):
+        # A PIT already fixes the indices
+        index_name = await search_indices(client, start_time, end_time)
+        if index_name is None:
+            empty = {"total": 0, "is_lower_bound": False, "page": page, "page_size": page_size, "logs": []}
+            if state is not None or use_cursor:
+                empty["next_cursor"] = None
+            return empty
+
+    track_total_hits = parse_track_total_hits(
+        settings.search_track_total_hits if track_total_hits is None else track_total_hits
+    )
+    if state is not None and state.get("total") is not None:
+        track_total_hits = False
+
+    body = logs_page_body(start_time, end_time, query, source_file, fields, page_size, track_total_hits)
+
+    if state is None and use_cursor:
+        state = {
+            "start": start_time.isoformat(), "end": end_time.isoformat(),
+            "query": query, "source_file": source_file, "fields": fields,
+            "page": 1, "size": page_size, "after": None, "pit": None
+        }
+        try:
+            pit = await client.create_pit(index=index_name, keep_alive=settings.pit_keep_alive)
+            state["pit"] = pit["pit_id"]
+        except Exception as e:
+            # search_after alone still keeps page cost flat, just without a frozen view
+            logger.warning(f"Point in time unavailable, paging without it: {e}")
+
+    if state is None:
+        body["from"] = (page - 1) * page_size
+    else:
+        if state["pit"]:
+            body["pit"] = {"id": state["pit"], "keep_alive": settings.pit_keep_alive}
+        if state["after"] is not None:
+            body["search_after"] = state["after"]
+
     try:
-        response = client.search(index=index_name, body=body)
-        logs = [hit['_source'] for hit in response['hits']['hits']]
-        return {"total": response['hits']['total']['value'], "page": page, "page_size": page_size, "logs": logs}
+        with OPENSEARCH_QUERY_SECONDS.labels("search").time():
+            if state is not None and state["pit"]:
+                # The PIT fixes the indices; they must not be repeated in the path
+                response = await client.search(body=body)
+            else:
+                response = await client.search(index=index_name, body=body)
+    except NotFoundError as e:
+        if state is not None and state["pit"]:
+            raise ValueError("Cursor has expired; start again without a cursor")
+        logger.error(f"Search error: {e}")
+        raise
     except Exception as e:
         logger.error(f"Search error: {e}")
         raise
 
+    hits = response['hits']['hits']
+    result = logs_page_result(response, page, page_size)
+
+    if state is not None:
+        if state.get("total") is not None:
+            result["total"], result["is_lower_bound"] = state["total"]
+        result["next_cursor"] = None
+        pit_id = response.get("pit_id", state["pit"])
+        if len(hits) == page_size:
+            result["next_cursor"] = encode_cursor({
+                **state, "pit": pit_id, "after": hits[-1]["sort"], "page": page + 1,
+                "total": [result["total"], result["is_lower_bound"]] if result["total"] is not None else None
+            })
+        elif pit_id:
+            await close_pit(client, pit_id)
+
+    return result
+
+
+async def close_pit(client: AsyncOpenSearch, pit_id: str):
+    """Release a point in time early (it would otherwise expire on its own)"""
+    try:
+        await client.delete_pit(body={"pit_id": [pit_id]})
+    except Exception as e:
+        logger.debug(f"Could not delete PIT: {e}")
 
-def aggregate_logs(client: OpenSearch, start_time: datetime, end_time: datetime, interval: str = "1h") -> Dict:
-    """Get aggregations for logs"""
-    index_name = f"{settings.opensearch_index_prefix}-*"
 
+def aggregation_body(start_time: datetime, end_time: datetime, interval: str = "1h") -> Dict[str, Any]:
+    """Search body for the dashboard aggregations"""
     body = {
         "query": {"range": {"timestamp": {"gte": start_time.isoformat(), "lte": end_time.isoformat()}}},
         "size": 0,
         "aggs": {
-            "time_series": {"date_histogram": {"field": "timestamp", "fixed_interval": interval}},
-            "top_tokens": {"terms": {"field": "tokens.keyword", "size": 10}},
-            "sources": {"terms": {"field": "source_file.keyword", "size": 20}}
+            "time_series": {
+                "date_histogram": {"field": "timestamp", "fixed_interval": interval},
+                # Rate-limited sources carry the dropped line count in sample_weight
+                "aggs": {"events": {"sum": {"field": "sample_weight", "missing": 1}}}
+            },
+            "top_templates": {"terms": {"field": "template_id", "size": 10}},
+            "sources": {"terms": {"field": keyword_field("source_file"), "size": 20}}
         }
     }
+    if tokens_aggregatable():
+        body["aggs"]["top_tokens"] = {"terms": {"field": keyword_field("tokens"), "size": 10}}
+    return body
+
+
+def aggregation_result(response: Dict[str, Any]) -> Dict:
+    """Dashboard aggregations from a search response"""
+    aggs = response['aggregations']
+    return {
+        "time_series": [
+            {"timestamp": b['key_as_string'], "count": b['doc_count'], "estimated_count": int(b['events']['value'])}
+            for b in aggs['time_series']['buckets']
+        ],
+        "top_tokens": [
+            {"token": b['key'], "count": b['doc_count']}
+            for b in aggs.get('top_tokens', {}).get('buckets', [])
+        ],
+        "top_templates": _label_templates(aggs['top_templates']['buckets']),
+        "sources": [{"source": b['key'], "count": b['doc_count']} for b in aggs['sources']['buckets']]
+    }
+
+
+def empty_aggregations() -> Dict:
+    return {"time_series": [], "top_tokens": [], "top_templates": [], "sources": []}
+
+
+async def aggregate_logs(client: AsyncOpenSearch, start_time: datetime, end_time: datetime, interval: str = "1h") -> Dict:
+    """Get aggregations for logs"""
+    index_name = await search_indices(client, start_time, end_time)
+    if index_name is None:
+        return empty_aggregations()
 
     try:
-        response = client.search(index=index_name, body=body)
-        return {
-            "time_series": [{"timestamp": b['key_as_string'], "count": b['doc_count']} for b in response['aggregations']['time_series']['buckets']],
-            "top_tokens": [{"token": b['key'], "count": b['doc_count']} for b in response['aggregations']['top_tokens']['buckets']],
-            "sources": [{"source": b['key'], "count": b['doc_count']} for b in response['aggregations']['sources']['buckets']]
-        }
+        with OPENSEARCH_QUERY_SECONDS.labels("aggregate").time():
+            response = await client.search(index=index_name, body=aggregation_body(start_time, end_time, interval))
+        return aggregation_result(response)
     except Exception as e:
         logger.error(f"Aggregation error: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+async def template_counts(
+    client: AsyncOpenSearch,
+    start_time: datetime,
+    end_time: datetime,
+    query: Optional[str] = None,
+    size: int = 20
+) -> List[Dict[str, Any]]:
+    """Per-template line counts - a cheap keyword terms agg instead of tokens"""
+    index_name = await search_indices(client, start_time, end_time)
+    if index_name is None:
+        return []
+
+    filter_clauses = [
+        {"range": {"timestamp": {"gte": start_time.isoformat(), "lte": end_time.isoformat()}}}
+    ]
+    if query:
+        filter_clauses.append(compile_query(query))
+
+    body = {
+        "query": {"bool": {"filter": filter_clauses}},
+        "size": 0,
+        "aggs": {"templates": {"terms": {"field": "template_id", "size": size}}}
+    }
+
+    try:
+        with OPENSEARCH_QUERY_SECONDS.labels("templates").time():
+            response = await client.search(index=index_name, body=body)
+        return _label_templates(response['aggregations']['templates']['buckets'])
+    except Exception as e:
+        logger.error(f"Template aggregation error: {e}")
+        raise
+
+
+def _label_templates(buckets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attach template text from the local template table to terms buckets"""
+    templates = lookup_templates([b['key'] for b in buckets])
+    return [
+        {"template_id": b['key'], "template": templates.get(b['key'], ""), "count": b['doc_count']}
+        for b in buckets
+    ]
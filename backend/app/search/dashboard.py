@@ -0,0 +1,104 @@
+"""Every dashboard panel from one request"""
+
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from opensearchpy import AsyncOpenSearch
+
+from app.config import settings
+from app.metrics import OPENSEARCH_QUERY_SECONDS
+from app.search.aggregations import dashboard_aggregations, precomputed
+from app.search.client import (
+    aggregation_body, aggregation_result, empty_aggregations,
+    logs_page_body, logs_page_result, parse_track_total_hits
+)
+from app.search.indices import search_indices
+from app.search.stats import get_stats_collector
+
+logger = logging.getLogger(__name__)
+
+# Stats panel fields, served from the background snapshot
+STATS_FIELDS = ("total_events", "indices", "index_size", "ingest_rate_per_second")
+
+
+async def _timed(coro) -> tuple:
+    start = time.perf_counter()
+    result = await coro
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+async def dashboard_panels(
+    client: AsyncOpenSearch,
+    start_time: datetime,
+    end_time: datetime,
+    query: Optional[str] = None,
+    source_file: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 50,
+    interval: str = "1h"
+) -> Dict[str, Any]:
+    """Log page, aggregations and stats for one dashboard load
+
+    The log page and (unless they come from rollups or cached segments,
+    which run alongside) the aggregations are sent as one _msearch; stats
+    come from the background snapshot. ``timings_ms`` has OpenSearch's
+    ``took`` for each _msearch panel and wall time for the rest.
+    """
+    index_name = await search_indices(client, start_time, end_time)
+    separate_aggs = await precomputed(client, start_time, interval)
+
+    panels: List[str] = []
+    lines: List[Dict[str, Any]] = []
+    if index_name is not None:
+        track = parse_track_total_hits(settings.search_track_total_hits)
+        body = logs_page_body(start_time, end_time, query, source_file, page_size=page_size, track_total_hits=track)
+        body["from"] = (page - 1) * page_size
+        panels.append("logs")
+        lines += [{"index": index_name}, body]
+        if not separate_aggs:
+            panels.append("aggregations")
+            lines += [{"index": index_name}, aggregation_body(start_time, end_time, interval)]
+
+    async def multi_search():
+        if not lines:
+            return {"responses": []}
+        with OPENSEARCH_QUERY_SECONDS.labels("dashboard").time():
+            return await client.msearch(body=lines)
+
+    try:
+        if separate_aggs:
+            (response, _), (aggregations, aggs_ms) = await asyncio.gather(
+                _timed(multi_search()),
+                _timed(dashboard_aggregations(client, start_time, end_time, interval))
+            )
+        else:
+            response, _ = await _timed(multi_search())
+    except Exception as e:
+        logger.error(f"Dashboard search error: {e}")
+        raise
+
+    results, timings = {}, {}
+    for panel, item in zip(panels, response["responses"]):
+        if "error" in item:
+            logger.error(f"Dashboard {panel} panel failed: {item['error']}")
+            raise RuntimeError(f"{panel}: {item['error'].get('reason', item['error'])}")
+        results[panel] = item
+        timings[panel] = item.get("took", 0)
+
+    logs = logs_page_result(results["logs"], page, page_size) if "logs" in results else {
+        "total": 0, "is_lower_bound": False, "page": page, "page_size": page_size, "logs": []
+    }
+    if separate_aggs:
+        timings["aggregations"] = aggs_ms
+    elif "aggregations" in results:
+        aggregations = aggregation_result(results["aggregations"])
+    else:
+        aggregations = empty_aggregations()
+        timings["aggregations"] = 0
+
+    snapshot = await get_stats_collector().snapshot(client)
+    stats = {key: snapshot.get(key) for key in STATS_FIELDS}
+    return {"logs": logs, "aggregations": aggregations, "stats": stats, "timings_ms": timings}
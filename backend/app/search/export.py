@@ -0,0 +1,158 @@
+"""Streaming bulk export of matching log events"""
+
+import csv
+import io
+import json
+import zlib
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Any, List, Optional
+
+from opensearchpy import AsyncOpenSearch
+
+from app.config import settings
+from app.search.client import close_pit
+from app.search.indices import search_indices
+from app.search.mappings import keyword_field
+from app.search.query import compile_query
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "raw": "text/plain"
+}
+
+CSV_COLUMNS = ["timestamp", "source_file", "line_number", "event_id", "raw_line"]
+
+# Oldest first, so an interrupted download can resume after its last line
+EXPORT_SORT = [
+    {"timestamp": "asc"},
+    {"event_id": {"order": "asc", "missing": "_last", "unmapped_type": "keyword"}}
+]
+
+
+def parse_resume_after(value: str) -> List[Any]:
+    """``<timestamp>,<event_id>`` of the last line received -> search_after values"""
+    timestamp, _, event_id = value.partition(',')
+    try:
+        ts = datetime.fromisoformat(timestamp.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError("resume_after must be '<timestamp>,<event_id>'")
+    if not event_id.strip():
+        raise ValueError("resume_after needs the event_id too: '<timestamp>,<event_id>'")
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    # Date sort values are epoch milliseconds; kept in integers, since float
+    # rounding can land a millisecond low and repeat or skip boundary events
+    millis = int(ts.replace(microsecond=0).timestamp()) * 1000 + ts.microsecond // 1000
+    return [millis, event_id.strip()]
+
+
+def _encode_batch(sources: List[Dict[str, Any]], fmt: str) -> str:
+    if fmt == "ndjson":
+        return ''.join(json.dumps(source, default=str) + '\n' for source in sources)
+    if fmt == "raw":
+        return ''.join(source.get("raw_line", "") + '\n' for source in sources)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([source.get(column, "") for column in CSV_COLUMNS] for source in sources)
+    return buffer.getvalue()
+
+
+async def export_logs(
+    client: AsyncOpenSearch,
+    start_time: datetime,
+    end_time: datetime,
+    query: Optional[str] = None,
+    source_file: Optional[str] = None,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    resume_after: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """Yield encoded chunks of every matching event, one search page at a time
+
+    Pages are read with search_after against a point in time, and each page
+    is encoded straight from the response and handed to the client before
+    the next is fetched, so memory stays flat however many events match.
+
+    Raw exports carry only the lines, so they hold nothing to resume from;
+    use ndjson or csv for downloads that may need ``resume_after``.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    after = parse_resume_after(resume_after) if resume_after else None
+
+    index_name = await search_indices(client, start_time, end_time)
+    filter_clauses = [
+        {"range": {"timestamp": {"gte": start_time.isoformat(), "lte": end_time.isoformat()}}}
+    ]
+    if source_file:
+        filter_clauses.append({"term": {keyword_field("source_file"): source_file}})
+    if query:
+        filter_clauses.append(compile_query(query))
+
+    body: Dict[str, Any] = {
+        "query": {"bool": {"filter": filter_clauses}},
+        "sort": EXPORT_SORT,
+        "size": settings.export_batch_size,
+        "track_total_hits": False
+    }
+    if fmt == "raw":
+        body["_source"] = ["raw_line"]
+    elif fmt == "csv":
+        body["_source"] = CSV_COLUMNS
+
+    pit_id = None
+    if index_name is None:
+        # No index holds this range: just the CSV header
+        if fmt == "csv" and after is None:
+            header = (','.join(CSV_COLUMNS) + '\r\n').encode()
+            yield zlib.compress(header, wbits=zlib.MAX_WBITS | 16) if compress else header
+        elif compress:
+            yield zlib.compress(b"", wbits=zlib.MAX_WBITS | 16)
+        return
+
+    try:
+        pit = await client.create_pit(index=index_name, keep_alive=settings.pit_keep_alive)
+        pit_id = pit["pit_id"]
+    except Exception as e:
+        logger.warning(f"Point in time unavailable, exporting without it: {e}")
+
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    exported = 0
+    try:
+        if fmt == "csv" and after is None:
+            header = ','.join(CSV_COLUMNS) + '\r\n'
+            yield compressor.compress(header.encode()) if compressor else header.encode()
+
+        while True:
+            if after is not None:
+                body["search_after"] = after
+            if pit_id:
+                body["pit"] = {"id": pit_id, "keep_alive": settings.pit_keep_alive}
+                response = await client.search(body=body)
+                pit_id = response.get("pit_id", pit_id)
+            else:
+                response = await client.search(index=index_name, body=body)
+
+            hits = response["hits"]["hits"]
+            if hits:
+                chunk = _encode_batch([hit.get("_source", {}) for hit in hits], fmt).encode()
+                exported += len(hits)
+                after = hits[-1]["sort"]
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    yield chunk
+            if len(hits) < settings.export_batch_size:
+                break
+
+        if compressor:
+            yield compressor.flush()
+        logger.info(f"Exported {exported} events as {fmt}")
+    finally:
+        # Also runs when the client disconnects mid-stream
+        if pit_id:
+            await close_pit(client, pit_id)
@@ -0,0 +1,139 @@
+"""Pick the daily indices a time range touches instead of searching every index"""
+
+import re
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set
+
+from opensearchpy import AsyncOpenSearch
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DAILY_SUFFIX = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _utc_date(dt: datetime):
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.date()
+
+
+def index_date(timestamp: str) -> str:
+    """UTC date (YYYY-MM-DD) of an event timestamp, naming its daily index
+
+    Naive timestamps are taken as UTC already; ones with an offset are
+    converted, so the index a document lands in matches the UTC range
+    queries are pruned with.
+    """
+    if len(timestamp) > 19 and ('+' in timestamp[19:] or '-' in timestamp[19:] or timestamp.endswith('Z')):
+        try:
+            return _utc_date(datetime.fromisoformat(timestamp.replace('Z', '+00:00'))).isoformat()
+        except ValueError:
+            pass
+    return timestamp[:10]
+
+
+class IndexCatalog:
+    """Cached names of the existing ``{prefix}-*`` indices
+
+    Refreshed by ``run`` in the background (or inline when it isn't
+    running). Daily indices created since the last refresh are covered by
+    matching dates on or after the refresh day with a wildcard, which
+    resolves to nothing rather than failing when the index doesn't exist.
+    """
+
+    def __init__(self):
+        self.daily: Set[str] = set()
+        self.other: Set[str] = set()
+        self.refreshed_at: Optional[float] = None
+        self.refreshed_day = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, client: AsyncOpenSearch):
+        prefix = settings.opensearch_index_prefix
+        rows = await client.cat.indices(index=f"{prefix}-*", format="json", h="index")
+        daily, other = set(), set()
+        for row in rows:
+            name = row["index"]
+            suffix = name[len(prefix) + 1:]
+            (daily if DAILY_SUFFIX.match(suffix) else other).add(name)
+        self.daily, self.other = daily, other
+        self.refreshed_at = time.monotonic()
+        self.refreshed_day = datetime.now(timezone.utc).date()
+
+    async def ensure_fresh(self, client: AsyncOpenSearch):
+        """Refresh inline if the background loop hasn't kept the catalog current"""
+        limit = 2 * settings.index_catalog_refresh_seconds
+        if self.refreshed_at is not None and time.monotonic() - self.refreshed_at < limit:
+            return
+        async with self._lock:
+            if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= limit:
+                await self.refresh(client)
+
+    async def run(self, client: AsyncOpenSearch):
+        """Background refresh loop"""
+        while True:
+            try:
+                await self.refresh(client)
+            except Exception as e:
+                logger.warning(f"Index catalog refresh failed: {e}")
+            await asyncio.sleep(settings.index_catalog_refresh_seconds)
+
+    def indices_for(self, start_time: datetime, end_time: datetime) -> Optional[List[str]]:
+        """Indices that can hold events in [start_time, end_time]
+
+        ``None`` means search the whole pattern (too many days to list);
+        an empty list means there is nothing to search.
+        """
+        prefix = settings.opensearch_index_prefix
+        first, last = _utc_date(start_time), _utc_date(end_time)
+        days = (last - first).days + 1
+        if days > settings.index_pruning_max_days:
+            return None
+
+        names = sorted(self.other)
+        for offset in range(max(days, 0)):
+            day = first + timedelta(days=offset)
+            name = f"{prefix}-{day.isoformat()}"
+            if name in self.daily:
+                names.append(name)
+            elif self.refreshed_day is None or day >= self.refreshed_day:
+                names.append(f"{name}*")
+        return names
+
+    def clear(self):
+        self.daily, self.other = set(), set()
+        self.refreshed_at = self.refreshed_day = None
+
+
+_catalog: Optional[IndexCatalog] = None
+
+
+def get_index_catalog() -> IndexCatalog:
+    """Shared index catalog for the API"""
+    global _catalog
+    if _catalog is None:
+        _catalog = IndexCatalog()
+    return _catalog
+
+
+async def search_indices(client: AsyncOpenSearch, start_time: datetime, end_time: datetime) -> Optional[str]:
+    """Index expression for a time-range search, or None if no index can match"""
+    pattern = f"{settings.opensearch_index_prefix}-*"
+    if not settings.index_pruning_enabled or settings.lifecycle_enabled:
+        # Rolled-over indices aren't named by date
+        return pattern
+    catalog = get_index_catalog()
+    try:
+        await catalog.ensure_fresh(client)
+    except Exception as e:
+        logger.warning(f"Index catalog unavailable, searching all indices: {e}")
+        return pattern
+    names = catalog.indices_for(start_time, end_time)
+    if names is None:
+        return pattern
+    return ','.join(names) or None
@@ -0,0 +1,166 @@
+"""Index lifecycle: rollover through a write alias, force-merge and retention"""
+
+import math
+import re
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from opensearchpy import OpenSearch
+from opensearchpy.exceptions import ConflictError, NotFoundError
+
+from app.config import settings
+from app.search.mappings import get_index_template
+
+logger = logging.getLogger(__name__)
+
+SIZE_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4}
+
+
+def write_alias() -> str:
+    """Alias the ingest path writes to when lifecycle management is on"""
+    return f"{settings.opensearch_index_prefix}-write"
+
+
+def _parse_bytes(size: str) -> int:
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kmgt]?b)\s*', size.lower())
+    if not match:
+        raise ValueError(f"Invalid size: {size}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def get_ism_policy(rollover: bool = True) -> Dict[str, Any]:
+    """ISM policy for rolled-over indices, or retention-only for legacy daily ones
+
+    hot (rollover on size/docs/age) -> warm (read-only, force-merge to one
+    segment) -> delete once past the retention age.
+    """
+    prefix = settings.opensearch_index_prefix
+    warm = {
+        "name": "warm",
+        "actions": [
+            {"read_only": {}},
+            {"force_merge": {"max_num_segments": 1}}
+        ],
+        "transitions": [{"state_name": "delete", "conditions": {"min_index_age": settings.lifecycle_retention}}]
+    }
+    delete = {"name": "delete", "actions": [{"delete": {}}], "transitions": []}
+
+    if rollover:
+        states = [
+            {
+                "name": "hot",
+                "actions": [{"rollover": {
+                    "min_size": settings.lifecycle_rollover_size,
+                    "min_doc_count": settings.lifecycle_rollover_docs,
+                    "min_index_age": settings.lifecycle_rollover_age
+                }}],
+                "transitions": [{"state_name": "warm"}]
+            },
+            warm,
+            delete
+        ]
+        pattern = f"{prefix}-0*"
+    else:
+        # Daily indices from before rollover: merge once the day is over, then expire
+        states = [
+            {"name": "hot", "actions": [], "transitions": [{"state_name": "warm", "conditions": {"min_index_age": "1d"}}]},
+            warm,
+            delete
+        ]
+        pattern = f"{prefix}-20*"
+
+    return {
+        "policy": {
+            "description": f"LogWatch {'rollover' if rollover else 'retention'} policy for {prefix} indices",
+            "default_state": "hot",
+            "states": states,
+            "ism_template": [{"index_patterns": [pattern], "priority": 100}]
+        }
+    }
+
+
+def put_ism_policy(client: OpenSearch, policy_id: str, policy: Dict[str, Any]):
+    """Create or update an ISM policy"""
+    path = f"/_plugins/_ism/policies/{policy_id}"
+    try:
+        client.transport.perform_request("PUT", path, body=policy)
+    except ConflictError:
+        # Updates must carry the current sequence number
+        current = client.transport.perform_request("GET", path)
+        client.transport.perform_request("PUT", path, params={
+            "if_seq_no": current["_seq_no"],
+            "if_primary_term": current["_primary_term"]
+        }, body=policy)
+    logger.info(f"ISM policy {policy_id} applied")
+
+
+def observed_daily_bytes(client: OpenSearch, window_days: int = 7) -> float:
+    """Average primary store bytes ingested per day over the recent window"""
+    prefix = settings.opensearch_index_prefix
+    try:
+        rows = client.cat.indices(
+            index=f"{prefix}-*", format="json", bytes="b", h="index,pri.store.size,creation.date"
+        )
+    except NotFoundError:
+        return 0.0
+
+    cutoff = datetime.utcnow() - timedelta(days=window_days)
+    total, oldest = 0, None
+    for row in rows:
+        created = None
+        if row.get("creation.date"):
+            created = datetime.utcfromtimestamp(int(row["creation.date"]) / 1000)
+        else:
+            match = re.search(r'(\d{4}-\d{2}-\d{2})$', row["index"])
+            if match:
+                created = datetime.strptime(match.group(1), "%Y-%m-%d")
+        if created is None or created < cutoff:
+            continue
+        total += int(row.get("pri.store.size") or 0)
+        oldest = created if oldest is None else min(oldest, created)
+
+    if oldest is None:
+        return 0.0
+    days = max(1.0, (datetime.utcnow() - oldest).total_seconds() / 86400)
+    return total / days
+
+
+def recommend_shards(daily_bytes: float) -> int:
+    """Primary shards so one index (a day, capped at the rollover size) fits the shard target"""
+    index_bytes = min(daily_bytes, _parse_bytes(settings.lifecycle_rollover_size))
+    shards = math.ceil(index_bytes / _parse_bytes(settings.lifecycle_shard_target_size))
+    return max(1, min(settings.lifecycle_max_shards, shards))
+
+
+def setup_lifecycle(client: OpenSearch, shards: Optional[int] = None, profile: Optional[str] = None) -> Dict[str, Any]:
+    """Apply policies and template, and bootstrap the first write index"""
+    prefix = settings.opensearch_index_prefix
+    alias = write_alias()
+
+    put_ism_policy(client, f"{prefix}-rollover", get_ism_policy(rollover=True))
+    put_ism_policy(client, f"{prefix}-retention", get_ism_policy(rollover=False))
+
+    daily_bytes = observed_daily_bytes(client)
+    if shards is None:
+        shards = recommend_shards(daily_bytes)
+
+    template = get_index_template(profile)
+    template["template"]["settings"].update({
+        "number_of_shards": shards,
+        "plugins.index_state_management.rollover_alias": alias
+    })
+    client.indices.put_index_template(name=f"{prefix}-template", body=template)
+
+    bootstrapped = None
+    if not client.indices.exists_alias(name=alias):
+        bootstrapped = f"{prefix}-000001"
+        client.indices.create(index=bootstrapped, body={"aliases": {alias: {"is_write_index": True}}})
+        logger.info(f"Created {bootstrapped} with write alias {alias}")
+
+    return {
+        "write_alias": alias,
+        "shards": shards,
+        "observed_daily_bytes": int(daily_bytes),
+        "bootstrapped_index": bootstrapped
+    }
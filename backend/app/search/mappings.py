@@ -1,12 +1,123 @@
 """OpenSearch index mappings"""
 
-from backend.app.config import settings
+from typing import Dict, Any, List, Optional
 
+from app.config import settings
 
-def get_index_template():
+INDEX_PROFILES = ("standard", "lean")
+
+# Document keys that can't be shadowed by a promoted field
+RESERVED_FIELDS = {
+    "timestamp", "source_file", "line_number", "raw_line", "tokens", "fields",
+    "ingest_id", "event_id", "template_id", "template_params", "sample_weight"
+}
+
+
+def promoted_fields() -> Dict[str, str]:
+    """Whitelisted ``fields`` keys copied to typed top-level fields (lean profile)"""
+    promoted = {}
+    for item in settings.lean_promoted_fields.split(','):
+        name, _, field_type = item.strip().partition(':')
+        if name and name not in RESERVED_FIELDS:
+            promoted[name] = field_type or "keyword"
+    return promoted
+
+
+def keyword_field(name: str) -> str:
+    """Exact-match field for a string property under the active profile"""
+    return name if settings.index_profile == "lean" else f"{name}.keyword"
+
+
+def search_fields() -> List[str]:
+    """Fields searched by free-text queries under the active profile"""
+    if settings.index_profile == "lean":
+        return ["raw_line", "fields"]
+    return ["raw_line", "tokens", "fields.*"]
+
+
+def tokens_aggregatable() -> bool:
+    """Whether tokens can be used in a terms aggregation"""
+    return settings.index_profile != "lean" or settings.lean_index_tokens
+
+
+def get_lean_properties() -> Dict[str, Any]:
+    """Ingest-optimized mappings
+
+    - ``source_file`` is keyword only
+    - ``tokens`` is keyword only, or kept out of the index entirely
+    - ``fields`` is a single ``flat_object`` (no mapping explosion); selected
+      keys are promoted to typed top-level fields
+    - ``raw_line`` has no norms and no positions (phrase queries are not
+      supported on it)
+    - frequent aggregation keys load global ordinals at refresh time
+    """
+    properties = {
+        "timestamp": {
+            "type": "date",
+            "format": "strict_date_optional_time||epoch_millis"
+        },
+        "source_file": {
+            "type": "keyword",
+            "eager_global_ordinals": True
+        },
+        "line_number": {
+            "type": "integer",
+            "index": False
+        },
+        "raw_line": {
+            "type": "text",
+            "analyzer": "standard",
+            "norms": False,
+            "index_options": "freqs"
+        },
+        "tokens": {
+            "type": "keyword",
+            "ignore_above": 256
+        } if settings.lean_index_tokens else {
+            "type": "keyword",
+            "index": False,
+            "doc_values": False
+        },
+        "fields": {
+            "type": "flat_object"
+        },
+        "ingest_id": {
+            "type": "keyword"
+        },
+        "event_id": {
+            "type": "keyword"
+        },
+        "template_id": {
+            "type": "keyword",
+            "eager_global_ordinals": True
+        },
+        "template_params": {
+            "type": "keyword",
+            "ignore_above": 256
+        },
+        "sample_weight": {
+            "type": "integer"
+        }
+    }
+    
+    for name, field_type in promoted_fields().items():
+        if field_type == "keyword":
+            properties[name] = {"type": "keyword", "ignore_above": 256, "eager_global_ordinals": True}
+        else:
+            # A value that doesn't fit the type must not reject the whole document
+            properties[name] = {"type": field_type, "ignore_malformed": True}
+    
+    return properties
+
+
+def get_index_template(profile: Optional[str] = None):
     """Get OpenSearch index template for log events"""
     
-    return {
+    profile = profile or settings.index_profile
+    if profile not in INDEX_PROFILES:
+        raise ValueError(f"Unknown index profile: {profile}")
+    
+    template = {
         "index_patterns": [f"{settings.opensearch_index_prefix}-*"],
         "template": {
             "settings": {
@@ -52,18 +163,39 @@ def get_index_template():
                     },
                     "ingest_id": {
                         "type": "keyword"
+                    },
+                    "event_id": {
+                        "type": "keyword"
+                    },
+                    "template_id": {
+                        "type": "keyword"
+                    },
+                    "template_params": {
+                        "type": "keyword",
+                        "ignore_above": 256
+                    },
+                    "sample_weight": {
+                        "type": "integer"
                     }
                 }
             }
         }
     }
+    
+    if profile == "lean":
+        template["template"]["mappings"] = {
+            "dynamic": False,
+            "properties": get_lean_properties()
+        }
+    
+    return template
 
 
-def create_index_template(client):
+def create_index_template(client, profile: Optional[str] = None):
     """Create index template in OpenSearch"""
     
     template_name = f"{settings.opensearch_index_prefix}-template"
-    template = get_index_template()
+    template = get_index_template(profile)
     
     try:
         client.indices.put_index_template(
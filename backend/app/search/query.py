@@ -0,0 +1,401 @@
+"""Log query language, compiled to non-scoring filter clauses
+
+    level:ERROR AND service:api
+    message:"database timeout" AND timestamp:[now-1h TO now]
+    status:>=500 NOT path:/health*
+    (level:ERROR OR level:WARN) -source_file:/var/log/noisy.log
+    connection refused
+
+``field:value`` is an exact match on the field's keyword form, ``field:*``
+checks the field exists. Values can be quoted phrases, wildcards
+(``*``/``?``), ranges (``[a TO b]``, ``{a TO b}``, ``*`` for open ends) or
+comparisons (``>=500``). Terms combine with AND, OR, NOT/``-`` and
+parentheses; adjacent terms are ANDed. Bare words are full-text searched as
+before (any of the adjacent words), and only ``message``/``raw_line`` values
+are matched as text. Everything compiles to filter context: results are
+sorted by time, so nothing needs a score, and OpenSearch can cache the
+clauses.
+"""
+
+import re
+import fnmatch
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.search.mappings import keyword_field, promoted_fields, search_fields
+
+# Full-text fields (and their aliases)
+TEXT_FIELDS = {"raw_line": "raw_line", "message": "raw_line", "msg": "raw_line"}
+FIELD_ALIASES = {"source": "source_file", "file": "source_file", "template": "template_id"}
+KEYWORD_FIELDS = {"event_id", "ingest_id", "template_id", "template_params"}
+NUMERIC_FIELDS = {"line_number", "sample_weight"}
+
+TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<lparen>\() |
+        (?P<rparen>\)) |
+        (?P<minus>(?<![^\s(])-(?=[^\s-])) |
+        (?P<field>[A-Za-z_@][\w.@-]*):(?=\S) |
+        (?P<phrase>"(?:[^"\\]|\\.)*") |
+        (?P<range>[\[{][^\]}]*[\]}]) |
+        (?P<word>[^\s()"]+)
+    )''', re.VERBOSE)
+RANGE = re.compile(r'^([\[{])\s*(\S+)\s+TO\s+(\S+)\s*([\]}])$')
+COMPARISON = re.compile(r'^(>=|<=|>|<)(.+)$')
+NUMBER = re.compile(r'^-?\d+(\.\d+)?$')
+OPERATORS = {"AND", "OR", "NOT"}
+
+
+class QuerySyntaxError(ValueError):
+    """Query string that can't be parsed"""
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise QuerySyntaxError(f"Unexpected character at position {pos}: {text[pos]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "word" and value in OPERATORS:
+            kind = value
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent: or := and (OR and)*, and := unary (AND? unary)*, unary := (NOT|-)* primary"""
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise QuerySyntaxError("Unexpected end of query")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> Tuple:
+        node = self.parse_or()
+        if self.pos < len(self.tokens):
+            raise QuerySyntaxError(f"Unexpected {self.tokens[self.pos][1]!r}")
+        return node
+
+    def parse_or(self) -> Tuple:
+        nodes = [self.parse_and()]
+        while self.peek() == "OR":
+            self.take()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and(self) -> Tuple:
+        nodes = [self.parse_unary()]
+        while self.peek() not in (None, "OR", "rparen"):
+            explicit = self.peek() == "AND"
+            if explicit:
+                self.take()
+            node = self.parse_unary()
+            # Adjacent bare words stay one full-text clause, as plain searches always were
+            if not explicit and node[0] == "text" and nodes[-1][0] == "text" and not (node[2] or nodes[-1][2]):
+                nodes[-1] = ("text", nodes[-1][1] + " " + node[1], False)
+            else:
+                nodes.append(node)
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_unary(self) -> Tuple:
+        if self.peek() in ("NOT", "minus"):
+            self.take()
+            return ("not", self.parse_unary())
+        return self.parse_primary()
+
+    def parse_primary(self) -> Tuple:
+        kind, value = self.take()
+        if kind == "lparen":
+            node = self.parse_or()
+            if self.peek() != "rparen":
+                raise QuerySyntaxError("Missing closing parenthesis")
+            self.take()
+            return node
+        if kind == "field":
+            return self.parse_value(value)
+        if kind == "phrase":
+            return ("text", _unquote(value), True)
+        if kind in ("word", "AND", "OR", "NOT"):
+            return ("wildcard", "raw_line", value) if _is_wildcard(value) else ("text", value, False)
+        raise QuerySyntaxError(f"Unexpected {value!r}")
+
+    def parse_value(self, field: str) -> Tuple:
+        if self.peek() in (None, "rparen", "minus"):
+            raise QuerySyntaxError(f"Missing value for {field}")
+        kind, value = self.take()
+        if kind == "phrase":
+            return ("phrase", field, _unquote(value))
+        if kind == "range":
+            match = RANGE.match(value)
+            if not match:
+                raise QuerySyntaxError(f"Invalid range: {value}")
+            low_op = "gte" if match.group(1) == "[" else "gt"
+            high_op = "lte" if match.group(4) == "]" else "lt"
+            bounds = {}
+            if match.group(2) != "*":
+                bounds[low_op] = match.group(2)
+            if match.group(3) != "*":
+                bounds[high_op] = match.group(3)
+            return ("range", field, bounds)
+        if kind == "lparen":
+            raise QuerySyntaxError(f"Grouped values are not supported for {field}; use OR between terms")
+        if value == "*":
+            return ("exists", field, None)
+        comparison = COMPARISON.match(value)
+        if comparison:
+            op = {">=": "gte", "<=": "lte", ">": "gt", "<": "lt"}[comparison.group(1)]
+            return ("range", field, {op: comparison.group(2)})
+        if _is_wildcard(value):
+            return ("wildcard", field, value)
+        return ("term", field, value)
+
+
+def _unquote(value: str) -> str:
+    return re.sub(r'\\(.)', r'\1', value[1:-1])
+
+
+def _is_wildcard(value: str) -> bool:
+    return "*" in value or "?" in value
+
+
+def parse_query(text: str) -> Optional[Tuple]:
+    """Syntax tree of a query string (None for an empty query)"""
+    if not text or not text.strip():
+        return None
+    return _Parser(text).parse()
+
+
+# ----------------------------------------------------------------------------
+# Compilation
+# ----------------------------------------------------------------------------
+
+def _value(value: str) -> Any:
+    """Numbers and booleans as JSON values, so numeric mappings compare correctly"""
+    if NUMBER.match(value):
+        return float(value) if "." in value else int(value)
+    if value in ("true", "false"):
+        return value == "true"
+    return value
+
+
+def _dynamic_fields(name: str, typed: bool) -> List[str]:
+    """Concrete fields for a parsed ``fields`` key
+
+    Under the standard profile strings are matched on the ``.keyword``
+    subfield and numbers/booleans also on the dynamically mapped field;
+    under the lean profile promoted keys are typed top-level fields and the
+    rest live in the ``fields`` flat_object.
+    """
+    if settings.index_profile == "lean":
+        return [name] if name in promoted_fields() else [f"fields.{name}"]
+    if name.startswith("fields."):
+        name = name[len("fields."):]
+    return [f"fields.{name}.keyword", f"fields.{name}"] if typed else [f"fields.{name}.keyword"]
+
+
+def _any_of(clauses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return clauses[0] if len(clauses) == 1 else {"bool": {"should": clauses, "minimum_should_match": 1}}
+
+
+def _field_clause(kind: str, field: str, value: Any) -> Dict[str, Any]:
+    field = FIELD_ALIASES.get(field, field)
+
+    if field in TEXT_FIELDS:
+        field = TEXT_FIELDS[field]
+        if kind == "term":
+            return {"match": {field: {"query": value, "operator": "and"}}}
+        if kind == "phrase":
+            if settings.index_profile == "lean":
+                # raw_line is indexed without positions under the lean profile
+                return {"match": {field: {"query": value, "operator": "and"}}}
+            return {"match_phrase": {field: value}}
+        if kind == "wildcard":
+            return {"wildcard": {field: {"value": value.lower(), "case_insensitive": True}}}
+        if kind == "exists":
+            return {"exists": {"field": field}}
+        raise QuerySyntaxError(f"Ranges are not supported on {field}")
+
+    if field == "timestamp":
+        if kind == "range":
+            return {"range": {"timestamp": value}}
+        if kind in ("term", "phrase"):
+            return {"range": {"timestamp": {"gte": value, "lte": value}}}
+
+    if field in NUMERIC_FIELDS or field == "timestamp":
+        targets = [field]
+    elif field == "source_file" or field == "tokens":
+        targets = [keyword_field(field)]
+    elif field in KEYWORD_FIELDS:
+        targets = [field]
+    else:
+        typed = kind == "range" and all(NUMBER.match(str(v)) for v in value.values())
+        typed = typed or (kind == "term" and not isinstance(_value(value), str))
+        targets = _dynamic_fields(field, typed)
+        if kind == "range" and typed and len(targets) > 1:
+            # Numeric bounds compare as numbers on the typed field, not as strings
+            targets = targets[1:]
+
+    if kind == "exists":
+        return {"exists": {"field": targets[-1].removesuffix(".keyword")}}
+    if kind == "range":
+        return _any_of([{"range": {target: value}} for target in targets])
+    if kind == "wildcard":
+        return _any_of([{"wildcard": {target: {"value": value}}} for target in targets])
+    return _any_of([
+        {"term": {target: value if target.endswith(".keyword") else _value(value)}}
+        for target in targets
+    ])
+
+
+def _compile(node: Tuple) -> Dict[str, Any]:
+    kind = node[0]
+    if kind == "and":
+        filters, must_not = [], []
+        for child in node[1]:
+            if child[0] == "not":
+                must_not.append(_compile(child[1]))
+            else:
+                filters.append(_compile(child))
+        clause: Dict[str, Any] = {}
+        if filters:
+            clause["filter"] = filters
+        if must_not:
+            clause["must_not"] = must_not
+        return {"bool": clause}
+    if kind == "or":
+        return {"bool": {"should": [_compile(child) for child in node[1]], "minimum_should_match": 1}}
+    if kind == "not":
+        return {"bool": {"must_not": [_compile(node[1])]}}
+    if kind == "text":
+        # Full-text fallback for bare words and phrases
+        spec = {"query": node[1], "fields": search_fields()}
+        if node[2]:
+            if settings.index_profile == "lean":
+                # raw_line is indexed without positions under the lean profile
+                spec["operator"] = "and"
+            else:
+                spec["type"] = "phrase"
+        return {"multi_match": spec}
+    return _field_clause(kind, node[1], node[2])
+
+
+def compile_query(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Filter-context clause for a query string (None for an empty query)
+
+    Raises QuerySyntaxError (a ValueError) for malformed queries.
+    """
+    tree = parse_query(text) if text else None
+    return _compile(tree) if tree is not None else None
+
+
+# ----------------------------------------------------------------------------
+# In-memory evaluation (live tail)
+# ----------------------------------------------------------------------------
+
+def _doc_values(doc: Dict[str, Any], field: str) -> List[Any]:
+    field = FIELD_ALIASES.get(field, field)
+    field = TEXT_FIELDS.get(field, field)
+    if field.startswith("fields."):
+        value = (doc.get("fields") or {}).get(field[len("fields."):])
+    elif field in doc:
+        value = doc[field]
+    else:
+        value = (doc.get("fields") or {}).get(field)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _words(value: Any) -> List[str]:
+    return re.findall(r'\w+', str(value).lower())
+
+
+def _compare(value: Any, bound: str, field: str) -> Optional[float]:
+    """Sign of value - bound, or None if they can't be compared"""
+    if field == "timestamp":
+        try:
+            left, right = datetime.fromisoformat(str(value)), datetime.fromisoformat(bound)
+        except ValueError:
+            return None
+        if (left.tzinfo is None) != (right.tzinfo is None):
+            left, right = left.replace(tzinfo=None), right.replace(tzinfo=None)
+    elif NUMBER.match(bound) and NUMBER.match(str(value)):
+        left, right = float(value), float(bound)
+    else:
+        left, right = str(value), bound
+    return (left > right) - (left < right)
+
+
+RANGE_CHECKS = {"gte": lambda c: c >= 0, "gt": lambda c: c > 0, "lte": lambda c: c <= 0, "lt": lambda c: c < 0}
+
+
+def _matches(node: Tuple, doc: Dict[str, Any]) -> bool:
+    kind = node[0]
+    if kind == "and":
+        return all(_matches(child, doc) for child in node[1])
+    if kind == "or":
+        return any(_matches(child, doc) for child in node[1])
+    if kind == "not":
+        return not _matches(node[1], doc)
+    if kind == "text":
+        text = " ".join(
+            [str(doc.get("raw_line", ""))] + [str(v) for v in (doc.get("fields") or {}).values()]
+        ).lower()
+        if node[2]:
+            return " ".join(_words(node[1])) in " ".join(_words(text))
+        return bool(set(_words(node[1])) & set(_words(text)))
+
+    field, value = node[1], node[2]
+    values = _doc_values(doc, field)
+    is_text = TEXT_FIELDS.get(field, field) == "raw_line"
+    if kind == "exists":
+        return bool(values)
+    if kind == "wildcard":
+        if is_text:
+            return any(fnmatch.fnmatchcase(word, value.lower()) for v in values for word in _words(v))
+        return any(fnmatch.fnmatchcase(str(v), value) for v in values)
+    if kind == "range":
+        for v in values:
+            checks = [(_compare(v, bound, field), RANGE_CHECKS[op]) for op, bound in value.items()]
+            if any(c is None for c, _ in checks):
+                # Date math and other bounds that need the cluster don't narrow a live feed
+                if field == "timestamp":
+                    return True
+                continue
+            if all(check(c) for c, check in checks):
+                return True
+        return False
+    if is_text:
+        wanted = _words(value)
+        if kind == "phrase":
+            return any(" ".join(wanted) in " ".join(_words(v)) for v in values)
+        return any(set(wanted) <= set(_words(v)) for v in values)
+    if field == "timestamp":
+        return any(_compare(v, value, field) == 0 for v in values)
+    return any(str(v) == value or (isinstance(v, bool) and str(v).lower() == value) for v in values)
+
+
+def compile_matcher(text: Optional[str]) -> Callable[[Dict[str, Any]], bool]:
+    """Predicate evaluating a query string against a single document
+
+    Mirrors compile_query for events that haven't been searched (live
+    tail). Raises QuerySyntaxError for malformed queries.
+    """
+    tree = parse_query(text) if text else None
+    if tree is None:
+        return lambda doc: True
+    return lambda doc: _matches(tree, doc)
@@ -0,0 +1,183 @@
+"""Per-minute rollup index: mapping and dashboard reads"""
+
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from opensearchpy import AsyncOpenSearch
+from opensearchpy.exceptions import NotFoundError
+
+from app.config import settings
+from app.metrics import OPENSEARCH_QUERY_SECONDS
+from app.search.client import _label_templates
+
+logger = logging.getLogger(__name__)
+
+# Rolled-up dimensions; "all" carries the per-minute, per-source totals
+ROLLUP_DIMENSIONS = ("all", "level", "status", "template", "service")
+
+# Marker documents: when a RollupAccumulator started counting (ingest time)
+COVERAGE_DIMENSION = "coverage_start"
+
+# Rollup index -> (coverage start or None, monotonic time it was looked up)
+_coverage_start: Dict[str, Tuple[Optional[datetime], float]] = {}
+
+
+def rollup_index() -> str:
+    """Rollup index name (deliberately outside the ``<prefix>-*`` pattern)"""
+    return f"rollups-{settings.opensearch_index_prefix}"
+
+
+def get_rollup_template() -> Dict[str, Any]:
+    """Index template for rollup documents"""
+    return {
+        "index_patterns": [rollup_index()],
+        "template": {
+            "settings": {
+                "number_of_shards": 1,
+                "number_of_replicas": 0,
+                "refresh_interval": "5s",
+                "codec": "best_compression"
+            },
+            "mappings": {
+                "dynamic": False,
+                "properties": {
+                    "timestamp": {"type": "date", "format": "strict_date_optional_time||epoch_millis"},
+                    "source_file": {"type": "keyword"},
+                    "dimension": {"type": "keyword"},
+                    "value": {"type": "keyword", "ignore_above": 256},
+                    "count": {"type": "long"},
+                    "estimated_count": {"type": "long"}
+                }
+            }
+        }
+    }
+
+
+def create_rollup_template(client):
+    """Create the rollup index template in OpenSearch"""
+    client.indices.put_index_template(name=f"{rollup_index()}-template", body=get_rollup_template())
+    logger.info(f"Created rollup template for {rollup_index()}")
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+async def rollups_cover(client: AsyncOpenSearch, start_time: datetime) -> bool:
+    """Whether rollups were being written at start_time (and so hold the whole range)
+
+    Coverage starts at the earliest ``coverage_start`` marker, the moment an
+    ingestion worker began rolling up. Events timestamped after it can only
+    have been ingested with rollups on; earlier ranges may be only partly
+    rolled up (say, a file backfilled since) and are aggregated from raw
+    events. Looked up again every ``rollup_coverage_refresh_seconds``.
+    """
+    index = rollup_index()
+    cached = _coverage_start.get(index)
+    if cached is None or time.monotonic() - cached[1] >= settings.rollup_coverage_refresh_seconds:
+        try:
+            response = await client.search(index=index, body={
+                "size": 1,
+                "query": {"term": {"dimension": COVERAGE_DIMENSION}},
+                "sort": [{"timestamp": "asc"}],
+                "_source": ["timestamp"]
+            })
+            hits = response['hits']['hits']
+        except NotFoundError:
+            hits = []
+        start = _utc(datetime.fromisoformat(hits[0]['_source']['timestamp'].replace('Z', '+00:00'))) if hits else None
+        cached = _coverage_start[index] = (start, time.monotonic())
+    return cached[0] is not None and cached[0] <= _utc(start_time)
+
+
+def _dimension(name: str, aggs: Dict[str, Any]) -> Dict[str, Any]:
+    return {"filter": {"term": {"dimension": name}}, "aggs": aggs}
+
+
+def _top_values(field: str, size: int) -> Dict[str, Any]:
+    return {
+        "terms": {"field": field, "size": size, "order": {"events": "desc"}},
+        "aggs": {"events": {"sum": {"field": "count"}}}
+    }
+
+
+async def aggregate_rollups(client: AsyncOpenSearch, start_time: datetime, end_time: datetime, interval: str = "1h") -> Dict:
+    """Dashboard aggregations from rollup documents (same shape as aggregate_logs)
+
+    Tokens are not rolled up, so ``top_tokens`` is empty.
+    """
+    body = {
+        "query": {"range": {"timestamp": {"gte": start_time.isoformat(), "lte": end_time.isoformat()}}},
+        "size": 0,
+        "aggs": {
+            "totals": _dimension("all", {
+                "time_series": {
+                    "date_histogram": {"field": "timestamp", "fixed_interval": interval},
+                    "aggs": {
+                        "events": {"sum": {"field": "count"}},
+                        "estimated": {"sum": {"field": "estimated_count"}}
+                    }
+                },
+                "sources": _top_values("source_file", 20)
+            }),
+            "templates": _dimension("template", {"top_templates": _top_values("value", 10)})
+        }
+    }
+
+    try:
+        with OPENSEARCH_QUERY_SECONDS.labels("aggregate_rollups").time():
+            response = await client.search(index=rollup_index(), body=body)
+    except Exception as e:
+        logger.error(f"Rollup aggregation error: {e}")
+        raise
+
+    totals = response['aggregations']['totals']
+    templates = response['aggregations']['templates']['top_templates']['buckets']
+    return {
+        "time_series": [
+            {"timestamp": b['key_as_string'], "count": int(b['events']['value']), "estimated_count": int(b['estimated']['value'])}
+            for b in totals['time_series']['buckets']
+        ],
+        "top_tokens": [],
+        "top_templates": _label_templates([{"key": b['key'], "doc_count": int(b['events']['value'])} for b in templates]),
+        "sources": [{"source": b['key'], "count": int(b['events']['value'])} for b in totals['sources']['buckets']]
+    }
+
+
+async def level_timeline(
+    client: AsyncOpenSearch,
+    start_time: datetime,
+    end_time: datetime,
+    bucket_minutes: int = 5
+) -> List[Dict[str, Any]]:
+    """Per-bucket total and per-level event counts over the whole range, from rollups"""
+    histogram = {"field": "timestamp", "fixed_interval": f"{bucket_minutes}m"}
+    body = {
+        "query": {"range": {"timestamp": {"gte": start_time.isoformat(), "lte": end_time.isoformat()}}},
+        "size": 0,
+        "aggs": {
+            "totals": _dimension("all", {
+                "timeline": {"date_histogram": histogram, "aggs": {"events": {"sum": {"field": "count"}}}}
+            }),
+            "levels": _dimension("level", {
+                "timeline": {"date_histogram": histogram, "aggs": {"level": _top_values("value", 20)}}
+            })
+        }
+    }
+    with OPENSEARCH_QUERY_SECONDS.labels("rollup_timeline").time():
+        response = await client.search(index=rollup_index(), body=body)
+
+    levels = {
+        bucket['key']: {b['key']: int(b['events']['value']) for b in bucket['level']['buckets']}
+        for bucket in response['aggregations']['levels']['timeline']['buckets']
+    }
+    return [
+        {
+            "time": datetime.fromtimestamp(bucket['key'] / 1000, timezone.utc),
+            "total": int(bucket['events']['value']),
+            "levels": levels.get(bucket['key'], {})
+        }
+        for bucket in response['aggregations']['totals']['timeline']['buckets']
+    ]
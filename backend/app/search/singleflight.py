@@ -0,0 +1,59 @@
+"""Coalescing of identical concurrent searches"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+from app.metrics import SEARCH_COALESCED
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers with the same key
+
+    The first caller starts the call as a task; callers arriving while it
+    runs await the same task and get the same result (or exception). The
+    key is forgotten as soon as the call finishes, so nothing is served
+    stale. Callers are shielded from each other: one disconnecting client
+    doesn't cancel the search the others are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, kind: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            SEARCH_COALESCED.labels(kind).inc()
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception so a call nobody awaits anymore isn't logged as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Shared coalescer for API searches, or None when coalescing is disabled"""
+    global _flight
+    if not settings.search_coalescing_enabled:
+        return None
+    if _flight is None:
+        _flight = SingleFlight()
+    return _flight
@@ -0,0 +1,98 @@
+"""Cluster stats and health, collected in the background and served from memory"""
+
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from opensearchpy import AsyncOpenSearch
+
+from app.config import settings
+from app.metrics import OPENSEARCH_QUERY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class StatsCollector:
+    """Periodic snapshot of index sizes, doc counts, ingest rate and cluster health
+
+    Sizes come from ``_cat/indices`` in bytes, and the ingest rate is the
+    change in total doc count between two collections. ``run`` refreshes
+    the snapshot every ``stats_refresh_seconds``. ``snapshot`` also
+    collects inline when nothing has refreshed it for twice that long, so
+    reads stay cheap while the background task runs.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._collected_at: Optional[float] = None
+        self._previous: Optional[tuple] = None  # (monotonic time, total docs)
+        self._lock = asyncio.Lock()
+
+    async def collect(self, client: AsyncOpenSearch) -> Dict[str, Any]:
+        index_name = f"{settings.opensearch_index_prefix}-*"
+        try:
+            with OPENSEARCH_QUERY_SECONDS.labels("stats").time():
+                rows = await client.cat.indices(
+                    index=index_name, format="json", bytes="b", h="index,docs.count,store.size"
+                )
+                health = await client.cluster.health()
+        except Exception as e:
+            logger.warning(f"Stats collection failed: {e}")
+            self._snapshot = {**(self._snapshot or {}), "error": str(e)}
+            self._collected_at = time.monotonic()
+            return self._snapshot
+
+        per_index = sorted(
+            (
+                {"index": row["index"], "docs": int(row.get("docs.count") or 0), "size_bytes": int(row.get("store.size") or 0)}
+                for row in rows
+            ),
+            key=lambda idx: idx["index"]
+        )
+        total = sum(idx["docs"] for idx in per_index)
+
+        now = time.monotonic()
+        rate = None
+        if self._previous is not None and now > self._previous[0]:
+            rate = round(max(total - self._previous[1], 0) / (now - self._previous[0]), 2)
+        self._previous = (now, total)
+
+        self._snapshot = {
+            "total_events": total,
+            "indices": len(per_index),
+            "index_size": sum(idx["size_bytes"] for idx in per_index),
+            "per_index": per_index,
+            "ingest_rate_per_second": rate,
+            "opensearch": health["status"],
+            "collected_at": datetime.now(timezone.utc).isoformat()
+        }
+        self._collected_at = now
+        return self._snapshot
+
+    async def snapshot(self, client: AsyncOpenSearch) -> Dict[str, Any]:
+        """Latest snapshot, collecting inline only if the background task isn't keeping it current"""
+        limit = 2 * settings.stats_refresh_seconds
+        if self._collected_at is None or time.monotonic() - self._collected_at >= limit:
+            async with self._lock:
+                if self._collected_at is None or time.monotonic() - self._collected_at >= limit:
+                    await self.collect(client)
+        return self._snapshot
+
+    async def run(self, client: AsyncOpenSearch):
+        """Background refresh loop"""
+        while True:
+            await self.collect(client)
+            await asyncio.sleep(settings.stats_refresh_seconds)
+
+
+_collector: Optional[StatsCollector] = None
+
+
+def get_stats_collector() -> StatsCollector:
+    """Shared stats collector for the API"""
+    global _collector
+    if _collector is None:
+        _collector = StatsCollector()
+    return _collector
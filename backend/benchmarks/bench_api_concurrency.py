@@ -0,0 +1,191 @@
+"""API throughput under mixed slow and fast queries
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_api_concurrency --output api_concurrency.json
+
+Serves the API with uvicorn on a background thread, backed by
+benchmarks.fake_opensearch with extra latency on aggregations, and drives
+it over HTTP with concurrent clients that mostly issue fast log queries
+plus a share of slow aggregations. The same load is
+replayed against a "blocking" app whose async routes call the synchronous
+client directly (how the API used to work), so the effect of a stalled event
+loop on fast-query latency is visible side by side.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from opensearchpy import OpenSearch
+
+from app.config import settings
+from app.search import client as search_client
+from benchmarks.fake_opensearch import FakeOpenSearch
+
+logger = logging.getLogger(__name__)
+
+START = datetime(2025, 10, 20, 14, 0, 0)
+PARAMS = {"start_time": START.isoformat(), "end_time": (START + timedelta(hours=1)).isoformat()}
+
+
+def _seed(client: OpenSearch, docs: int):
+    search_client.bulk_index_logs(client, [
+        {
+            "timestamp": (START + timedelta(seconds=i % 3600)).isoformat(),
+            "source_file": f"/logs/app{i % 4}.log",
+            "line_number": i + 1,
+            "raw_line": f"request {i} {'failed' if i % 10 == 0 else 'ok'}",
+            "tokens": ["request", "failed" if i % 10 == 0 else "ok"],
+            "fields": {"level": "ERROR" if i % 10 == 0 else "INFO"},
+            "ingest_id": "bench"
+        }
+        for i in range(docs)
+    ])
+
+
+def _blocking_app(client: OpenSearch) -> FastAPI:
+    """Async routes calling the synchronous client, as the API used to"""
+    app = FastAPI()
+    index = f"{settings.opensearch_index_prefix}-*"
+    time_range = {"range": {"timestamp": {"gte": PARAMS["start_time"], "lte": PARAMS["end_time"]}}}
+
+    @app.get("/api/logs")
+    async def logs():
+        return client.search(index=index, body={"query": time_range, "sort": [{"timestamp": "desc"}], "size": 100})
+
+    @app.get("/api/logs/aggregations")
+    async def aggregations():
+        return client.search(index=index, body={
+            "query": time_range, "size": 0,
+            "aggs": {"time_series": {"date_histogram": {"field": "timestamp", "fixed_interval": "1m"}}}
+        })
+
+    return app
+
+
+@contextmanager
+def _serve(app):
+    """Run app with uvicorn on its own thread and event loop; yield its base URL"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _drive(base_url: str, concurrency: int, duration: float, slow_share: float, seed: int) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {"fast": [], "slow": []}
+    errors = 0
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as http:
+        async def client_loop():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                kind = "slow" if rng.random() < slow_share else "fast"
+                path = "/api/logs/aggregations" if kind == "slow" else "/api/logs"
+                start = time.perf_counter()
+                response = await http.get(path, params=PARAMS)
+                if response.status_code != 200:
+                    errors += 1
+                latencies[kind].append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "requests": total,
+        "errors": errors,
+        "requests_per_sec": round(total / elapsed, 1),
+        **{
+            kind: {
+                "count": len(values),
+                "p50_ms": round(statistics.median(values) * 1000, 1) if values else None,
+                "p95_ms": round(_percentile(values, 0.95) * 1000, 1),
+                "max_ms": round(max(values) * 1000, 1) if values else None
+            }
+            for kind, values in latencies.items()
+        }
+    }
+
+
+async def _run(args) -> Dict[str, Any]:
+    from app.main import app
+
+    results = {}
+    with FakeOpenSearch(search_latency_ms=args.fast_ms, agg_latency_ms=args.slow_ms) as fake:
+        settings.opensearch_host, settings.opensearch_port, settings.opensearch_scheme = fake.host, fake.port, "http"
+        sync_client = OpenSearch(hosts=[{"host": fake.host, "port": fake.port}], use_ssl=False)
+        _seed(sync_client, args.docs)
+
+        # The API's lifespan creates and closes the pooled async client
+        with _serve(app) as url:
+            results["async"] = await _drive(url, args.concurrency, args.duration, args.slow_share, args.seed)
+
+        with _serve(_blocking_app(sync_client)) as url:
+            results["blocking"] = await _drive(url, args.concurrency, args.duration, args.slow_share, args.seed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API throughput under mixed slow/fast queries")
+    parser.add_argument("--output", "-o", default="bench_api_concurrency.json", help="Where to write JSON results")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--slow-share", type=float, default=0.1, help="Fraction of requests that are aggregations")
+    parser.add_argument("--slow-ms", type=float, default=500.0, help="Extra latency for aggregations")
+    parser.add_argument("--fast-ms", type=float, default=5.0, help="Extra latency for plain searches")
+    parser.add_argument("--docs", type=int, default=200,
+                        help="Documents seeded into the stand-in (kept small so its CPU time doesn't dominate)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = asyncio.run(_run(args))
+    Path(args.output).write_text(json.dumps(results, indent=2))
+
+    print(f"{'mode':<10} {'req/s':>8} {'fast p50':>9} {'fast p95':>9} {'slow p95':>9} {'errors':>7}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<10} {result['requests_per_sec']:>8} {result['fast']['p50_ms']:>9} "
+            f"{result['fast']['p95_ms']:>9} {result['slow']['p95_ms']:>9} {result['errors']:>7}"
+        )
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Ingestion micro-benchmarks
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_ingest --output results.json
+    python -m benchmarks.bench_ingest --output new.json --baseline results.json
+
+Measures per-parser lines/sec, per-stage time in IngestionWorker, peak
+memory and end-to-end docs/sec against an in-memory bulk sink. Results are
+written as JSON; with --baseline the run fails on throughput regressions.
+
+With --target opensearch the worker's real bulk path is used instead, e.g.
+against benchmarks.fake_opensearch with injected latency/rejections.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+
+from app.config import settings
+from app.ingestion.checkpoint import CheckpointManager
+from app.ingestion.worker import IngestionWorker
+from benchmarks.corpora import build_corpora
+
+logger = logging.getLogger(__name__)
+
+
+class BulkSink:
+    """Stand-in for OpenSearch that serializes bulk bodies and discards them"""
+    
+    def __init__(self, passthrough=None):
+        self.docs = 0
+        self.bytes = 0
+        self.passthrough = passthrough
+    
+    def flush(self, batch: List[Dict]):
+        if self.passthrough:
+            self.passthrough(batch)
+            self.docs += len(batch)
+            return
+        lines = []
+        for doc in batch:
+            index_name = f"{settings.opensearch_index_prefix}-{doc['timestamp'][:10]}"
+            lines.append(json.dumps({"index": {"_index": index_name}}))
+            lines.append(json.dumps(doc))
+        body = "\n".join(lines) + "\n"
+        self.docs += len(batch)
+        self.bytes += len(body)
+
+
+class StageTimer:
+    """Wraps a callable and accumulates the time spent in it"""
+    
+    def __init__(self, func):
+        self.func = func
+        self.seconds = 0.0
+    
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def _make_worker(work_dir: Path) -> IngestionWorker:
+    worker = IngestionWorker()
+    worker.checkpoint_manager = CheckpointManager(str(work_dir / "bench_checkpoints.db"))
+    return worker
+
+
+def _read_lines(path: Path) -> List[str]:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def bench_parsers(corpora: Dict[str, Path], work_dir: Path) -> Dict[str, Any]:
+    """Lines/sec for each parser on the lines it wins in the cascade"""
+    
+    worker = _make_worker(work_dir)
+    claimed: Dict[str, List[str]] = {p.__class__.__name__: [] for p in worker.parsers}
+    cascade_lines = []
+    
+    for path in corpora.values():
+        for line in _read_lines(path):
+            cascade_lines.append(line)
+            for parser in worker.parsers:
+                if parser.can_parse(line):
+                    claimed[parser.__class__.__name__].append(line)
+                    break
+    
+    results = {}
+    for parser in worker.parsers:
+        name = parser.__class__.__name__
+        lines = claimed[name]
+        start = time.perf_counter()
+        for line in lines:
+            parser.parse(line)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "lines": len(lines),
+            "seconds": round(elapsed, 6),
+            "lines_per_sec": round(len(lines) / elapsed, 1) if elapsed > 0 else None
+        }
+    
+    # Full cascade including can_parse() misses
+    start = time.perf_counter()
+    for line in cascade_lines:
+        worker._parse_line(line)
+    elapsed = time.perf_counter() - start
+    results["cascade"] = {
+        "lines": len(cascade_lines),
+        "seconds": round(elapsed, 6),
+        "lines_per_sec": round(len(cascade_lines) / elapsed, 1) if elapsed > 0 else None
+    }
+    
+    return results
+
+
+async def _ingest(path: Path, work_dir: Path, sink: BulkSink, batch_size: int, target: str) -> Dict[str, StageTimer]:
+    worker = _make_worker(work_dir)
+    worker.batch_size = batch_size
+    if target == "opensearch":
+        sink.passthrough = worker._flush_batch
+    
+    stages = {
+        "parse": StageTimer(worker._build_doc),
+        "bulk": StageTimer(sink.flush),
+        "checkpoint": StageTimer(worker.checkpoint_manager.set_checkpoint),
+    }
+    worker._build_doc = stages["parse"]
+    worker._flush_batch = stages["bulk"]
+    worker.checkpoint_manager.set_checkpoint = stages["checkpoint"]
+    
+    await worker.ingest_file(str(path), incremental=False)
+    return stages
+
+
+def bench_pipeline(corpora: Dict[str, Path], work_dir: Path, batch_size: int, target: str = "sink") -> Dict[str, Any]:
+    """End-to-end docs/sec, per-stage time and peak memory per corpus"""
+    
+    results = {}
+    for name, path in corpora.items():
+        sink = BulkSink()
+        start = time.perf_counter()
+        stages = asyncio.run(_ingest(path, work_dir, sink, batch_size, target))
+        elapsed = time.perf_counter() - start
+        
+        stage_seconds = {stage: round(timer.seconds, 6) for stage, timer in stages.items()}
+        # Whatever is left is reading, multiline assembly and loop overhead
+        stage_seconds["read"] = round(max(0.0, elapsed - sum(t.seconds for t in stages.values())), 6)
+        
+        # Separate pass: tracemalloc slows everything down
+        tracemalloc.start()
+        asyncio.run(_ingest(path, work_dir, BulkSink(), batch_size, target))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        results[name] = {
+            "bytes_in": path.stat().st_size,
+            "docs": sink.docs,
+            "bulk_bytes": sink.bytes,
+            "seconds": round(elapsed, 6),
+            "docs_per_sec": round(sink.docs / elapsed, 1) if elapsed > 0 else None,
+            "mb_per_sec": round(path.stat().st_size / elapsed / 1e6, 3) if elapsed > 0 else None,
+            "stages": stage_seconds,
+            "peak_memory_bytes": peak
+        }
+    
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return human-readable regressions beyond threshold (fractional slowdown)"""
+    
+    regressions = []
+    checks = [("parsers", "lines_per_sec"), ("pipeline", "docs_per_sec")]
+    for section, metric in checks:
+        for name, result in current.get(section, {}).items():
+            old = baseline.get(section, {}).get(name, {}).get(metric)
+            new = result.get(metric)
+            if not old or not new:
+                continue
+            change = (new - old) / old
+            if change < -threshold:
+                regressions.append(f"{section}.{name}.{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion micro-benchmarks")
+    parser.add_argument("--output", "-o", default="bench_ingest.json", help="Where to write JSON results")
+    parser.add_argument("--work-dir", help="Directory for generated corpora (default: temp dir)")
+    parser.add_argument("--lines-per-mix", type=int, default=20000, help="Lines per synthetic text corpus")
+    parser.add_argument("--batch-size", type=int, default=settings.batch_size, help="Worker batch size")
+    parser.add_argument("--target", choices=["sink", "opensearch"], default="sink",
+                        help="Bulk destination: in-memory sink or the configured OpenSearch")
+    parser.add_argument("--baseline", help="Previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before failing")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(args.work_dir or tmp)
+        corpora = build_corpora(work_dir / "corpora", lines_per_mix=args.lines_per_mix)
+        
+        results = {
+            "meta": {
+                "revision": _git_revision(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "started_at": datetime.utcnow().isoformat(),
+                "batch_size": args.batch_size,
+                "target": args.target
+            },
+            "parsers": bench_parsers(corpora, work_dir),
+            "pipeline": bench_pipeline(corpora, work_dir, args.batch_size, args.target)
+        }
+    
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    
+    print(f"{'corpus':<32} {'docs':>8} {'docs/s':>10} {'peak MB':>8}")
+    for name, result in results["pipeline"].items():
+        print(f"{name:<32} {result['docs']:>8} {result['docs_per_sec']:>10} {result['peak_memory_bytes'] / 1e6:>8.1f}")
+    print(f"\nResults written to {args.output}")
+    
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
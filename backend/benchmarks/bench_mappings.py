@@ -0,0 +1,105 @@
+"""Index template profile benchmark (standard vs lean)
+
+Usage (from backend/, against the configured OpenSearch):
+
+    python -m benchmarks.bench_mappings --output mappings.json
+
+Each profile gets its own index prefix (``bench-<profile>``) and template.
+The same corpora are ingested through IngestionWorker, then the indices are
+refreshed and force-merged to one segment so store sizes are comparable.
+Needs a real cluster: the in-memory stand-in doesn't model on-disk size.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any
+
+from app.config import settings
+from app.ingestion.checkpoint import CheckpointManager
+from app.ingestion.worker import IngestionWorker
+from app.search.client import get_opensearch_client
+from app.search.mappings import INDEX_PROFILES, create_index_template
+from benchmarks.corpora import build_corpora
+
+logger = logging.getLogger(__name__)
+
+
+def _delete_indices(client, prefix: str):
+    client.indices.delete(index=f"{prefix}-*", ignore_unavailable=True)
+    client.indices.delete_index_template(name=f"{prefix}-template", ignore=[404])
+
+
+def bench_profile(profile: str, corpora: Dict[str, Path], work_dir: Path, keep: bool = False) -> Dict[str, Any]:
+    """Ingest all corpora under one profile and report rate and index size"""
+
+    client = get_opensearch_client()
+    original = (settings.index_profile, settings.opensearch_index_prefix, settings.template_db)
+    prefix = f"bench-{profile}"
+
+    settings.index_profile = profile
+    settings.opensearch_index_prefix = prefix
+    settings.template_db = str(work_dir / f"templates-{profile}.db")
+    try:
+        _delete_indices(client, prefix)
+        create_index_template(client, profile)
+
+        worker = IngestionWorker()
+        worker.checkpoint_manager = CheckpointManager(str(work_dir / f"checkpoints-{profile}.db"))
+
+        start = time.perf_counter()
+        for path in corpora.values():
+            asyncio.run(worker.ingest_file(str(path), incremental=False))
+        elapsed = time.perf_counter() - start
+
+        client.indices.refresh(index=f"{prefix}-*")
+        client.indices.forcemerge(index=f"{prefix}-*", max_num_segments=1, request_timeout=600)
+        stats = client.indices.stats(index=f"{prefix}-*", metric="store,docs")["_all"]["primaries"]
+
+        docs = stats["docs"]["count"]
+        size = stats["store"]["size_in_bytes"]
+        return {
+            "docs": docs,
+            "seconds": round(elapsed, 3),
+            "docs_per_sec": round(docs / elapsed, 1) if elapsed > 0 else None,
+            "store_bytes": size,
+            "bytes_per_doc": round(size / docs, 1) if docs else None
+        }
+    finally:
+        if not keep:
+            _delete_indices(client, prefix)
+        settings.index_profile, settings.opensearch_index_prefix, settings.template_db = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare index template profiles")
+    parser.add_argument("--output", "-o", default="bench_mappings.json", help="Where to write JSON results")
+    parser.add_argument("--lines-per-mix", type=int, default=20000, help="Lines per synthetic text corpus")
+    parser.add_argument("--profiles", nargs="+", choices=INDEX_PROFILES, default=list(INDEX_PROFILES))
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark indices for inspection")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        corpora = build_corpora(work_dir / "corpora", lines_per_mix=args.lines_per_mix)
+        results = {profile: bench_profile(profile, corpora, work_dir, args.keep) for profile in args.profiles}
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+
+    print(f"{'profile':<12} {'docs':>8} {'docs/s':>10} {'store MB':>10} {'bytes/doc':>10}")
+    for profile, result in results.items():
+        print(
+            f"{profile:<12} {result['docs']:>8} {result['docs_per_sec']:>10} "
+            f"{result['store_bytes'] / 1e6:>10.2f} {result['bytes_per_doc']:>10}"
+        )
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Log page payload size and latency: projection and response compression
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_payload --output payload.json
+
+Seeds benchmarks.fake_opensearch with documents built by IngestionWorker
+from the benchmark corpora, then requests one /api/logs page per variant
+through the app in-process. Reports bytes on the wire, server latency
+(including compression) and the transfer time those bytes would take at
+``--mbps``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, List
+
+import httpx
+from opensearchpy import OpenSearch
+
+from app.config import settings
+from app.ingestion.worker import IngestionWorker
+from app.search import client as search_client
+from benchmarks.corpora import build_corpora
+from benchmarks.fake_opensearch import FakeOpenSearch
+
+logger = logging.getLogger(__name__)
+
+START = datetime(2025, 10, 20, 14, 0, 0)
+
+# name -> (fields parameter, Accept-Encoding)
+VARIANTS = {
+    "full_source": ("*", "identity"),
+    "default_projection": (None, "identity"),
+    "default_projection_gzip": (None, "gzip"),
+    "default_projection_br": (None, "br"),
+    "narrow_projection_br": ("raw_line,fields.level", "br"),
+}
+
+
+def _documents(count: int, work_dir: Path) -> List[Dict[str, Any]]:
+    """Realistic documents from the corpora, spread over one hour"""
+    settings.template_db = str(work_dir / "templates.db")
+    worker = IngestionWorker()
+    corpora = build_corpora(work_dir / "corpora", lines_per_mix=count)
+    per_file = count // len(corpora) + 1
+
+    docs = []
+    for path in corpora.values():
+        with open(path) as f:
+            for offset, line in enumerate(islice(f, per_file)):
+                doc = worker._build_doc({'lines': [line.rstrip('\n')], 'line_number': offset + 1, 'offset': offset}, str(path))
+                if doc is not None:
+                    docs.append(doc)
+    for i, doc in enumerate(docs[:count]):
+        doc['timestamp'] = (START + timedelta(seconds=i * 3600 / count)).isoformat()
+    return docs[:count]
+
+
+async def _measure(app, fields, encoding: str, page_size: int, repeat: int) -> Dict[str, Any]:
+    params = {
+        "start_time": START.isoformat(),
+        "end_time": (START + timedelta(hours=1)).isoformat(),
+        "page_size": page_size
+    }
+    if fields:
+        params["fields"] = fields
+
+    latencies, wire_bytes = [], 0
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as http:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await http.get("/api/logs", params=params, headers={"Accept-Encoding": encoding})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+            wire_bytes = response.num_bytes_downloaded
+            assert len(response.json()["logs"]) == page_size
+
+    return {"bytes": wire_bytes, "server_ms": round(statistics.median(latencies) * 1000, 1)}
+
+
+async def _run(args) -> Dict[str, Any]:
+    from app.main import app
+
+    settings.query_cache_enabled = False
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, FakeOpenSearch() as fake:
+        settings.opensearch_host, settings.opensearch_port, settings.opensearch_scheme = fake.host, fake.port, "http"
+        await search_client.close_async_opensearch_client()
+        sync_client = OpenSearch(hosts=[{"host": fake.host, "port": fake.port}], use_ssl=False)
+        search_client.bulk_index_logs(sync_client, _documents(args.docs, Path(tmp)))
+
+        for name, (fields, encoding) in VARIANTS.items():
+            result = await _measure(app, fields, encoding, args.page_size, args.repeat)
+            result["transfer_ms"] = round(result["bytes"] * 8 / (args.mbps * 1e6) * 1000, 1)
+            result["total_ms"] = round(result["server_ms"] + result["transfer_ms"], 1)
+            results[name] = result
+        await search_client.close_async_opensearch_client()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log page payload size with projection and compression")
+    parser.add_argument("--output", "-o", default="bench_payload.json", help="Where to write JSON results")
+    parser.add_argument("--docs", type=int, default=2000, help="Documents seeded into the stand-in")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10, help="Requests per variant (median latency reported)")
+    parser.add_argument("--mbps", type=float, default=50.0, help="Client link speed for the transfer estimate")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = asyncio.run(_run(args))
+    Path(args.output).write_text(json.dumps(results, indent=2))
+
+    baseline = results["full_source"]
+    print(f"{'variant':<26} {'KB':>9} {'vs full':>8} {'server ms':>10} {'xfer ms':>8} {'total ms':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<26} {result['bytes'] / 1024:>9.1f} {result['bytes'] / baseline['bytes']:>8.1%} "
+            f"{result['server_ms']:>10} {result['transfer_ms']:>8} {result['total_ms']:>9}"
+        )
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
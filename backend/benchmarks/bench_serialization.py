@@ -0,0 +1,126 @@
+"""Per-page CPU of building log page responses: validated models vs passthrough
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_serialization --output serialization.json
+
+Seeds benchmarks.fake_opensearch with the same corpus documents as
+bench_payload and requests /api/logs pages through the app in-process,
+once with RESPONSE_VALIDATION (a LogEvent per hit, re-encoded by FastAPI)
+and once on the passthrough path (``_source`` encoded with orjson).
+CPU is measured on the event loop thread, so the stand-in's own work on
+its server threads isn't counted. The response-building step alone is
+also timed on one fetched page.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import httpx
+from fastapi.responses import JSONResponse, ORJSONResponse
+from opensearchpy import OpenSearch
+
+from app.api.models import LogQueryResponse
+from app.config import settings
+from app.search import client as search_client
+from benchmarks.bench_payload import START, _documents
+from benchmarks.fake_opensearch import FakeOpenSearch
+
+logger = logging.getLogger(__name__)
+
+# name -> builds the response body from search_logs results
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], bytes]] = {
+    "validated": lambda results: JSONResponse(LogQueryResponse(**results).model_dump(mode="json")).body,
+    "passthrough": lambda results: ORJSONResponse(results).body,
+}
+
+
+async def _measure_requests(app, validate: bool, page_size: int, repeat: int) -> Dict[str, Any]:
+    settings.response_validation = validate
+    params = {
+        "start_time": START.isoformat(),
+        "end_time": (START + timedelta(hours=1)).isoformat(),
+        "page_size": page_size
+    }
+
+    cpu, wall = [], []
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as http:
+        for _ in range(repeat):
+            cpu_start, wall_start = time.thread_time(), time.perf_counter()
+            response = await http.get("/api/logs", params=params)
+            cpu.append(time.thread_time() - cpu_start)
+            wall.append(time.perf_counter() - wall_start)
+            response.raise_for_status()
+            assert len(response.json()["logs"]) == page_size
+
+    return {
+        "request_cpu_ms": round(statistics.median(cpu) * 1000, 2),
+        "request_ms": round(statistics.median(wall) * 1000, 2)
+    }
+
+
+def _measure_render(render: Callable[[Dict[str, Any]], bytes], results: Dict[str, Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.thread_time()
+        render(results)
+        timings.append(time.thread_time() - start)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+async def _run(args) -> Dict[str, Any]:
+    from app.main import app
+
+    settings.query_cache_enabled = False
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, FakeOpenSearch() as fake:
+        settings.opensearch_host, settings.opensearch_port, settings.opensearch_scheme = fake.host, fake.port, "http"
+        await search_client.close_async_opensearch_client()
+        sync_client = OpenSearch(hosts=[{"host": fake.host, "port": fake.port}], use_ssl=False)
+        search_client.bulk_index_logs(sync_client, _documents(args.docs, Path(tmp)))
+
+        page = await search_client.search_logs(
+            search_client.get_async_opensearch_client(),
+            start_time=START, end_time=START + timedelta(hours=1), page_size=args.page_size
+        )
+        for name, render in RENDERERS.items():
+            results[name] = await _measure_requests(app, name == "validated", args.page_size, args.repeat)
+            results[name]["render_cpu_ms"] = _measure_render(render, page, args.repeat)
+        await search_client.close_async_opensearch_client()
+    settings.response_validation = False
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-page CPU of validated vs passthrough log responses")
+    parser.add_argument("--output", "-o", default="bench_serialization.json", help="Where to write JSON results")
+    parser.add_argument("--docs", type=int, default=2000, help="Documents seeded into the stand-in")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20, help="Measurements per variant (median reported)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = asyncio.run(_run(args))
+    Path(args.output).write_text(json.dumps(results, indent=2))
+
+    baseline = results["validated"]
+    print(f"{'variant':<12} {'request CPU ms':>15} {'request ms':>11} {'render CPU ms':>14} {'vs validated':>13}")
+    for name, result in results.items():
+        print(
+            f"{name:<12} {result['request_cpu_ms']:>15} {result['request_ms']:>11} "
+            f"{result['render_cpu_ms']:>14} {result['request_cpu_ms'] / baseline['request_cpu_ms']:>13.1%}"
+        )
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
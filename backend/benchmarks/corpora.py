@@ -0,0 +1,109 @@
+"""Benchmark corpora
+
+Builds the six realistic scenarios from scripts/generate_realistic_logs.py
+plus synthetic Apache, syslog, CSV and Java stack trace files.
+"""
+
+import contextlib
+import importlib.util
+import io
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+REALISTIC_GENERATOR = REPO_ROOT / "scripts" / "generate_realistic_logs.py"
+
+SCENARIOS = [
+    "generate_scenario_healthy_system",
+    "generate_scenario_database_outage",
+    "generate_scenario_memory_leak",
+    "generate_scenario_ddos_attack",
+    "generate_scenario_payment_failures",
+    "generate_scenario_mixed_errors",
+]
+
+PATHS = ["/api/v1/users/login", "/api/v1/orders/create", "/api/v1/products/search", "/health"]
+HOSTS = ["web-01", "web-02", "db-01"]
+PROCESSES = ["sshd[1023]", "cron[88]", "kernel", "systemd[1]"]
+
+
+def _load_realistic_generator():
+    """Import the realistic log generator script as a module"""
+    spec = importlib.util.spec_from_file_location("generate_realistic_logs", REALISTIC_GENERATOR)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.RealisticLogGenerator
+
+
+def _apache_line(rng: random.Random, ts: datetime) -> str:
+    ip = f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+    status = rng.choice([200, 200, 200, 201, 304, 404, 500])
+    return (
+        f'{ip} - - [{ts.strftime("%d/%b/%Y:%H:%M:%S")} +0000] '
+        f'"{rng.choice(["GET", "POST"])} {rng.choice(PATHS)} HTTP/1.1" {status} {rng.randint(100, 50000)}'
+    )
+
+
+def _syslog_line(rng: random.Random, ts: datetime) -> str:
+    return (
+        f'{ts.strftime("%b %d %H:%M:%S")} {rng.choice(HOSTS)} {rng.choice(PROCESSES)}: '
+        f'session opened for user u{rng.randint(1, 50)} uid={rng.randint(1000, 2000)}'
+    )
+
+
+def _csv_line(rng: random.Random, ts: datetime) -> str:
+    return f'{ts.isoformat()},{rng.choice(["user_login", "user_logout", "purchase"])},user{rng.randint(1, 500)},"{rng.choice(["success", "failure"])}"'
+
+
+def _java_event(rng: random.Random, ts: datetime) -> str:
+    if rng.random() > 0.1:
+        return f"[{ts.strftime('%Y-%m-%d %H:%M:%S')}] INFO: Processed order id={rng.randint(1, 99999)}"
+    frames = "\n".join(
+        f"\tat com.example.service.Handler{i}.handle(Handler{i}.java:{rng.randint(10, 400)})"
+        for i in range(rng.randint(10, 40))
+    )
+    return (
+        f"[{ts.strftime('%Y-%m-%d %H:%M:%S')}] ERROR: Request failed\n"
+        f"java.lang.IllegalStateException: connection reset\n{frames}\n"
+        f"Caused by: java.net.SocketException: Broken pipe\n\t... {rng.randint(5, 30)} more"
+    )
+
+
+MIXES = {
+    "apache": _apache_line,
+    "syslog": _syslog_line,
+    "csv": _csv_line,
+    "java_stacktrace": _java_event,
+}
+
+
+def build_corpora(output_dir: str, lines_per_mix: int = 20000, seed: int = 42) -> Dict[str, Path]:
+    """Write all corpora to output_dir and return {name: path}"""
+    
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    corpora = {}
+    
+    # Realistic JSON scenarios (the generator prints progress; keep it quiet)
+    random.seed(seed)
+    generator_cls = _load_realistic_generator()
+    generator = generator_cls(output / "scenarios", datetime(2025, 10, 20, 12, 0, 0))
+    with contextlib.redirect_stdout(io.StringIO()):
+        for method in SCENARIOS:
+            getattr(generator, method)()
+    for path in sorted((output / "scenarios").glob("*.json")):
+        corpora[path.stem] = path
+    
+    # Plain text mixes
+    rng = random.Random(seed)
+    base = datetime(2025, 10, 20, 12, 0, 0)
+    for name, make_line in MIXES.items():
+        path = output / f"{name}.log"
+        with open(path, "w") as f:
+            for i in range(lines_per_mix):
+                f.write(make_line(rng, base + timedelta(milliseconds=250 * i)) + "\n")
+        corpora[name] = path
+    
+    return corpora
@@ -0,0 +1,912 @@
+"""In-memory OpenSearch stand-in for offline load testing
+
+Implements the subset of the REST API LogWatch uses: ``_bulk``, ``_search``
+(bool/range/term/terms/match/multi_match/match_phrase/wildcard/exists plus
+date_histogram, terms and sum aggregations), ``_count``, ``_cat/indices``,
+``_cluster/health``, index template creation, aliases (including a write
+alias for bulk), point-in-time snapshots and ISM policy storage. Latency
+and failures can
+be injected to exercise backpressure and retry paths.
+
+Run standalone (from backend/):
+
+    python -m benchmarks.fake_opensearch --port 9200 --latency-ms 5 --reject-rate 0.05
+
+then point LogWatch at it with OPENSEARCH_SCHEME=http OPENSEARCH_PORT=9200.
+In tests, use ``FakeOpenSearch().start()`` which binds an ephemeral port.
+"""
+
+import argparse
+import fnmatch
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_CONFIG = {
+    "latency_ms": 0.0,          # added to every request
+    "search_latency_ms": 0.0,   # extra for _search/_count
+    "agg_latency_ms": 0.0,      # extra for searches with aggregations
+    "bulk_latency_ms": 0.0,     # extra for _bulk
+    "slow_rate": 0.0,           # fraction of requests that get slow_ms extra
+    "slow_ms": 0.0,
+    "error_rate": 0.0,          # fraction of requests rejected with error_status
+    "error_status": 429,
+    "reject_rate": 0.0,         # fraction of bulk items rejected with 429
+}
+
+DATE_MATH = re.compile(r'^now(?:([+-])(\d+)([smhdw]))?(?:/([smhdw]))?$')
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+INTERVAL = re.compile(r'^(\d+)(ms|s|m|h|d|w)$')
+
+
+# ----------------------------------------------------------------------------
+# Value helpers
+# ----------------------------------------------------------------------------
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    value = str(value)
+    match = DATE_MATH.match(value)
+    if match:
+        result = datetime.now(timezone.utc)
+        if match.group(1):
+            delta = timedelta(seconds=int(match.group(2)) * UNIT_SECONDS[match.group(3)])
+            result = result + delta if match.group(1) == '+' else result - delta
+        return result
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _field_values(source: Dict[str, Any], field: str) -> List[Any]:
+    """Resolve a (dotted) field, ignoring .keyword multi-field suffixes"""
+    if field.endswith('.keyword'):
+        field = field[:-len('.keyword')]
+    value: Any = source
+    for part in field.split('.'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, dict) and field in value:
+            value = value[field]
+            break
+        else:
+            return []
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _comparable(value: Any, field: str) -> Any:
+    if field == 'timestamp':
+        return _parse_date(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _text_tokens(value: Any) -> List[str]:
+    return re.findall(r'\w+', str(value).lower())
+
+
+def _expand_fields(source: Dict[str, Any], fields: List[str]) -> List[Any]:
+    values = []
+    for field in fields:
+        field = field.split('^')[0]
+        if field.endswith('.*'):
+            prefix = _field_values(source, field[:-2])
+            for obj in prefix:
+                if isinstance(obj, dict):
+                    values.extend(obj.values())
+        else:
+            values.extend(_field_values(source, field))
+    return values
+
+
+# ----------------------------------------------------------------------------
+# Query evaluation
+# ----------------------------------------------------------------------------
+
+def matches(query: Optional[Dict[str, Any]], source: Dict[str, Any]) -> bool:
+    """Evaluate the supported query subset against a document"""
+    if not query:
+        return True
+
+    kind, spec = next(iter(query.items()))
+
+    if kind == 'match_all':
+        return True
+    if kind == 'match_none':
+        return False
+    if kind == 'bool':
+        as_list = lambda v: v if isinstance(v, list) else [v]
+        if not all(matches(q, source) for q in as_list(spec.get('must', [])) + as_list(spec.get('filter', []))):
+            return False
+        if any(matches(q, source) for q in as_list(spec.get('must_not', []))):
+            return False
+        should = as_list(spec.get('should', []))
+        if should:
+            required = spec.get('minimum_should_match', 0 if ('must' in spec or 'filter' in spec) else 1)
+            return sum(1 for q in should if matches(q, source)) >= int(required)
+        return True
+    if kind == 'range':
+        field, bounds = next(iter(spec.items()))
+        for raw in _field_values(source, field):
+            value = _comparable(raw, field)
+            if value is None:
+                continue
+            try:
+                if 'gte' in bounds and not value >= _comparable(bounds['gte'], field):
+                    continue
+                if 'gt' in bounds and not value > _comparable(bounds['gt'], field):
+                    continue
+                if 'lte' in bounds and not value <= _comparable(bounds['lte'], field):
+                    continue
+                if 'lt' in bounds and not value < _comparable(bounds['lt'], field):
+                    continue
+            except TypeError:
+                continue
+            return True
+        return False
+    if kind == 'term':
+        field, value = next(iter(spec.items()))
+        if isinstance(value, dict):
+            value = value.get('value')
+        return any(str(v) == str(value) for v in _field_values(source, field))
+    if kind == 'terms':
+        field, values = next((k, v) for k, v in spec.items() if k != 'boost')
+        wanted = {str(v) for v in values}
+        return any(str(v) in wanted for v in _field_values(source, field))
+    if kind == 'exists':
+        return bool(_field_values(source, spec['field']))
+    if kind == 'wildcard':
+        field, value = next(iter(spec.items()))
+        if isinstance(value, dict):
+            value = value.get('value', value.get('wildcard'))
+        return any(fnmatch.fnmatchcase(str(v), str(value)) for v in _field_values(source, field))
+    if kind == 'prefix':
+        field, value = next(iter(spec.items()))
+        if isinstance(value, dict):
+            value = value.get('value')
+        return any(str(v).startswith(str(value)) for v in _field_values(source, field))
+    if kind in ('match', 'match_phrase'):
+        field, value = next(iter(spec.items()))
+        if isinstance(value, dict):
+            value = value.get('query')
+        return _text_match(kind == 'match_phrase', str(value), _field_values(source, field))
+    if kind == 'multi_match':
+        fields = spec.get('fields', ['*'])
+        phrase = spec.get('type') == 'phrase'
+        return _text_match(phrase, str(spec['query']), _expand_fields(source, fields))
+    if kind in ('query_string', 'simple_query_string'):
+        return _text_match(False, str(spec['query']), [json.dumps(source)])
+
+    raise ValueError(f"Unsupported query type: {kind}")
+
+
+def _text_match(phrase: bool, query: str, values: List[Any]) -> bool:
+    wanted = _text_tokens(query)
+    if not wanted:
+        return False
+    for value in values:
+        tokens = _text_tokens(value)
+        if phrase:
+            n = len(wanted)
+            if any(tokens[i:i + n] == wanted for i in range(len(tokens) - n + 1)):
+                return True
+        elif set(wanted) & set(tokens):
+            return True
+    return False
+
+
+# ----------------------------------------------------------------------------
+# Aggregations
+# ----------------------------------------------------------------------------
+
+def _interval_seconds(spec: Dict[str, Any]) -> float:
+    interval = spec.get('fixed_interval') or spec.get('calendar_interval') or spec.get('interval', '1h')
+    named = {'minute': '1m', 'hour': '1h', 'day': '1d', 'week': '1w'}
+    interval = named.get(interval, interval)
+    match = INTERVAL.match(interval)
+    if not match:
+        raise ValueError(f"Unsupported interval: {interval}")
+    amount, unit = int(match.group(1)), match.group(2)
+    return amount / 1000 if unit == 'ms' else amount * UNIT_SECONDS[unit]
+
+
+def aggregate(aggs: Dict[str, Any], docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute the supported aggregation subset"""
+    results = {}
+    for name, spec in aggs.items():
+        sub_aggs = spec.get('aggs') or spec.get('aggregations')
+
+        if 'date_histogram' in spec:
+            hist = spec['date_histogram']
+            step = _interval_seconds(hist)
+            groups: Dict[int, List[Dict]] = {}
+            for doc in docs:
+                for raw in _field_values(doc, hist['field']):
+                    ts = _parse_date(raw)
+                    if ts is None:
+                        continue
+                    key = int(ts.timestamp() // step * step * 1000)
+                    groups.setdefault(key, []).append(doc)
+            buckets = []
+            if groups:
+                min_doc_count = hist.get('min_doc_count', 0)
+                key, last = min(groups), max(groups)
+                while key <= last:
+                    members = groups.get(key, [])
+                    if len(members) >= min_doc_count:
+                        bucket = {
+                            'key_as_string': datetime.fromtimestamp(key / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                            'key': key,
+                            'doc_count': len(members)
+                        }
+                        if sub_aggs:
+                            bucket.update(aggregate(sub_aggs, members))
+                        buckets.append(bucket)
+                    key += int(step * 1000)
+            results[name] = {'buckets': buckets}
+
+        elif 'terms' in spec:
+            terms = spec['terms']
+            groups = {}
+            for doc in docs:
+                values = _field_values(doc, terms['field'])
+                if not values and 'missing' in terms:
+                    values = [terms['missing']]
+                for value in set(values):
+                    groups.setdefault(value, []).append(doc)
+            size = terms.get('size', 10)
+            order = terms.get('order') or {}
+            metric, direction = next(iter(order.items())) if isinstance(order, dict) and order else ('_count', 'desc')
+            if metric in ('_count', '_key') or not sub_aggs:
+                ordered = sorted(groups.items(), key=lambda kv: (-len(kv[1]), str(kv[0])))
+                if metric == '_key':
+                    ordered.sort(key=lambda kv: str(kv[0]), reverse=direction == 'desc')
+                elif direction == 'asc':
+                    ordered.sort(key=lambda kv: len(kv[1]))
+                ordered = [(key, members, None) for key, members in ordered]
+            else:
+                # Order by a single-value metric sub-aggregation
+                computed = [(key, members, aggregate(sub_aggs, members)) for key, members in groups.items()]
+                sign = -1 if direction == 'desc' else 1
+                ordered = sorted(computed, key=lambda e: (sign * (e[2][metric]['value'] or 0), str(e[0])))
+            buckets = []
+            for key, members, sub in ordered[:size]:
+                bucket = {'key': key, 'doc_count': len(members)}
+                if sub_aggs:
+                    bucket.update(sub if sub is not None else aggregate(sub_aggs, members))
+                buckets.append(bucket)
+            results[name] = {
+                'doc_count_error_upper_bound': 0,
+                'sum_other_doc_count': sum(len(m) for _, m, _ in ordered[size:]),
+                'buckets': buckets
+            }
+
+        elif 'sum' in spec or 'max' in spec or 'min' in spec or 'value_count' in spec:
+            kind = next(k for k in ('sum', 'max', 'min', 'value_count') if k in spec)
+            field = spec[kind]['field']
+            values = []
+            for doc in docs:
+                found = _field_values(doc, field)
+                if not found and 'missing' in spec[kind]:
+                    found = [spec[kind]['missing']]
+                for value in found:
+                    try:
+                        values.append(float(value) if field != 'timestamp' else _parse_date(value).timestamp() * 1000)
+                    except (TypeError, ValueError, AttributeError):
+                        continue
+            if kind == 'sum':
+                results[name] = {'value': sum(values)}
+            elif kind == 'value_count':
+                results[name] = {'value': len(values)}
+            else:
+                results[name] = {'value': (max if kind == 'max' else min)(values) if values else None}
+
+        elif 'filter' in spec:
+            members = [doc for doc in docs if matches(spec['filter'], doc)]
+            results[name] = {'doc_count': len(members)}
+            if sub_aggs:
+                results[name].update(aggregate(sub_aggs, members))
+            if sub_aggs:
+                results[name].update(aggregate(sub_aggs, members))
+
+        else:
+            raise ValueError(f"Unsupported aggregation: {list(spec)}")
+    return results
+
+
+# ----------------------------------------------------------------------------
+# Store
+# ----------------------------------------------------------------------------
+
+class FakeStore:
+    """Thread-safe in-memory index store"""
+
+    def __init__(self):
+        self.indices: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.templates: Dict[str, Any] = {}
+        self.aliases: Dict[str, Dict[str, bool]] = {}  # alias -> {index: is_write_index}
+        self.policies: Dict[str, Dict[str, Any]] = {}
+        self.created: Dict[str, float] = {}
+        self.pits: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = {}
+        self.lock = threading.RLock()
+
+    def create(self, index: str, aliases: Optional[Dict[str, Any]] = None):
+        with self.lock:
+            if index not in self.indices:
+                self.indices[index] = {}
+                self.created[index] = time.time()
+            for alias, spec in (aliases or {}).items():
+                self.aliases.setdefault(alias, {})[index] = bool((spec or {}).get('is_write_index'))
+
+    def write_index(self, name: str) -> str:
+        """Concrete index a write to name goes to (resolves write aliases)"""
+        with self.lock:
+            members = self.aliases.get(name)
+            if not members:
+                return name
+            writers = [index for index, is_write in members.items() if is_write]
+            return writers[0] if writers else next(iter(members))
+
+    def resolve(self, expression: str) -> List[str]:
+        """Resolve a comma-separated index expression (wildcards allowed)"""
+        names = []
+        with self.lock:
+            for part in expression.split(','):
+                part = part.strip()
+                if part in ('_all', '*', ''):
+                    names.extend(self.indices)
+                elif '*' in part or '?' in part:
+                    names.extend(n for n in self.indices if fnmatch.fnmatchcase(n, part))
+                elif part in self.indices:
+                    names.append(part)
+                elif part in self.aliases:
+                    names.extend(self.aliases[part])
+        return sorted(set(names))
+
+    def docs(self, expression: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+        with self.lock:
+            return [
+                (index, doc_id, source)
+                for index in self.resolve(expression)
+                for doc_id, source in self.indices[index].items()
+            ]
+
+    def put(self, index: str, doc_id: Optional[str], source: Dict[str, Any]) -> Tuple[str, str]:
+        with self.lock:
+            index = self.write_index(index)
+            self.create(index)
+            docs = self.indices[index]
+            doc_id = doc_id or uuid.uuid4().hex
+            result = 'updated' if doc_id in docs else 'created'
+            docs[doc_id] = source
+            return doc_id, result
+
+    def update(self, index: str, doc_id: str, action: Dict[str, Any]) -> str:
+        with self.lock:
+            index = self.write_index(index)
+            self.create(index)
+            docs = self.indices[index]
+            if doc_id not in docs:
+                if 'upsert' in action:
+                    docs[doc_id] = dict(action['upsert'])
+                    return 'created'
+                if action.get('doc_as_upsert'):
+                    docs[doc_id] = dict(action['doc'])
+                    return 'created'
+                raise KeyError(doc_id)
+            source = docs[doc_id]
+            if 'doc' in action:
+                source.update(action['doc'])
+            script = action.get('script')
+            if script:
+                # Only the counter increment form is supported:
+                #   ctx._source.<field> += params.<name>
+                params = script.get('params', {})
+                for field, param in re.findall(r'ctx\._source\.(\w+)\s*\+=\s*params\.(\w+)', script.get('source', '')):
+                    source[field] = source.get(field, 0) + params[param]
+            return 'updated'
+
+    def delete(self, index: str, doc_id: str) -> bool:
+        with self.lock:
+            return self.indices.get(index, {}).pop(doc_id, None) is not None
+
+
+# ----------------------------------------------------------------------------
+# Search
+# ----------------------------------------------------------------------------
+
+def _sort_spec(body: Dict[str, Any]) -> List[Tuple[str, bool]]:
+    spec = []
+    for entry in body.get('sort', []):
+        if isinstance(entry, str):
+            spec.append((entry, False))
+        else:
+            field, order = next(iter(entry.items()))
+            if isinstance(order, dict):
+                order = order.get('order', 'asc')
+            spec.append((field, order == 'desc'))
+    return spec
+
+
+def _sort_values(source: Dict[str, Any], doc_id: str, spec: List[Tuple[str, bool]]) -> List[Any]:
+    values = []
+    for field, _ in spec:
+        if field in ('_doc', '_id', '_shard_doc'):
+            values.append(doc_id)
+            continue
+        found = _field_values(source, field)
+        if not found:
+            values.append(None)
+        elif field == 'timestamp':
+            ts = _parse_date(found[0])
+            values.append(int(ts.timestamp() * 1000) if ts else None)
+        else:
+            values.append(found[0])
+    return values
+
+
+class _Descending:
+    """Inverts ordering of a wrapped value"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: '_Descending') -> bool:
+        return other.value < self.value
+
+    def __gt__(self, other: '_Descending') -> bool:
+        return other.value > self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+def _sort_key(values: List[Any], spec: List[Tuple[str, bool]]) -> Tuple:
+    """Key for sorted(); missing values always sort last"""
+    key = []
+    for value, (_, desc) in zip(values, spec):
+        if value is None:
+            key.append((1, 0))
+        else:
+            value = value if isinstance(value, (int, float)) else str(value)
+            key.append((0, _Descending(value) if desc else value))
+    return tuple(key)
+
+
+def _filter_source(source: Dict[str, Any], spec: Any) -> Optional[Dict[str, Any]]:
+    if spec is None or spec is True:
+        return source
+    if spec is False:
+        return None
+    if isinstance(spec, (str, list)):
+        spec = {'includes': [spec] if isinstance(spec, str) else spec}
+    includes, excludes = spec.get('includes', []), spec.get('excludes', [])
+
+    def keep(path: str) -> bool:
+        if any(fnmatch.fnmatchcase(path, p) for p in excludes):
+            return False
+        if not includes:
+            return True
+        return any(fnmatch.fnmatchcase(path, p) or p.startswith(path + '.') for p in includes)
+
+    def walk(obj: Dict[str, Any], prefix: str) -> Dict[str, Any]:
+        result = {}
+        for key, value in obj.items():
+            path = f"{prefix}{key}"
+            if not keep(path):
+                continue
+            if isinstance(value, dict) and not any(fnmatch.fnmatchcase(path, p) for p in includes):
+                value = walk(value, path + '.')
+            result[key] = value
+        return result
+
+    return walk(source, '')
+
+
+def search(store: FakeStore, index: str, body: Dict[str, Any], params: Dict[str, str]) -> Dict[str, Any]:
+    """Execute a _search request body"""
+    start = time.perf_counter()
+    query = body.get('query')
+    pit = body.get('pit')
+    if pit:
+        with store.lock:
+            if pit['id'] not in store.pits:
+                raise KeyError(pit['id'])
+            docs = store.pits[pit['id']]
+    else:
+        docs = store.docs(index)
+    hits = [(i, d, s) for i, d, s in docs if matches(query, s)]
+
+    sort = _sort_spec(body)
+    if sort:
+        keyed = [(_sort_values(s, d, sort), i, d, s) for i, d, s in hits]
+        keyed.sort(key=lambda entry: _sort_key(entry[0], sort))
+        if body.get('search_after') is not None:
+            after = _sort_key(body['search_after'], sort)
+            keyed = [entry for entry in keyed if _sort_key(entry[0], sort) > after]
+        ordered = keyed
+    else:
+        ordered = [([], i, d, s) for i, d, s in hits]
+
+    offset = int(body.get('from', params.get('from', 0)))
+    size = int(body.get('size', params.get('size', 10)))
+    page = ordered[offset:offset + size]
+
+    result_hits = []
+    for values, index_name, doc_id, source in page:
+        hit = {'_index': index_name, '_id': doc_id, '_score': None if sort else 1.0}
+        filtered = _filter_source(source, body.get('_source'))
+        if filtered is not None:
+            hit['_source'] = filtered
+        if sort:
+            hit['sort'] = values
+        result_hits.append(hit)
+
+    hits_section: Dict[str, Any] = {'max_score': None, 'hits': result_hits}
+    track = body.get('track_total_hits', 10000)
+    if track is True:
+        hits_section['total'] = {'value': len(hits), 'relation': 'eq'}
+    elif track is not False:
+        cap = int(track)
+        hits_section['total'] = {'value': min(len(hits), cap), 'relation': 'gte' if len(hits) > cap else 'eq'}
+
+    response = {
+        'timed_out': False,
+        '_shards': {'total': 1, 'successful': 1, 'skipped': 0, 'failed': 0},
+        'hits': hits_section
+    }
+    aggs = body.get('aggs') or body.get('aggregations')
+    if aggs:
+        response['aggregations'] = aggregate(aggs, [s for _, _, s in hits])
+    if pit:
+        response['pit_id'] = pit['id']
+    response['took'] = int((time.perf_counter() - start) * 1000)
+    return response
+
+
+def bulk(store: FakeStore, default_index: Optional[str], payload: str, reject_rate: float) -> Dict[str, Any]:
+    """Execute an NDJSON _bulk body"""
+    start = time.perf_counter()
+    lines = [line for line in payload.split('\n') if line.strip()]
+    items, errors = [], False
+    i = 0
+    while i < len(lines):
+        action = json.loads(lines[i])
+        op, meta = next(iter(action.items()))
+        index = meta.get('_index', default_index)
+        doc_id = meta.get('_id')
+        source = None
+        if op in ('index', 'create', 'update'):
+            i += 1
+            source = json.loads(lines[i])
+        i += 1
+
+        if reject_rate and random.random() < reject_rate:
+            errors = True
+            items.append({op: {
+                '_index': index, '_id': doc_id, 'status': 429,
+                'error': {'type': 'es_rejected_execution_exception', 'reason': 'rejected execution (injected)'}
+            }})
+            continue
+
+        if op in ('index', 'create'):
+            doc_id, result = store.put(index, doc_id, source)
+            items.append({op: {'_index': index, '_id': doc_id, 'result': result, 'status': 201 if result == 'created' else 200}})
+        elif op == 'update':
+            try:
+                result = store.update(index, doc_id, source)
+                items.append({op: {'_index': index, '_id': doc_id, 'result': result, 'status': 200}})
+            except KeyError:
+                errors = True
+                items.append({op: {'_index': index, '_id': doc_id, 'status': 404,
+                                   'error': {'type': 'document_missing_exception', 'reason': 'document missing'}}})
+        elif op == 'delete':
+            found = store.delete(index, doc_id)
+            items.append({op: {'_index': index, '_id': doc_id, 'result': 'deleted' if found else 'not_found',
+                               'status': 200 if found else 404}})
+    return {'took': int((time.perf_counter() - start) * 1000), 'errors': errors, 'items': items}
+
+
+# ----------------------------------------------------------------------------
+# HTTP server
+# ----------------------------------------------------------------------------
+
+class FakeOpenSearchHandler(BaseHTTPRequestHandler):
+    """Routes OpenSearch REST calls to the in-memory store"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def fake(self) -> 'FakeOpenSearch':
+        return self.server.fake
+
+    def _send(self, status: int, payload: Any, content_type: str = 'application/json'):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _error(self, status: int, error_type: str, reason: str):
+        self._send(status, {'error': {'type': error_type, 'reason': reason}, 'status': status})
+
+    def _body(self) -> str:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length).decode('utf-8') if length else ''
+
+    def _inject(self, extra_ms: float) -> bool:
+        """Apply configured latency; return False if the request is failed"""
+        config = self.fake.config
+        delay = config['latency_ms'] + extra_ms
+        if config['slow_rate'] and random.random() < config['slow_rate']:
+            delay += config['slow_ms']
+        if delay:
+            time.sleep(delay / 1000)
+        if config['error_rate'] and random.random() < config['error_rate']:
+            status = int(config['error_status'])
+            self._error(status, 'es_rejected_execution_exception' if status == 429 else 'injected_failure',
+                        'injected failure')
+            return False
+        return True
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+        raw = self._body()
+        store, config = self.fake.store, self.fake.config
+        self.fake.requests += 1
+
+        try:
+            if not parts:
+                self._send(200, {'name': 'fake-opensearch', 'version': {'distribution': 'opensearch', 'number': '2.11.0'}})
+
+            elif parts == ['_stub', 'config']:
+                if self.command in ('POST', 'PUT') and raw:
+                    config.update(json.loads(raw))
+                self._send(200, config)
+
+            elif parts[-1] == '_bulk':
+                if self._inject(config['bulk_latency_ms']):
+                    self._send(200, bulk(store, parts[0] if len(parts) > 1 else None, raw, config['reject_rate']))
+
+            elif parts[-2:] == ['_search', 'point_in_time']:
+                if self.command == 'DELETE':
+                    ids = (json.loads(raw) if raw else {}).get('pit_id', [])
+                    ids = [ids] if isinstance(ids, str) else ids
+                    with store.lock:
+                        found = [pit_id for pit_id in ids if store.pits.pop(pit_id, None) is not None]
+                    self._send(200, {'pits': [{'pit_id': pit_id, 'successful': pit_id in found} for pit_id in ids]})
+                else:
+                    # Snapshot the matching documents; later writes are not visible through the PIT
+                    pit_id = uuid.uuid4().hex
+                    snapshot = [(i, d, dict(src)) for i, d, src in store.docs(parts[0])]
+                    with store.lock:
+                        store.pits[pit_id] = snapshot
+                    self._send(200, {'pit_id': pit_id, '_shards': {'total': 1, 'successful': 1, 'skipped': 0, 'failed': 0},
+                                     'creation_time': int(time.time() * 1000)})
+
+            elif parts[-1] == '_msearch':
+                lines = [json.loads(line) for line in raw.splitlines() if line.strip()]
+                pairs = list(zip(lines[0::2], lines[1::2]))
+                extra = config['search_latency_ms'] + (
+                    config['agg_latency_ms'] if any(b.get('aggs') or b.get('aggregations') for _, b in pairs) else 0
+                )
+                if not self._inject(extra):
+                    return
+                default_index = parts[0] if len(parts) > 1 else '_all'
+                responses = []
+                for header, body in pairs:
+                    index = header.get('index', default_index)
+                    index = ','.join(index) if isinstance(index, list) else index
+                    if '*' not in index and not store.resolve(index):
+                        responses.append({'error': {'type': 'index_not_found_exception', 'reason': f'no such index [{index}]'},
+                                          'status': 404})
+                    else:
+                        responses.append({**search(store, index, body, {}), 'status': 200})
+                self._send(200, {'took': sum(r.get('took', 0) for r in responses), 'responses': responses})
+
+            elif parts[-1] in ('_search', '_count'):
+                body = json.loads(raw) if raw else {}
+                extra = config['search_latency_ms'] + (config['agg_latency_ms'] if body.get('aggs') or body.get('aggregations') else 0)
+                if not self._inject(extra):
+                    return
+                index = parts[0] if len(parts) > 1 else '_all'
+                if len(parts) > 1 and '*' not in index and not store.resolve(index):
+                    self._error(404, 'index_not_found_exception', f'no such index [{index}]')
+                    return
+                if parts[-1] == '_count':
+                    count = sum(1 for _, _, s in store.docs(index) if matches(body.get('query'), s))
+                    self._send(200, {'count': count, '_shards': {'total': 1, 'successful': 1, 'skipped': 0, 'failed': 0}})
+                else:
+                    try:
+                        self._send(200, search(store, index, body, params))
+                    except KeyError:
+                        self._error(404, 'search_context_missing_exception', 'No search context found (PIT expired)')
+
+            elif parts[:2] == ['_cat', 'indices']:
+                if not self._inject(0):
+                    return
+                rows = []
+                for name in store.resolve(parts[2] if len(parts) > 2 else '*'):
+                    with store.lock:
+                        docs = store.indices[name]
+                        size = sum(len(json.dumps(s)) for s in docs.values())
+                    rows.append({
+                        'health': 'green', 'status': 'open', 'index': name,
+                        'docs.count': str(len(docs)), 'docs.deleted': '0',
+                        'store.size': str(size) if params.get('bytes') == 'b' else f"{size / 1024:.1f}kb",
+                        'pri.store.size': str(size) if params.get('bytes') == 'b' else f"{size / 1024:.1f}kb",
+                        'creation.date': str(int(store.created.get(name, 0) * 1000)),
+                    })
+                if params.get('format') == 'json':
+                    self._send(200, rows)
+                else:
+                    text = '\n'.join(' '.join(row.values()) for row in rows) + '\n'
+                    self._send(200, text.encode(), 'text/plain')
+
+            elif parts[:2] == ['_cluster', 'health']:
+                if self._inject(0):
+                    self._send(200, {
+                        'cluster_name': 'fake-opensearch', 'status': 'green', 'timed_out': False,
+                        'number_of_nodes': 1, 'number_of_data_nodes': 1,
+                        'active_primary_shards': len(store.indices), 'active_shards': len(store.indices)
+                    })
+
+            elif parts[0] in ('_index_template', '_template'):
+                if self.command == 'PUT' or self.command == 'POST':
+                    store.templates[parts[1]] = json.loads(raw) if raw else {}
+                    self._send(200, {'acknowledged': True})
+                elif parts[1] in store.templates:
+                    self._send(200, {'index_templates': [{'name': parts[1], 'index_template': store.templates[parts[1]]}]})
+                else:
+                    self._error(404, 'resource_not_found_exception', f'index template [{parts[1]}] missing')
+
+            elif parts[:3] == ['_plugins', '_ism', 'policies'] and len(parts) == 4:
+                policy_id = parts[3]
+                with store.lock:
+                    current = store.policies.get(policy_id)
+                    if self.command == 'PUT':
+                        if current and 'if_seq_no' not in params:
+                            self._error(409, 'version_conflict_engine_exception', f'policy [{policy_id}] exists')
+                            return
+                        seq_no = current['_seq_no'] + 1 if current else 0
+                        store.policies[policy_id] = {'_id': policy_id, '_seq_no': seq_no, '_primary_term': 1,
+                                                     **json.loads(raw)}
+                        self._send(201 if current is None else 200, store.policies[policy_id])
+                    elif current:
+                        self._send(200, current)
+                    else:
+                        self._error(404, 'resource_not_found_exception', f'policy [{policy_id}] not found')
+
+            elif parts[0] == '_alias' and len(parts) == 2:
+                with store.lock:
+                    members = dict(store.aliases.get(parts[1], {}))
+                if members:
+                    self._send(200, {index: {'aliases': {parts[1]: {'is_write_index': w}}} for index, w in members.items()})
+                else:
+                    self._error(404, 'aliases_not_found_exception', f'alias [{parts[1]}] missing')
+
+            elif len(parts) == 1 and self.command == 'PUT':
+                body = json.loads(raw) if raw else {}
+                store.create(parts[0], body.get('aliases'))
+                self._send(200, {'acknowledged': True, 'index': parts[0]})
+
+            elif len(parts) == 1 and self.command == 'DELETE':
+                with store.lock:
+                    for name in store.resolve(parts[0]):
+                        del store.indices[name]
+                        store.created.pop(name, None)
+                        for members in store.aliases.values():
+                            members.pop(name, None)
+                self._send(200, {'acknowledged': True})
+
+            elif len(parts) == 1 and self.command == 'HEAD':
+                self._send(200 if store.resolve(parts[0]) else 404, {})
+
+            else:
+                self._error(400, 'unsupported_operation', f'{self.command} {url.path} is not supported by the stand-in')
+
+        except ValueError as e:
+            self._error(400, 'parsing_exception', str(e))
+
+
+class FakeOpenSearch:
+    """Runs the stand-in on a background thread"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, **config):
+        self.store = FakeStore()
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.requests = 0
+        self.server = ThreadingHTTPServer((host, port), FakeOpenSearchHandler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self.server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> 'FakeOpenSearch':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'FakeOpenSearch':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the in-memory OpenSearch stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    for key, value in DEFAULT_CONFIG.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in DEFAULT_CONFIG}
+    fake = FakeOpenSearch(args.host, args.port, **config)
+    print(f"Fake OpenSearch listening on {fake.url} ({config})")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
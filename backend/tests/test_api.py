@@ -0,0 +1,237 @@
+"""Test API endpoints"""
+
+import asyncio
+import json
+import time
+import pytest
+
+from opensearchpy import OpenSearch
+
+from app.config import settings
+from app.search import cache as query_cache
+from app.search import client as search_client
+from app.search import indices, singleflight, stats
+from benchmarks.fake_opensearch import FakeOpenSearch
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(async_client):
+    """Test Prometheus metrics are exposed"""
+    await async_client.get("/")
+    
+    response = await async_client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert 'logwatch_http_request_seconds_count{method="GET",route="/",status="200"}' in response.text
+
+
+@pytest.fixture
+async def fake_backend(monkeypatch):
+    """Point the API's async client at the in-memory stand-in"""
+    with FakeOpenSearch() as fake:
+        monkeypatch.setattr(settings, 'opensearch_host', fake.host)
+        monkeypatch.setattr(settings, 'opensearch_port', fake.port)
+        monkeypatch.setattr(settings, 'opensearch_scheme', 'http')
+        monkeypatch.setattr(query_cache, '_cache', None)
+        monkeypatch.setattr(indices, '_catalog', None)
+        monkeypatch.setattr(stats, '_collector', None)
+        monkeypatch.setattr(singleflight, '_flight', None)
+        await search_client.close_async_opensearch_client()
+        yield fake
+        await search_client.close_async_opensearch_client()
+
+
+@pytest.mark.asyncio
+async def test_slow_aggregation_does_not_block_other_requests(async_client, fake_backend):
+    """Test a fast query completes while a slow aggregation is in flight"""
+    fake_backend.config['agg_latency_ms'] = 500
+    params = {'start_time': '2025-10-20T14:00:00', 'end_time': '2025-10-20T15:00:00'}
+    # Ranges with no index behind them are answered without searching
+    fake_backend.store.create('logs-2025-10-20')
+    
+    async def timed(path):
+        start = time.perf_counter()
+        response = await async_client.get(path, params=params)
+        return response.status_code, time.perf_counter() - start
+    
+    slow = asyncio.create_task(timed('/api/logs/aggregations'))
+    await asyncio.sleep(0.05)
+    fast_status, fast_seconds = await timed('/api/logs')
+    slow_status, slow_seconds = await slow
+    
+    assert fast_status == slow_status == 200
+    assert fast_seconds < 0.25 < slow_seconds
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_gzip(async_client, fake_backend):
+    """Test the export endpoint streams compressed NDJSON and rejects bad formats"""
+    client = OpenSearch(hosts=[{'host': fake_backend.host, 'port': fake_backend.port}], use_ssl=False)
+    search_client.bulk_index_logs(client, [
+        {'timestamp': f'2025-10-20T14:00:{i:02d}', 'source_file': '/logs/app.log', 'line_number': i + 1,
+         'raw_line': f'line {i}', 'event_id': f'{i:08x}'}
+        for i in range(30)
+    ])
+    params = {'start_time': '2025-10-20T14:00:00', 'end_time': '2025-10-20T15:00:00'}
+    
+    response = await async_client.get('/api/logs/export', params={**params, 'compress': 'true'})
+    
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    lines = response.content.decode().splitlines()  # httpx decodes the gzip stream
+    assert [json.loads(line)['line_number'] for line in lines] == list(range(1, 31))
+    
+    response = await async_client.get('/api/logs/export', params={**params, 'format': 'xml'})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_are_served_from_cache(async_client, fake_backend, monkeypatch):
+    """Test identical live-window queries reach OpenSearch once"""
+    monkeypatch.setattr(settings, 'query_cache_bucket_seconds', 3600)
+    for _ in range(3):
+        assert (await async_client.get('/api/logs')).status_code == 200
+    searches = fake_backend.requests
+    
+    for _ in range(3):
+        assert (await async_client.get('/api/logs', params={'use_cursor': 'true'})).status_code == 200
+    
+    assert query_cache.get_query_cache().stats()['hits'] == 2
+    assert fake_backend.requests > searches
+
+
+@pytest.mark.asyncio
+async def test_malformed_cursors_are_rejected(async_client, fake_backend):
+    """Test cursors missing keys or with wrong types are a 400, not a 500"""
+    for state in ({'after': None}, {'start': 5, 'end': None, 'after': None, 'pit': None},
+                  {'start': '2025-10-20T14:00:00', 'end': '2025-10-20T15:00:00', 'after': 'x', 'pit': None}):
+        response = await async_client.get('/api/logs', params={'cursor': search_client.encode_cursor(state)})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_negative_track_total_hits_is_rejected(async_client, fake_backend):
+    """Test a negative cap is a client error in both the query string and the body"""
+    window = {'start_time': '2025-10-20T14:00:00', 'end_time': '2025-10-20T15:00:00'}
+    response = await async_client.get('/api/logs', params={**window, 'track_total_hits': '-1'})
+    assert response.status_code == 400
+    response = await async_client.post('/api/logs/search', json={**window, 'query': 'error', 'track_total_hits': -1})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_compressed(async_client):
+    """Test br is preferred, gzip is the fallback and small responses are left alone"""
+    assert 'content-encoding' not in (await async_client.get('/', headers={'Accept-Encoding': 'br, gzip'})).headers
+    
+    for accept, expected in (('gzip, br', 'br'), ('gzip', 'gzip'), ('br;q=0, gzip', 'gzip')):
+        response = await async_client.get('/openapi.json', headers={'Accept-Encoding': accept})
+        assert response.headers['content-encoding'] == expected
+        assert response.json()['info']['title'] == 'LogWatch API'
+    
+    response = await async_client.get('/openapi.json', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_dashboard_panels_in_one_msearch(async_client, fake_backend, monkeypatch):
+    """Test the dashboard endpoint matches the separate endpoints with a single search request"""
+    monkeypatch.setattr(settings, 'agg_cache_enabled', False)
+    monkeypatch.setattr(settings, 'rollup_enabled', False)
+    client = OpenSearch(hosts=[{'host': fake_backend.host, 'port': fake_backend.port}], use_ssl=False)
+    search_client.bulk_index_logs(client, [
+        {'timestamp': f'2025-10-20T14:{i:02d}:00', 'source_file': '/logs/app.log', 'line_number': i + 1,
+         'raw_line': f'line {i}', 'event_id': f'{i:08x}'}
+        for i in range(40)
+    ])
+    params = {'start_time': '2025-10-20T14:00:00', 'end_time': '2025-10-20T15:00:00', 'interval': '10m'}
+    logs = (await async_client.get('/api/logs', params={**params, 'page_size': 50})).json()
+    aggregations = (await async_client.get('/api/logs/aggregations', params=params)).json()
+    assert (await async_client.get('/api/stats')).status_code == 200
+    
+    requests = fake_backend.requests
+    response = await async_client.get('/api/dashboard', params=params)
+    
+    assert response.status_code == 200
+    assert fake_backend.requests == requests + 1
+    data = response.json()
+    assert data['logs'] == logs
+    assert data['aggregations'] == aggregations
+    assert data['stats']['total_events'] == 40
+    assert set(data['timings_ms']) == {'logs', 'aggregations'}
+
+
+@pytest.mark.asyncio
+async def test_stats_and_health_served_from_snapshot(async_client, fake_backend):
+    """Test stats report byte sizes per index and repeated probes don't reach the cluster"""
+    client = OpenSearch(hosts=[{'host': fake_backend.host, 'port': fake_backend.port}], use_ssl=False)
+    search_client.bulk_index_logs(client, [
+        {'timestamp': f'2025-10-{20 + i % 2}T14:00:00', 'source_file': '/logs/app.log', 'line_number': i + 1,
+         'raw_line': f'line {i}', 'event_id': f'{i:08x}'}
+        for i in range(10)
+    ])
+    
+    data = (await async_client.get('/api/stats')).json()
+    assert data['total_events'] == 10
+    assert [idx['index'] for idx in data['per_index']] == ['logs-2025-10-20', 'logs-2025-10-21']
+    assert data['index_size'] == sum(idx['size_bytes'] for idx in data['per_index']) > 0
+    
+    requests = fake_backend.requests
+    for _ in range(5):
+        response = await async_client.get('/health')
+        assert response.json()['opensearch'] == 'green'
+    assert (await async_client.get('/api/stats')).json() == data
+    assert fake_backend.requests == requests
+
+
+@pytest.mark.asyncio
+async def test_log_pages_pass_source_through(async_client, fake_backend, monkeypatch):
+    """Test log pages return _source as stored unless response validation is on"""
+    client = OpenSearch(hosts=[{'host': fake_backend.host, 'port': fake_backend.port}], use_ssl=False)
+    search_client.bulk_index_logs(client, [
+        {'timestamp': '2025-10-20T14:00:00', 'source_file': '/logs/app.log', 'line_number': 1,
+         'raw_line': 'started', 'template_id': 'abc123', 'event_id': '00000001'}
+    ])
+    params = {'start_time': '2025-10-20T14:00:00', 'end_time': '2025-10-20T15:00:00'}
+    
+    response = await async_client.get('/api/logs', params=params)
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json()['logs'] == [{
+        'timestamp': '2025-10-20T14:00:00', 'source_file': '/logs/app.log', 'line_number': 1,
+        'raw_line': 'started', 'template_id': 'abc123', 'event_id': '00000001'
+    }]
+    
+    monkeypatch.setattr(settings, 'query_cache_enabled', False)
+    monkeypatch.setattr(settings, 'response_validation', True)
+    validated = (await async_client.get('/api/logs', params=params)).json()['logs'][0]
+    assert 'template_id' not in validated
+    assert (validated['fields'], validated['ingest_id']) == ({}, None)
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_queries_share_one_search(async_client, fake_backend, monkeypatch):
+    """Test concurrent identical aggregations are coalesced even with the cache off"""
+    monkeypatch.setattr(settings, 'query_cache_enabled', False)
+    monkeypatch.setattr(settings, 'agg_cache_enabled', False)
+    monkeypatch.setattr(settings, 'rollup_enabled', False)
+    fake_backend.store.create('logs-2025-10-20')
+    params = {'start_time': '2025-10-20T14:00:00', 'end_time': '2025-10-20T15:00:00'}
+    
+    # The first request also loads the index catalog
+    assert (await async_client.get('/api/logs/aggregations', params=params)).status_code == 200
+    requests = fake_backend.requests
+    await async_client.get('/api/logs/aggregations', params=params)
+    per_call = fake_backend.requests - requests
+    
+    fake_backend.config['agg_latency_ms'] = 200
+    requests = fake_backend.requests
+    responses = await asyncio.gather(*(async_client.get('/api/logs/aggregations', params=params) for _ in range(5)))
+    
+    assert [r.status_code for r in responses] == [200] * 5
+    assert fake_backend.requests - requests == per_call
+    flight = singleflight.get_single_flight()
+    assert (flight.coalesced, flight.in_flight()) == (4, 0)
+    
+    # Sequential requests aren't served stale results
+    await async_client.get('/api/logs/aggregations', params=params)
+    assert fake_backend.requests - requests == 2 * per_call
@@ -1,11 +1,21 @@
 """Test ingestion components"""
 
+import time
+import asyncio
 import pytest
 import tempfile
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from app.ingestion.checkpoint import CheckpointManager
 from app.ingestion.worker import IngestionWorker
+from app.ingestion.multiline import MultilineAggregator
+from app.ingestion.profiler import StageProfiler
+from app.ingestion.templates import TemplateMiner, lookup_templates
+from app.ingestion.sampling import SourceSampler
+from app.live_tail import TailHub, TailPublisher, tail_events
+from app.search.query import compile_matcher
+from app.config import settings
 
 
 def test_checkpoint_manager():
@@ -50,3 +60,196 @@ async def test_ingestion_worker(sample_log_lines):
     
     # Cleanup
     Path(temp_path).unlink()
+
+
+def test_multiline_aggregator():
+    """Test stack trace lines are folded into one event"""
+    aggregator = MultilineAggregator(enabled=True)
+    
+    lines = [
+        '2025-10-20 14:30:00 ERROR Request failed',
+        'java.lang.IllegalStateException: boom',
+        '\tat com.example.Service.handle(Service.java:42)',
+        '\t... 12 more',
+        '2025-10-20 14:30:01 INFO Recovered',
+    ]
+    
+    events = [aggregator.feed(line, i + 1, i * 100) for i, line in enumerate(lines)]
+    completed = [e for e in events if e]
+    
+    assert len(completed) == 1
+    assert len(completed[0]['lines']) == 4
+    assert aggregator.pending_offset == 400
+    assert aggregator.flush()['lines'] == [lines[-1]]
+
+
+@pytest.mark.asyncio
+async def test_ingest_file_multiline(tmp_path):
+    """Test continuation lines produce no documents of their own"""
+    log_file = tmp_path / "app.log"
+    log_file.write_text(
+        "[2025-10-20 14:30:00] ERROR: Request failed\n"
+        "Traceback (most recent call last):\n"
+        '  File "app.py", line 1, in <module>\n'
+        "ValueError: bad input\n"
+        "[2025-10-20 14:30:01] INFO: Recovered\n"
+    )
+    
+    worker = IngestionWorker()
+    worker.checkpoint_manager = CheckpointManager(str(tmp_path / "checkpoints.db"))
+    flushed = []
+    worker._flush_batch = flushed.extend
+    
+    await worker.ingest_file(str(log_file), incremental=False)
+    
+    assert len(flushed) == 2
+    assert flushed[0]['raw_line'].endswith("ValueError: bad input")
+    assert flushed[0]['fields']['level'] == 'ERROR'
+    assert flushed[0]['fields']['multiline_lines'] == 4
+    assert flushed[1]['line_number'] == 5
+    
+    # A live file's last event is held back; once the file is gone it no longer is
+    await worker.ingest_file(str(log_file), incremental=False, live=True)
+    assert str(log_file) in worker.pending_tails
+    log_file.unlink()
+    await worker.ingest_file(str(log_file), incremental=True, live=True)
+    assert worker.pending_tails == {}
+
+
+@pytest.mark.asyncio
+async def test_stage_profiler(tmp_path, monkeypatch):
+    """Test profiler attributes time to stages and parser classes"""
+    monkeypatch.setattr(settings, 'parse_cache_enabled', False)
+    log_file = tmp_path / "app.log"
+    log_file.write_text('{"timestamp": "2025-10-20T14:30:00Z", "level": "INFO"}\n' * 10)
+    
+    worker = IngestionWorker()
+    worker.checkpoint_manager = CheckpointManager(str(tmp_path / "checkpoints.db"))
+    worker._flush_batch = lambda batch: None
+    
+    profiler = StageProfiler()
+    profiler.instrument(worker)
+    await worker.ingest_file(str(log_file), incremental=False)
+    
+    assert profiler.stages["parser:JSONParser"].calls == 10
+    assert profiler.stages["ingest"].calls == 1
+    assert profiler.stages["ingest"].self_wall <= profiler.stages["ingest"].wall
+    assert "ingest;build_doc;parse;parser:JSONParser;timestamp" in profiler.stacks
+
+
+def test_parse_cache_rederives_timestamp():
+    """Test lines differing only by timestamp share a cache entry"""
+    worker = IngestionWorker()
+    
+    first = worker._parse_line('{"timestamp": "2025-10-20T14:30:00Z", "level": "INFO", "message": "heartbeat"}')
+    second = worker._parse_line('{"timestamp": "2025-10-20T14:30:05Z", "level": "INFO", "message": "heartbeat"}')
+    
+    assert worker.parse_cache.stats()['hits'] == 1
+    assert worker._parser_hits['JSONParser'] == 2
+    assert second['tokens'] == worker.parsers[0].tokenize(
+        '{"timestamp": "2025-10-20T14:30:05Z", "level": "INFO", "message": "heartbeat"}'
+    )
+    assert second['fields']['timestamp'] == "2025-10-20T14:30:05Z"
+    assert (second['timestamp'] - first['timestamp']).total_seconds() == 5
+    assert '05z' in second['tokens'] and '00z' not in second['tokens']
+    assert second['fields']['message'] == 'heartbeat'
+
+
+def test_template_miner(tmp_path):
+    """Test lines cluster into templates that survive a restart"""
+    db_path = str(tmp_path / "templates.db")
+    miner = TemplateMiner(db_path)
+    
+    first, _ = miner.match("Login succeeded for alice from 10.0.0.1 in 35ms")
+    second, params = miner.match("Login succeeded for bob from 10.0.0.9 in 5ms")
+    other, _ = miner.match("Connection pool exhausted")
+    
+    assert first == second != other
+    assert params == ['bob', '10.0.0.9', '5ms']
+    assert miner.clusters[first].template == "Login succeeded for <*> from <*> in <*>"
+    
+    miner.save()
+    restarted = TemplateMiner(db_path)
+    assert restarted.match("Login succeeded for carol from 10.0.0.2 in 7ms")[0] == first
+    assert lookup_templates([str(other)], db_path) == {str(other): "Connection pool exhausted"}
+
+
+def test_template_miners_share_database(tmp_path):
+    """Test miners sharing a database never reuse or overwrite each other's ids"""
+    db_path = str(tmp_path / "templates.db")
+    watcher, cli = TemplateMiner(db_path), TemplateMiner(db_path)
+    
+    login, _ = watcher.match("Login succeeded for alice from 10.0.0.1 in 35ms")
+    pool, _ = cli.match("Connection pool exhausted")
+    assert login != pool
+    
+    watcher.match("Login succeeded for bob from 10.0.0.9 in 5ms")
+    watcher.save()
+    cli.save()
+    assert lookup_templates([str(login), str(pool)], db_path) == {
+        str(login): "Login succeeded for <*> from <*> in <*>",
+        str(pool): "Connection pool exhausted"
+    }
+    assert TemplateMiner(db_path).clusters[login].size == 2
+
+
+def test_source_sampler():
+    """Test a flooding source is thinned, errors are kept and weights add up"""
+    sampler = SourceSampler(rate=10, burst=10, keep_levels="ERROR,FATAL")
+    start = datetime(2025, 10, 20, 14, 30)
+    
+    kept, weights, errors_kept = 0, 0, 0
+    for i in range(5000):
+        # 1000 lines/s of log time, every 100th an ERROR
+        ts = start + timedelta(milliseconds=i)
+        level = "ERROR" if i % 100 == 0 else "INFO"
+        weight = sampler.admit("noisy.log", ts, level)
+        if weight is None:
+            continue
+        if level == "ERROR":
+            errors_kept += 1
+        else:
+            kept += 1
+            weights += weight
+    
+    assert errors_kept == 50
+    assert kept < 200
+    assert weights + sampler.sources["noisy.log"].dropped == 4950
+    
+    # A quiet source is unaffected
+    assert sampler.admit("quiet.log", start, "INFO") == 1
+
+
+@pytest.mark.asyncio
+async def test_live_tail_feed(tmp_path, monkeypatch):
+    """Test indexed batches reach filtered subscribers across the socket, and slow ones are told what they missed"""
+    monkeypatch.setattr(settings, 'live_tail_buffer', 2)
+    publisher = TailPublisher(str(tmp_path / "tail.sock"))
+    await publisher.start()
+    hub = TailHub()
+    follower = asyncio.create_task(hub.follow(publisher.path))
+    errors = hub.subscribe(compile_matcher('level:ERROR'))
+    everything = hub.subscribe(compile_matcher(None))
+    
+    while not publisher.followers:
+        await asyncio.sleep(0.01)
+    docs = [
+        {'timestamp': '2025-10-20T14:30:00', 'raw_line': f'line {i}', 'tokens': ['line'],
+         'fields': {'level': 'ERROR' if i == 3 else 'INFO'}}
+        for i in range(5)
+    ]
+    start = time.perf_counter()
+    publisher.publish(docs)
+    received = await asyncio.wait_for(errors.queue.get(), timeout=1)
+    
+    assert time.perf_counter() - start < 0.1
+    assert received['raw_line'] == 'line 3' and 'tokens' not in received
+    
+    events = tail_events(everything)
+    assert await events.__anext__() == ": connected\n\n"
+    chunk = await events.__anext__()
+    assert chunk.count("event: log") == 2
+    assert 'event: lag\ndata: {"dropped": 3}' in chunk
+    
+    follower.cancel()
+    await publisher.stop()
@@ -0,0 +1,413 @@
+"""Test search layer against the in-memory OpenSearch stand-in"""
+
+import json
+import pytest
+from datetime import datetime, timedelta
+from opensearchpy import OpenSearch, AsyncOpenSearch
+
+from app.config import settings
+from app.search.client import bulk_index_logs, search_logs, aggregate_logs
+from app.search import indices, rollups
+from app.search.aggregations import IncrementalAggregator, dashboard_aggregations
+from app.ingestion.rollups import RollupAccumulator
+from app.search.cache import QueryCache, normalize_window, ttl_for
+from app.search.export import export_logs, parse_resume_after
+from app.search.query import compile_query
+from app.search.mappings import get_index_template, keyword_field
+from app.search.lifecycle import setup_lifecycle, recommend_shards
+from app.ingestion.worker import IngestionWorker
+from benchmarks.fake_opensearch import FakeOpenSearch
+
+
+@pytest.fixture
+def fake_opensearch(monkeypatch):
+    """Run the stand-in on an ephemeral port"""
+    monkeypatch.setattr(indices, '_catalog', None)
+    with FakeOpenSearch() as fake:
+        yield fake
+
+
+@pytest.fixture
+def fake_client(fake_opensearch):
+    """Synchronous client pointed at the stand-in"""
+    return OpenSearch(hosts=[{'host': fake_opensearch.host, 'port': fake_opensearch.port}], use_ssl=False)
+
+
+@pytest.fixture
+async def fake_async_client(fake_opensearch):
+    """Async client pointed at the stand-in"""
+    client = AsyncOpenSearch(hosts=[{'host': fake_opensearch.host, 'port': fake_opensearch.port}], use_ssl=False)
+    yield client
+    await client.close()
+
+
+def _docs(count, start=datetime(2025, 10, 20, 14, 0, 0)):
+    return [
+        {
+            'timestamp': (start + timedelta(seconds=i)).isoformat(),
+            'source_file': f'/logs/app{i % 2}.log',
+            'line_number': i + 1,
+            'raw_line': f'request {i} failed' if i % 5 == 0 else f'request {i} ok',
+            'tokens': ['request', str(i)],
+            'fields': {'level': 'ERROR' if i % 5 == 0 else 'INFO'},
+            'ingest_id': 'test',
+            'event_id': f'{i:08x}'
+        }
+        for i in range(count)
+    ]
+
+
+def test_bulk_retries_rejected_items(fake_opensearch, fake_client, monkeypatch):
+    """Test 429-rejected bulk items are retried until indexed"""
+    monkeypatch.setattr(settings, 'bulk_initial_backoff_seconds', 0.01)
+    monkeypatch.setattr(settings, 'bulk_max_retries', 10)
+    fake_opensearch.config['reject_rate'] = 0.3
+    
+    result = bulk_index_logs(fake_client, _docs(50))
+    
+    assert result == {'success': 50, 'errors': 0, 'failed': []}
+    assert fake_client.count(index='logs-*')['count'] == 50
+    
+    # Out of retries: the documents that weren't indexed are handed back
+    monkeypatch.setattr(settings, 'bulk_max_retries', 0)
+    fake_opensearch.config['reject_rate'] = 1.0
+    docs = _docs(3)
+    result = bulk_index_logs(fake_client, docs)
+    assert (result['success'], result['errors']) == (0, 3)
+    assert result['failed'] == docs
+
+
+@pytest.mark.asyncio
+async def test_search_and_aggregate(fake_client, fake_async_client):
+    """Test search and aggregations round-trip through the stand-in"""
+    bulk_index_logs(fake_client, _docs(20))
+    start, end = datetime(2025, 10, 20, 14, 0, 0), datetime(2025, 10, 20, 15, 0, 0)
+    
+    results = await search_logs(fake_async_client, start, end, query='failed', page_size=10)
+    assert results['total'] == 4
+    assert all('failed' in log['raw_line'] for log in results['logs'])
+    
+    assert all('tokens' not in log for log in results['logs'])
+    
+    projected = await search_logs(fake_async_client, start, end, fields=['fields.level', '-line_number'], page_size=5)
+    assert set(projected['logs'][0]) == {'timestamp', 'source_file', 'event_id', 'fields'}
+    
+    aggs = await aggregate_logs(fake_async_client, start, end, interval='1m')
+    assert sum(b['count'] for b in aggs['time_series']) == 20
+    assert {s['source'] for s in aggs['sources']} == {'/logs/app0.log', '/logs/app1.log'}
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_is_stable_during_ingest(fake_opensearch, fake_client, fake_async_client):
+    """Test PIT + search_after pages cover each hit once while new logs arrive"""
+    bulk_index_logs(fake_client, _docs(25))
+    start, end = datetime(2025, 10, 20, 14, 0, 0), datetime(2025, 10, 20, 15, 0, 0)
+    
+    page = await search_logs(fake_async_client, start, end, page_size=10, use_cursor=True)
+    seen = [log['line_number'] for log in page['logs']]
+    
+    # Newer logs ingested mid-browse must not shift later pages
+    bulk_index_logs(fake_client, _docs(5, start=datetime(2025, 10, 20, 14, 0, 30)))
+    
+    while page['next_cursor']:
+        page = await search_logs(fake_async_client, start, end, cursor=page['next_cursor'])
+        seen.extend(log['line_number'] for log in page['logs'])
+    
+    assert seen == list(range(25, 0, -1))
+    assert page['page'] == 3
+    assert fake_opensearch.store.pits == {}
+    
+    with pytest.raises(ValueError):
+        await search_logs(fake_async_client, start, end, cursor='not-a-cursor')
+
+
+@pytest.mark.asyncio
+async def test_track_total_hits_modes(fake_client, fake_async_client, monkeypatch):
+    """Test capped totals are flagged as lower bounds and can be skipped entirely"""
+    bulk_index_logs(fake_client, _docs(20))
+    start, end = datetime(2025, 10, 20, 14, 0, 0), datetime(2025, 10, 20, 15, 0, 0)
+    
+    monkeypatch.setattr(settings, 'search_track_total_hits', '5')
+    capped = await search_logs(fake_async_client, start, end, page_size=3)
+    assert (capped['total'], capped['is_lower_bound']) == (5, True)
+    
+    exact = await search_logs(fake_async_client, start, end, page_size=3, track_total_hits=True)
+    assert (exact['total'], exact['is_lower_bound']) == (20, False)
+    
+    skipped = await search_logs(fake_async_client, start, end, page_size=3, track_total_hits='off')
+    assert skipped['total'] is None
+    assert len(skipped['logs']) == 3
+    
+    with pytest.raises(ValueError):
+        await search_logs(fake_async_client, start, end, track_total_hits='some')
+    with pytest.raises(ValueError):
+        await search_logs(fake_async_client, start, end, track_total_hits=-1)
+
+
+@pytest.mark.asyncio
+async def test_time_range_prunes_daily_indices(fake_opensearch, fake_client, fake_async_client):
+    """Test short windows only search the daily indices they touch"""
+    docs = []
+    for day in range(3):
+        docs += _docs(10, start=datetime(2025, 10, 19 + day, 14, 0, 0))
+    # 23:30 at -05:00 is the 22nd in UTC
+    docs.append({**_docs(1)[0], 'timestamp': '2025-10-21T23:30:00-05:00', 'event_id': 'offset'})
+    bulk_index_logs(fake_client, docs)
+    assert 'logs-2025-10-22' in fake_opensearch.store.indices
+    
+    start, end = datetime(2025, 10, 20, 14, 0, 0), datetime(2025, 10, 20, 14, 1, 0)
+    page = await search_logs(fake_async_client, start, end)
+    assert page['total'] == 10
+    assert indices.get_index_catalog().indices_for(start, end) == ['logs-2025-10-20']
+    
+    # Nothing indexed that day: answered without searching
+    requests = fake_opensearch.requests
+    empty = await search_logs(fake_async_client, datetime(2025, 10, 1), datetime(2025, 10, 1, 1))
+    assert (empty['total'], empty['logs']) == (0, [])
+    assert (await aggregate_logs(fake_async_client, datetime(2025, 10, 1), datetime(2025, 10, 1, 1)))['time_series'] == []
+    assert fake_opensearch.requests == requests
+
+
+@pytest.mark.asyncio
+async def test_query_language_filters(fake_client, fake_async_client):
+    """Test structured queries compile to filter clauses and select the right events"""
+    bulk_index_logs(fake_client, _docs(20))
+    start, end = datetime(2025, 10, 20, 14, 0, 0), datetime(2025, 10, 20, 15, 0, 0)
+    
+    async def lines(query):
+        page = await search_logs(fake_async_client, start, end, query=query, track_total_hits=True)
+        return sorted(log['line_number'] for log in page['logs'])
+    
+    assert compile_query('level:ERROR') == {'term': {'fields.level.keyword': 'ERROR'}}
+    assert await lines('level:ERROR') == [1, 6, 11, 16]
+    assert await lines('level:ERROR -source_file:/logs/app1.log') == [1, 11]
+    assert await lines('message:"request 5 failed"') == [6]
+    assert await lines('(level:ERROR OR line_number:[2 TO 3]) AND NOT source:/logs/app0.log') == [2, 6, 16]
+    assert await lines('failed') == [1, 6, 11, 16]
+    
+    with pytest.raises(ValueError):
+        compile_query('(level:ERROR')
+
+
+def test_query_language_lean_phrases(monkeypatch):
+    """Test phrases compile without positional queries under the lean profile"""
+    monkeypatch.setattr(settings, 'index_profile', 'lean')
+    
+    bare = compile_query('"database timeout"')['multi_match']
+    assert bare['operator'] == 'and' and 'type' not in bare
+    assert compile_query('message:"database timeout"') == {
+        'match': {'raw_line': {'query': 'database timeout', 'operator': 'and'}}
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_streams_all_events_and_resumes(fake_opensearch, fake_client, fake_async_client, monkeypatch):
+    """Test export pages through every event and can resume after the last line received"""
+    monkeypatch.setattr(settings, 'export_batch_size', 4)
+    bulk_index_logs(fake_client, _docs(10))
+    start, end = datetime(2025, 10, 20, 14, 0, 0), datetime(2025, 10, 20, 15, 0, 0)
+    
+    chunks = [chunk async for chunk in export_logs(fake_async_client, start, end)]
+    lines = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+    assert [line['line_number'] for line in lines] == list(range(1, 11))
+    assert len(chunks) == 3
+    assert fake_opensearch.store.pits == {}
+    
+    resume = f"{lines[5]['timestamp']},{lines[5]['event_id']}"
+    rest = b''.join([chunk async for chunk in export_logs(fake_async_client, start, end, fmt='raw', resume_after=resume)])
+    assert rest.decode().splitlines() == [line['raw_line'] for line in lines[6:]]
+    assert parse_resume_after('2025-10-20T14:00:00.999999Z,abc') == [1760968800999, 'abc']
+    with pytest.raises(ValueError):
+        parse_resume_after(lines[5]['timestamp'])
+    
+    csv_export = b''.join([chunk async for chunk in export_logs(fake_async_client, start, end, query='failed', fmt='csv')])
+    rows = csv_export.decode().splitlines()
+    assert rows[0] == 'timestamp,source_file,line_number,event_id,raw_line'
+    assert [row.split(',')[2] for row in rows[1:]] == ['1', '6']
+
+
+@pytest.mark.asyncio
+async def test_incremental_aggregation_matches_full(fake_opensearch, fake_client, fake_async_client):
+    """Test cached closed segments plus the live tail add up to the full aggregation"""
+    start = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(hours=3)
+    bulk_index_logs(fake_client, _docs(300, start=start) + _docs(50, start=start + timedelta(hours=2, minutes=50)))
+    begin, end = start + timedelta(minutes=3, seconds=30), datetime.utcnow()
+    aggregator = IncrementalAggregator()
+    
+    full = await aggregate_logs(fake_async_client, begin, end, interval='1m')
+    first = await aggregator.aggregate(fake_async_client, begin, end, interval='1m')
+    assert first['time_series'] == full['time_series']
+    assert first['sources'] == full['sources']
+    assert first['top_tokens'] == full['top_tokens']
+    
+    bulk_index_logs(fake_client, _docs(5, start=datetime.utcnow().replace(microsecond=0)))
+    fetched, requests = aggregator.segments_fetched, fake_opensearch.requests
+    again = await aggregator.aggregate(fake_async_client, begin, datetime.utcnow() + timedelta(seconds=5), interval='1m')
+    
+    assert aggregator.segments_fetched == fetched
+    assert fake_opensearch.requests == requests + 1
+    assert sum(b['count'] for b in again['time_series']) == sum(b['count'] for b in full['time_series']) + 5
+    
+    # Late events for an already-cached segment (a backfilled file) are picked up
+    bulk_index_logs(fake_client, _docs(7, start=start + timedelta(hours=1, minutes=10)))
+    backfilled = await aggregator.aggregate(fake_async_client, begin, datetime.utcnow() + timedelta(seconds=5), interval='1m')
+    assert aggregator.segments_fetched > fetched
+    assert sum(b['count'] for b in backfilled['time_series']) == sum(b['count'] for b in again['time_series']) + 7
+
+
+@pytest.mark.asyncio
+async def test_rollups_serve_coarse_dashboards(fake_opensearch, fake_client, fake_async_client, monkeypatch):
+    """Test per-minute rollups written at ingest reproduce the raw hourly aggregations"""
+    monkeypatch.setattr(rollups, '_coverage_start', {})
+    monkeypatch.setattr(settings, 'rollup_coverage_refresh_seconds', 0)
+    monkeypatch.setattr(settings, 'agg_cache_enabled', False)
+    start, end = datetime(2025, 10, 20, 14, 0, 0), datetime(2025, 10, 20, 17, 0, 0)
+    docs = _docs(200, start=start) + _docs(100, start=start + timedelta(hours=1, minutes=30))
+    for i, doc in enumerate(docs):
+        doc['template_id'] = str(i % 3)
+    bulk_index_logs(fake_client, docs)
+    
+    # Nothing rolled up yet: raw aggregation
+    raw = await dashboard_aggregations(fake_async_client, start, end, interval='1h')
+    assert raw['top_tokens']
+    
+    accumulator = RollupAccumulator(started_at=start)
+    for doc in docs[:150]:
+        accumulator.add(doc)
+    accumulator.flush(fake_client)
+    for doc in docs[150:]:
+        accumulator.add(doc)
+    accumulator.flush(fake_client)
+    
+    rolled = await dashboard_aggregations(fake_async_client, start, end, interval='1h')
+    assert rolled['top_tokens'] == []
+    assert rolled['time_series'] == raw['time_series']
+    assert rolled['sources'] == raw['sources']
+    assert [t['count'] for t in rolled['top_templates']] == [100, 100, 100]
+    
+    timeline = await rollups.level_timeline(fake_async_client, start, end)
+    assert sum(b['total'] for b in timeline) == 300
+    assert sum(b['levels'].get('ERROR', 0) for b in timeline) == 60
+    
+    # Finer charts still come from raw events
+    minutes = await dashboard_aggregations(fake_async_client, start, end, interval='1m')
+    assert minutes['top_tokens']
+
+
+
+@pytest.mark.asyncio
+async def test_rollup_coverage_starts_when_rollups_began(fake_opensearch, fake_client, fake_async_client, monkeypatch, tmp_path):
+    """Test backfilled rollups don't extend coverage and failed documents aren't rolled up"""
+    monkeypatch.setattr(rollups, '_coverage_start', {})
+    monkeypatch.setattr(settings, 'rollup_coverage_refresh_seconds', 0)
+    began = datetime(2025, 10, 20, 15, 0, 0)
+    assert not await rollups.rollups_cover(fake_async_client, began)
+    
+    # An older file ingested after rollups began is rolled up, but its range isn't covered
+    accumulator = RollupAccumulator(started_at=began)
+    for doc in _docs(10, start=began - timedelta(hours=1)):
+        accumulator.add(doc)
+    accumulator.flush(fake_client)
+    assert await rollups.rollups_cover(fake_async_client, began)
+    assert not await rollups.rollups_cover(fake_async_client, began - timedelta(minutes=30))
+    
+    monkeypatch.setattr(settings, 'template_db', str(tmp_path / 'templates.db'))
+    monkeypatch.setattr(settings, 'bulk_max_retries', 0)
+    monkeypatch.setattr('app.ingestion.worker.get_opensearch_client', lambda: fake_client)
+    worker = IngestionWorker()
+    fake_opensearch.config['reject_rate'] = 1.0
+    worker._flush_batch(_docs(5))
+    assert len(worker.rollups) == 0
+    fake_opensearch.config['reject_rate'] = 0.0
+    worker._flush_batch(_docs(5))
+    assert len(worker.rollups) > 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_rollups_are_kept_for_the_next_flush(fake_opensearch, fake_client, fake_async_client, monkeypatch):
+    """Test a partially failing flush loses no counts"""
+    monkeypatch.setattr(rollups, '_coverage_start', {})
+    monkeypatch.setattr(settings, 'rollup_coverage_refresh_seconds', 0)
+    start = datetime(2025, 10, 20, 14, 0, 0)
+    accumulator = RollupAccumulator(started_at=start)
+    for doc in _docs(600, start=start):
+        accumulator.add(doc)
+    keys = len(accumulator)
+    
+    fake_opensearch.config['reject_rate'] = 0.5
+    written = accumulator.flush(fake_client)
+    assert 0 < written < keys and len(accumulator) == keys - written
+    
+    fake_opensearch.config['reject_rate'] = 0.0
+    accumulator.flush(fake_client)
+    assert len(accumulator) == 0
+    
+    timeline = await rollups.level_timeline(fake_async_client, start, start + timedelta(hours=1))
+    assert sum(b['total'] for b in timeline) == 600
+    assert sum(b['levels'].get('ERROR', 0) for b in timeline) == 120
+
+
+def test_query_cache_windows_and_eviction():
+    """Test live windows are snapped and short-lived, and eviction follows the policy"""
+    now = datetime.utcnow()
+    start, end = normalize_window(now - timedelta(hours=1), now)
+    assert start <= now - timedelta(hours=1) and end >= now and (end - now).total_seconds() < 10
+    assert start.second % 10 == end.second % 10 == start.microsecond == 0
+    
+    old = (datetime(2025, 10, 20, 14, 0, 3), datetime(2025, 10, 20, 15, 0, 7))
+    assert normalize_window(*old) == old
+    assert ttl_for(now) < ttl_for(now - timedelta(hours=2)) < ttl_for(old[1])
+    
+    for policy, survivor in (('lru', 'b'), ('lfu', 'a')):
+        cache = QueryCache(max_entries=2, policy=policy)
+        cache.put('a', 1, 60)
+        cache.put('b', 2, 60)
+        assert cache.get('a') == 1
+        assert cache.get('a') == 1
+        assert cache.get('b') == 2
+        cache.put('c', 3, 60)
+        assert cache.get(survivor) is not None
+        assert len(cache._entries) == 2
+    
+    cache.put('expired', 4, 0)
+    assert cache.get('expired') is None
+
+
+def test_lean_profile(monkeypatch, tmp_path):
+    """Test the lean template and the documents the worker emits for it"""
+    monkeypatch.setattr(settings, 'index_profile', 'lean')
+    monkeypatch.setattr(settings, 'template_db', str(tmp_path / 'templates.db'))
+    
+    properties = get_index_template()['template']['mappings']['properties']
+    assert properties['source_file']['type'] == 'keyword'
+    assert properties['fields']['type'] == 'flat_object'
+    assert properties['raw_line']['norms'] is False
+    assert properties['level']['eager_global_ordinals'] is True
+    assert keyword_field('source_file') == 'source_file'
+    
+    worker = IngestionWorker()
+    doc = worker._build_doc({'lines': ['[2025-10-20 14:30:00] ERROR: Disk full'], 'line_number': 1, 'offset': 0}, '/logs/app.log')
+    assert doc['level'] == 'ERROR'
+    assert 'tokens' not in doc
+
+
+def test_lifecycle_setup_and_write_alias(fake_opensearch, fake_client, monkeypatch):
+    """Test policies, template and write index are set up and bulk goes through the alias"""
+    monkeypatch.setattr(settings, 'lifecycle_enabled', True)
+    
+    summary = setup_lifecycle(fake_client)
+    assert summary['bootstrapped_index'] == 'logs-000001'
+    assert summary['shards'] == 1
+    
+    # Re-running updates the policies in place and keeps the write index
+    assert setup_lifecycle(fake_client)['bootstrapped_index'] is None
+    policy = fake_opensearch.store.policies['logs-rollover']
+    assert policy['_seq_no'] == 1
+    assert [state['name'] for state in policy['policy']['states']] == ['hot', 'warm', 'delete']
+    
+    bulk_index_logs(fake_client, _docs(10))
+    assert fake_client.count(index='logs-000001')['count'] == 10
+    
+    monkeypatch.setattr(settings, 'lifecycle_shard_target_size', '10gb')
+    assert recommend_shards(25 * 1024 ** 3) == 3
+    assert recommend_shards(500 * 1024 ** 3) == 3  # capped by the rollover size (30gb)
@@ -93,7 +93,7 @@ import LogViewer from './LogViewer'
 import LogSearch from './LogSearch'
 import Charts from './Charts'
 import ChatSidebar from './ChatSidebar'
-import { fetchLogs, fetchAggregations } from '../services/api'
+import { fetchDashboard, openLiveTail } from '../services/api'
 
 function Dashboard() {
   const [timeRange, setTimeRange] = useState({
@@ -106,33 +106,43 @@ function Dashboard() {
   const [searchQuery, setSearchQuery] = useState('')
   const [page, setPage] = useState(1)
   const [total, setTotal] = useState(0)
+  const [totalIsLowerBound, setTotalIsLowerBound] = useState(false)
   const [chatOpen, setChatOpen] = useState(false)
+  const [live, setLive] = useState(false)
 
   useEffect(() => {
     loadData()
   }, [timeRange, page, searchQuery])
 
+  // Live tail: new logs are pushed by the server instead of polled
+  useEffect(() => {
+    if (!live) return undefined
+    return openLiveTail({ query: searchQuery }, {
+      onLog: (log) => {
+        setLogs((current) => [log, ...current].slice(0, 50))
+        setTotal((current) => current + 1)
+      },
+      onLag: (dropped) => console.warn(`Live tail skipped ${dropped} logs`)
+    })
+  }, [live, searchQuery])
+
   const loadData = async () => {
     setLoading(true)
     try {
-      const logsData = await fetchLogs({
+      // Logs, charts and stats in one request
+      const data = await fetchDashboard({
         start_time: timeRange.start.toISOString(),
         end_time: timeRange.end.toISOString(),
         query: searchQuery || undefined,
         page,
-        page_size: 50
-      })
-      
-      setLogs(logsData.logs)
-      setTotal(logsData.total)
-
-      const aggsData = await fetchAggregations({
-        start_time: timeRange.start.toISOString(),
-        end_time: timeRange.end.toISOString(),
+        page_size: 50,
         interval: '1h'
       })
       
-      setAggregations(aggsData)
+      setLogs(data.logs.logs)
+      setTotal(data.logs.total ?? 0)
+      setTotalIsLowerBound(data.logs.is_lower_bound)
+      setAggregations(data.aggregations)
     } catch (error) {
       console.error('Error loading data:', error)
     } finally {
@@ -176,6 +186,10 @@ function Dashboard() {
 
       <TimeRangePicker timeRange={timeRange} onChange={setTimeRange} />
       <LogSearch value={searchQuery} onChange={setSearchQuery} />
+      <label className="flex items-center gap-2 text-sm">
+        <input type="checkbox" checked={live} onChange={(e) => setLive(e.target.checked)} />
+        Live tail
+      </label>
 
       {aggregations && (
         <Charts data={aggregations} onTimeClick={handleTimeClick} />
@@ -186,6 +200,7 @@ function Dashboard() {
         loading={loading} 
         page={page}
         total={total}
+        totalIsLowerBound={totalIsLowerBound}
         onPageChange={setPage}
       />
     </div>
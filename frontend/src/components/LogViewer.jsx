@@ -2,7 +2,7 @@ import React, { useState } from 'react'
 import RawLogModal from './RawLogModal'
 import { formatDate } from '../utils/formatters'
 
-function LogViewer({ logs, loading, page, total, onPageChange }) {
+function LogViewer({ logs, loading, page, total, totalIsLowerBound, onPageChange }) {
   const [selectedLog, setSelectedLog] = useState(null)
 
   const pageSize = 50
@@ -12,7 +12,7 @@ function LogViewer({ logs, loading, page, total, onPageChange }) {
     <div className="bg-white rounded-lg shadow">
       <div className="p-4 border-b">
         <div className="flex justify-between items-center">
-          <h2 className="text-lg font-semibold">Log Events ({total.toLocaleString()})</h2>
+          <h2 className="text-lg font-semibold">Log Events ({total.toLocaleString()}{totalIsLowerBound ? '+' : ''})</h2>
           
           {totalPages > 1 && (
             <div className="flex gap-2">
@@ -67,7 +67,7 @@ function LogViewer({ logs, loading, page, total, onPageChange }) {
                       {log.source_file.split('/').pop()}
                     </span>
                     
-                    {log.fields.level && (
+                    {log.fields?.level && (
                       <span className={`px-2 py-0.5 rounded ${
                         log.fields.level === 'ERROR' ? 'bg-red-100 text-red-700' :
                         log.fields.level === 'WARN' ? 'bg-yellow-100 text-yellow-700' :
@@ -39,7 +39,7 @@ function RawLogModal({ log, onClose }) {
               </pre>
             </div>
 
-            {Object.keys(log.fields).length > 0 && (
+            {log.fields && Object.keys(log.fields).length > 0 && (
               <div>
                 <label className="text-sm font-semibold text-gray-700">Parsed Fields</label>
                 <div className="mt-1 bg-gray-50 p-3 rounded">
@@ -56,22 +56,6 @@ function RawLogModal({ log, onClose }) {
                 </div>
               </div>
             )}
-
-            {log.tokens && log.tokens.length > 0 && (
-              <div>
-                <label className="text-sm font-semibold text-gray-700">Tokens</label>
-                <div className="mt-1 flex flex-wrap gap-2">
-                  {log.tokens.map((token, idx) => (
-                    <span
-                      key={idx}
-                      className="px-2 py-1 bg-blue-100 text-blue-700 rounded text-xs"
-                    >
-                      {token}
-                    </span>
-                  ))}
-                </div>
-              </div>
-            )}
           </div>
         </div>
       </div>
@@ -33,6 +33,26 @@ export const fetchAggregations = async (params) => {
   return response.data
 }
 
+export const fetchDashboard = async (params) => {
+  const response = await api.get('/api/dashboard', { params })
+  return response.data
+}
+
+// Server-sent stream of newly indexed logs; returns a function that closes it
+export const openLiveTail = (params, { onLog, onLag }) => {
+  const query = new URLSearchParams()
+  Object.entries(params).forEach(([key, value]) => {
+    if (value) query.append(key, value)
+  })
+  const token = localStorage.getItem('token')
+  if (token) query.append('access_token', token)
+
+  const source = new EventSource(`${API_URL}/api/logs/tail?${query}`)
+  source.addEventListener('log', (event) => onLog(JSON.parse(event.data)))
+  source.addEventListener('lag', (event) => onLag && onLag(JSON.parse(event.data).dropped))
+  return () => source.close()
+}
+
 export const login = async (username, password) => {
   const formData = new FormData()
   formData.append('username', username)
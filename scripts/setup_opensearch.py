@@ -36,19 +36,44 @@
 
 import sys
 import os
+import argparse
 
-# 🔧 Add project root to Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 🔧 Add backend/ to Python path so the app package resolves like it does in the container
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
 
-from backend.app.search.client import get_opensearch_client
-from backend.app.search.mappings import create_index_template
+from app.config import settings
+from app.search.client import get_opensearch_client
+from app.search.mappings import INDEX_PROFILES, create_index_template
+from app.search.lifecycle import setup_lifecycle
+from app.search.rollups import create_rollup_template
 
 def main():
+    parser = argparse.ArgumentParser(description="Setup OpenSearch indices")
+    parser.add_argument("--profile", choices=INDEX_PROFILES, default=settings.index_profile,
+                        help="Index template profile (default: INDEX_PROFILE)")
+    parser.add_argument("--lifecycle", action="store_true", default=settings.lifecycle_enabled,
+                        help="Set up rollover/retention policies and the write alias (default: LIFECYCLE_ENABLED)")
+    parser.add_argument("--shards", type=int, help="Primary shards for new indices (default: from observed ingest rate)")
+    args = parser.parse_args()
+    if args.profile != settings.index_profile:
+        # The worker and the API pick field names from INDEX_PROFILE
+        parser.error(f"--profile {args.profile} doesn't match INDEX_PROFILE={settings.index_profile}; "
+                     f"set INDEX_PROFILE={args.profile} for the whole deployment instead")
+
     # Use the synchronous client
     client = get_opensearch_client()
     # Run the setup synchronously
-    create_index_template(client)
+    if args.lifecycle:
+        summary = setup_lifecycle(client, shards=args.shards, profile=args.profile)
+        print(f"Lifecycle: writing through {summary['write_alias']} with {summary['shards']} shard(s) "
+              f"(observed {summary['observed_daily_bytes'] / 1e9:.2f} GB/day)")
+        if summary['bootstrapped_index']:
+            print(f"Created initial write index {summary['bootstrapped_index']}")
+    else:
+        create_index_template(client, args.profile)
+    if settings.rollup_enabled:
+        create_rollup_template(client)
     print("OpenSearch setup complete")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()